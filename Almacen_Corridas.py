@@ -0,0 +1,391 @@
+"""
+Almacén en disco de las corridas de simulación.
+
+Cada corrida se guarda en su propia carpeta en formato columnar: un archivo
+.npy por columna (almuerzos, carne y cada rubro de los estados de
+resultados, con una fila por día o por réplica) más un metadata.json con la
+semilla, los parámetros, las entradas y la fecha. Los rubros que no cambian
+entre filas (arriendo, depreciación, salarios...) no se escriben como
+columna: su valor va en metadata.json y se reconstruye al leer. Al reabrir
+una corrida las columnas se mapean en memoria (np.load con mmap_mode), así
+que se pueden volver a analizar o graficar sin simular de nuevo y sin
+cargarlas en RAM.
+
+Las columnas se escriben por bloques: el encabezado .npy se reserva al
+principio y se completa al cerrar, cuando ya se conoce el número de filas.
+Mientras se escribe, la corrida vive en una carpeta temporal
+(<nombre>.parcial) que sólo toma su nombre definitivo al cerrar, una vez
+escritos los encabezados y el metadata.json; las carpetas .parcial o sin
+metadata.json son corridas incompletas y no se listan.
+
+El almacén conserva las CORRIDAS_MAXIMAS corridas más recientes;
+guardar_corrida borra las más antiguas.
+
+Uso:
+    ruta = guardar_corrida("diaria", almuerzos, carne, entradas, semilla, parametros)
+    corrida = abrir_corrida(ruta)
+    corrida["Variable: Utilidad Operacional"].mean()
+"""
+import datetime
+import json
+import os
+import shutil
+from dataclasses import asdict
+
+import numpy as np
+
+from Calculos_Financieros import (
+    EntradasFinancieras, CLAVES_TRADICIONAL, CLAVES_VARIABLE, CLAVES_PUNTO_EQUILIBRIO,
+    calcular_personal, calcular_estado_tradicional, calcular_estado_variable, huella_entradas,
+)
+
+# Carpeta donde se guardan las corridas
+CORRIDAS_PATH = os.environ.get("ESTADOS_CORRIDAS_PATH", "corridas")
+
+# Corridas que se conservan (las más antiguas se borran al guardar una nueva)
+CORRIDAS_MAXIMAS = int(os.environ.get("ESTADOS_CORRIDAS_MAXIMAS", "20"))
+
+METADATA = "metadata.json"
+# 2: los rubros constantes se guardan como valor en metadata.json
+FORMATO_VERSION = 2
+
+# Filas por bloque al calcular y escribir los rubros (acota la memoria con muchas réplicas)
+BLOQUE_FILAS = 100_000
+
+COLUMNA_ALMUERZOS = "Almuerzos"
+COLUMNA_CARNE = "Carne"
+
+# Prefijo de cada estado -> rubros (los nombres se repiten entre estados)
+ESTADOS = (
+    ("Tradicional", CLAVES_TRADICIONAL),
+    ("Variable", CLAVES_VARIABLE),
+    ("Punto de Equilibrio", CLAVES_PUNTO_EQUILIBRIO),
+)
+
+# Bytes reservados para el encabezado .npy (numpy lo alinea a 64; un arreglo 1-D cabe en 128)
+_ENCABEZADO_NPY = 128
+
+# Sufijo de la carpeta de una corrida que todavía se está escribiendo
+_SUFIJO_PARCIAL = ".parcial"
+
+
+def columnas_corrida():
+    """Nombres de las columnas de una corrida, en el orden en que se guardan."""
+    return [COLUMNA_ALMUERZOS, COLUMNA_CARNE,
+            *(f"{prefijo}: {clave}" for prefijo, claves in ESTADOS for clave in claves)]
+
+
+def lineas_estados(entradas, almuerzos, carne):
+    """
+    Evalúa los estados de resultados para cada fila de la corrida (cada día
+    o réplica usa sus propios almuerzos y carne sobre las mismas entradas).
+
+    Args:
+        entradas (EntradasFinancieras): Entradas del modelo.
+        almuerzos (array-like): Almuerzos vendidos por fila.
+        carne (array-like): Valor simulado de la carne por fila (cantidad en g).
+
+    Returns:
+        dict: {columna: np.ndarray | float} con todas las columnas de
+        columnas_corrida; los rubros fijos son un solo float para todas las filas.
+    """
+    almuerzos = np.asarray(almuerzos)
+    carne = np.asarray(carne)
+    simuladas = entradas.con_simulacion(almuerzos.astype(float), carne.astype(float))
+    personal = calcular_personal(simuladas)
+    # El estado variable ya trae los rubros del punto de equilibrio
+    estados = {
+        "Tradicional": calcular_estado_tradicional(simuladas, personal),
+        "Variable": calcular_estado_variable(simuladas, personal),
+    }
+    estados["Punto de Equilibrio"] = estados["Variable"]
+
+    lineas = {COLUMNA_ALMUERZOS: almuerzos, COLUMNA_CARNE: carne}
+    for prefijo, claves in ESTADOS:
+        for clave in claves:
+            valor = estados[prefijo][clave][0]
+            # Los rubros fijos (arriendo, depreciación...) llegan como escalares
+            lineas[f"{prefijo}: {clave}"] = float(valor) if np.ndim(valor) == 0 else np.asarray(valor, dtype=float)
+    return lineas
+
+
+def _archivo_columna(indice):
+    return f"c{indice:03d}.npy"
+
+
+class EscritorCorrida:
+    """
+    Escribe una corrida columna por columna, por bloques de filas.
+
+    Se usa como administrador de contexto: al salir sin errores se completa
+    la corrida (cerrar); si hubo una excepción, o si falla el propio cierre,
+    se borra la carpeta temporal (descartar).
+
+    Args:
+        tipo (str): "diaria" (una fila por día) o "montecarlo" (una fila por réplica).
+        semilla (int | None): Semilla que reproduce la corrida.
+        parametros (dict, optional): Parámetros de simulación (SIM_PARAMS y similares).
+        entradas (EntradasFinancieras, optional): Entradas del modelo.
+        directorio (str, optional): Carpeta del almacén (por defecto CORRIDAS_PATH).
+    """
+
+    def __init__(self, tipo, semilla, parametros=None, entradas=None, directorio=None):
+        fecha = datetime.datetime.now()
+        self.ruta = os.path.join(directorio or CORRIDAS_PATH, f"{fecha:%Y%m%d-%H%M%S-%f}-{tipo}")
+        self._temporal = f"{self.ruta}{_SUFIJO_PARCIAL}"
+        os.makedirs(self._temporal)
+        self.metadata = {
+            "formato": FORMATO_VERSION,
+            "tipo": tipo,
+            "fecha": fecha.isoformat(),
+            "semilla": semilla,
+            "parametros": dict(parametros or {}),
+            "entradas": asdict(entradas) if entradas is not None else None,
+            "huella": huella_entradas(entradas, semilla) if entradas is not None else None,
+        }
+        self.filas = 0
+        self._orden = []
+        self._columnas = {}
+        self._constantes = {}
+
+    def agregar(self, columnas):
+        """
+        Agrega un bloque de filas.
+
+        Args:
+            columnas (dict): {columna: array-like | escalar}, los arreglos todos
+                del mismo largo. Un escalar es una columna constante: se guarda
+                una sola vez en metadata.json. El primer bloque fija las
+                columnas, sus tipos y cuáles son constantes.
+        """
+        if not self._orden:
+            self._orden = list(columnas)
+            variables = [nombre for nombre in self._orden if np.ndim(columnas[nombre]) != 0]
+            for indice, nombre in enumerate(variables):
+                dtype = np.asarray(columnas[nombre]).dtype.newbyteorder("<")
+                archivo = open(os.path.join(self._temporal, _archivo_columna(indice)), "wb")
+                archivo.write(b"\0" * _ENCABEZADO_NPY)
+                self._columnas[nombre] = (archivo, dtype)
+            self._constantes = {nombre: np.asarray(columnas[nombre]).item()
+                                for nombre in self._orden if nombre not in self._columnas}
+        elif columnas.keys() != set(self._orden):
+            raise ValueError("Todos los bloques deben traer las mismas columnas.")
+        elif any(np.ndim(columnas[nombre]) != 0 or np.asarray(columnas[nombre]).item() != valor
+                 for nombre, valor in self._constantes.items()):
+            raise ValueError("Las columnas constantes deben tener el mismo valor en todos los bloques.")
+
+        largos = {len(columnas[nombre]) for nombre in self._columnas}
+        if len(largos) != 1:
+            raise ValueError("Todas las columnas del bloque deben tener el mismo largo.")
+        for nombre, (archivo, dtype) in self._columnas.items():
+            archivo.write(np.ascontiguousarray(columnas[nombre], dtype=dtype).tobytes())
+        self.filas += largos.pop()
+
+    def cerrar(self):
+        """
+        Completa los encabezados, escribe metadata.json y mueve la carpeta
+        temporal a su nombre definitivo. Si algo falla se descarta la corrida.
+
+        Returns:
+            str: Ruta de la corrida.
+        """
+        try:
+            self._completar()
+            os.replace(self._temporal, self.ruta)
+        except BaseException:
+            self.descartar()
+            raise
+        return self.ruta
+
+    def _completar(self):
+        archivos = {}
+        for indice, (nombre, (archivo, dtype)) in enumerate(self._columnas.items()):
+            encabezado = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False,
+                          "shape": (self.filas,)}
+            archivo.seek(0)
+            np.lib.format.write_array_header_1_0(archivo, encabezado)
+            if archivo.tell() != _ENCABEZADO_NPY:
+                raise ValueError(f"El encabezado de la columna {nombre} no cabe en el espacio reservado.")
+            archivo.close()
+            archivos[nombre] = {"nombre": nombre, "archivo": _archivo_columna(indice), "dtype": dtype.str}
+        self._columnas.clear()
+        descripcion = [archivos.get(nombre) or {"nombre": nombre, "valor": self._constantes[nombre]}
+                       for nombre in self._orden]
+
+        self.metadata["filas"] = self.filas
+        self.metadata["columnas"] = descripcion
+        with open(os.path.join(self._temporal, METADATA), "w", encoding="utf-8") as archivo:
+            # default=float: valores de NumPy que se cuelen en los parámetros o las entradas
+            json.dump(self.metadata, archivo, ensure_ascii=False, indent=2, default=float)
+
+    def descartar(self):
+        """Cierra los archivos y borra la carpeta temporal de la corrida incompleta."""
+        for archivo, _ in self._columnas.values():
+            archivo.close()
+        self._columnas.clear()
+        shutil.rmtree(self._temporal, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_excepcion, excepcion, traza):
+        if tipo_excepcion is None:
+            self.cerrar()
+        else:
+            self.descartar()
+        return False
+
+
+def guardar_corrida(tipo, almuerzos, carne, entradas, semilla, parametros=None, directorio=None,
+                    bloque_filas=BLOQUE_FILAS, maximo=CORRIDAS_MAXIMAS):
+    """
+    Guarda una corrida con sus muestras y todos los rubros de los estados de
+    resultados por fila, calculados y escritos de a bloque_filas filas. Después
+    borra las corridas más antiguas que excedan maximo.
+
+    Args:
+        tipo (str): "diaria" o "montecarlo".
+        almuerzos (array-like): Almuerzos vendidos por día o por réplica.
+        carne (array-like): Valor simulado de la carne por día o por réplica.
+        entradas (EntradasFinancieras): Entradas con las que se evaluaron los estados.
+        semilla (int | None): Semilla de la corrida.
+        parametros (dict, optional): Parámetros de simulación.
+        directorio (str, optional): Carpeta del almacén (por defecto CORRIDAS_PATH).
+        bloque_filas (int): Filas por bloque.
+        maximo (int | None): Corridas que se conservan en el almacén (None: todas).
+
+    Returns:
+        str: Ruta de la carpeta de la corrida.
+    """
+    almuerzos = np.asarray(almuerzos)
+    carne = np.asarray(carne)
+    with EscritorCorrida(tipo, semilla, parametros, entradas, directorio) as escritor:
+        for inicio in range(0, len(almuerzos), bloque_filas):
+            fin = inicio + bloque_filas
+            escritor.agregar(lineas_estados(entradas, almuerzos[inicio:fin], carne[inicio:fin]))
+    if maximo is not None:
+        podar_corridas(directorio, maximo)
+    return escritor.ruta
+
+
+class Corrida:
+    """
+    Corrida guardada, con las columnas mapeadas en memoria bajo demanda.
+
+    Args:
+        ruta (str): Carpeta de la corrida.
+        metadata (dict): Contenido de su metadata.json.
+    """
+
+    def __init__(self, ruta, metadata):
+        self.ruta = ruta
+        self.metadata = metadata
+        self._columnas = {columna["nombre"]: columna for columna in metadata["columnas"]}
+        self._mapas = {}
+
+    @property
+    def tipo(self):
+        return self.metadata["tipo"]
+
+    @property
+    def semilla(self):
+        return self.metadata["semilla"]
+
+    @property
+    def fecha(self):
+        return datetime.datetime.fromisoformat(self.metadata["fecha"])
+
+    @property
+    def filas(self):
+        return self.metadata["filas"]
+
+    @property
+    def parametros(self):
+        return self.metadata["parametros"]
+
+    @property
+    def columnas(self):
+        return list(self._columnas)
+
+    def entradas(self):
+        """Las EntradasFinancieras de la corrida (None si no se guardaron)."""
+        datos = self.metadata["entradas"]
+        if datos is None:
+            return None
+        datos = dict(datos)
+        for campo in ("personal", "insumos"):
+            datos[campo] = {clave: tuple(valor) for clave, valor in datos[campo].items()}
+        return EntradasFinancieras(**datos)
+
+    def __getitem__(self, columna):
+        """
+        La columna como arreglo de sólo lectura: mapeado en memoria o, si es
+        constante, su valor repetido sin copiarlo (np.broadcast_to).
+        """
+        if columna not in self._mapas:
+            descripcion = self._columnas[columna]
+            if "valor" in descripcion:
+                self._mapas[columna] = np.broadcast_to(np.asarray(descripcion["valor"]), (self.filas,))
+            else:
+                self._mapas[columna] = np.load(os.path.join(self.ruta, descripcion["archivo"]), mmap_mode="r")
+        return self._mapas[columna]
+
+    def __contains__(self, columna):
+        return columna in self._columnas
+
+    def __repr__(self):
+        return f"Corrida({self.tipo}, {self.fecha:%Y-%m-%d %H:%M:%S}, semilla={self.semilla}, filas={self.filas})"
+
+
+def abrir_corrida(ruta):
+    """
+    Abre una corrida guardada.
+
+    Raises:
+        FileNotFoundError: Si la carpeta no tiene metadata.json (no existe o quedó incompleta).
+        ValueError: Si la corrida es de una versión de formato posterior.
+    """
+    with open(os.path.join(ruta, METADATA), encoding="utf-8") as archivo:
+        metadata = json.load(archivo)
+    if metadata.get("formato", 0) > FORMATO_VERSION:
+        raise ValueError(f"Formato de corrida no soportado: {metadata.get('formato')}")
+    return Corrida(ruta, metadata)
+
+
+def listar_corridas(directorio=None, tipo=None):
+    """
+    Corridas completas del almacén, de la más reciente a la más antigua.
+
+    Args:
+        directorio (str, optional): Carpeta del almacén (por defecto CORRIDAS_PATH).
+        tipo (str, optional): Sólo las corridas de este tipo.
+
+    Returns:
+        list[Corrida]
+    """
+    directorio = directorio or CORRIDAS_PATH
+    if not os.path.isdir(directorio):
+        return []
+    corridas = []
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if nombre.endswith(_SUFIJO_PARCIAL) or not os.path.isfile(os.path.join(ruta, METADATA)):
+            continue
+        corrida = abrir_corrida(ruta)
+        if tipo is None or corrida.tipo == tipo:
+            corridas.append(corrida)
+    corridas.sort(key=lambda corrida: corrida.metadata["fecha"], reverse=True)
+    return corridas
+
+
+def podar_corridas(directorio=None, maximo=CORRIDAS_MAXIMAS):
+    """
+    Borra las corridas completas más antiguas hasta dejar a lo sumo maximo.
+
+    Returns:
+        int: Corridas borradas.
+    """
+    sobrantes = listar_corridas(directorio)[maximo:]
+    for corrida in sobrantes:
+        shutil.rmtree(corrida.ruta, ignore_errors=True)
+    return len(sobrantes)
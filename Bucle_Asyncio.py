@@ -0,0 +1,91 @@
+"""
+Bucle de asyncio dentro del mainloop de Tkinter.
+
+Tkinter y asyncio quieren, cada uno, ser dueños del hilo principal. En vez de
+correr asyncio en otro hilo, el bucle avanza una vuelta (sin bloquear) cada
+pocos milisegundos desde root.after: las corrutinas, sus callbacks y los
+callbacks de fin de tarea corren todos en el hilo de Tkinter, así que pueden
+tocar los widgets directamente.
+"""
+import asyncio
+import traceback
+
+
+class BucleAsyncioTk:
+    """
+    Args:
+        root (tk.Tk): Ventana principal cuyo mainloop mueve el bucle.
+        intervalo_ms (int): Espera entre vueltas mientras hay tareas en curso.
+        intervalo_inactivo_ms (int): Espera entre vueltas sin tareas (sólo
+            atiende temporizadores y callbacks sueltos).
+    """
+
+    def __init__(self, root, intervalo_ms=5, intervalo_inactivo_ms=100):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.intervalo_inactivo_ms = intervalo_inactivo_ms
+        # Selector explícito: en Windows el bucle por defecto (Proactor) no soporta add_reader
+        self.loop = asyncio.SelectorEventLoop()
+        self._tareas = set()
+        self._after_id = None
+        self._programar(self.intervalo_inactivo_ms)
+
+    def ejecutar(self, corrutina, al_terminar=None):
+        """
+        Lanza una corrutina en el bucle.
+
+        Args:
+            corrutina: La corrutina a ejecutar.
+            al_terminar (callable, optional): al_terminar(resultado) en el hilo de
+                Tkinter cuando termina; recibe None si la corrutina lanzó una excepción.
+                No se llama si la tarea se cancela.
+
+        Returns:
+            asyncio.Task: La tarea, por si se quiere cancelar.
+        """
+        tarea = self.loop.create_task(corrutina)
+        self._tareas.add(tarea)
+        tarea.add_done_callback(lambda t: self._terminada(t, al_terminar))
+        # Con la primera tarea se sale del ritmo de inactividad de inmediato
+        self._programar(0)
+        return tarea
+
+    def _terminada(self, tarea, al_terminar):
+        self._tareas.discard(tarea)
+        if tarea.cancelled():
+            return
+        resultado = None
+        if tarea.exception() is not None:
+            traceback.print_exception(tarea.exception())
+        else:
+            resultado = tarea.result()
+        if al_terminar is not None:
+            al_terminar(resultado)
+
+    def _programar(self, espera):
+        if self.loop.is_closed():
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(espera, self._vuelta)
+
+    def _vuelta(self):
+        """Una vuelta del bucle: atiende sockets listos y callbacks pendientes, sin esperar."""
+        self._after_id = None
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        self._programar(self.intervalo_ms if self._tareas else self.intervalo_inactivo_ms)
+
+    def cerrar(self):
+        """Cancela las tareas pendientes y cierra el bucle."""
+        if self.loop.is_closed():
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        for tarea in self._tareas:
+            tarea.cancel()
+        if self._tareas:
+            self.loop.run_until_complete(asyncio.gather(*self._tareas, return_exceptions=True))
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
@@ -0,0 +1,422 @@
+"""
+Núcleo de cálculo financiero sin dependencias de Tkinter.
+
+Todas las fórmulas reciben un EntradasFinancieras con valores planos, de modo
+que pueden usarse desde la interfaz, desde procesos de trabajo o desde la
+línea de comandos. Las funciones aceptan escalares o arreglos NumPy en
+almuerzos_diarios y en las cantidades de insumos, lo que permite evaluar
+miles de réplicas de una sola vez.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, replace
+
+import numpy as np
+
+# --- Valores por defecto (los mismos de la interfaz) ---
+
+PERSONAL_DEFECTO = {
+    "Cocineros": (750000, 1),
+    "Ayudantes de Cocina": (600000, 2),
+    "Meseros": (300000, 3),
+    "Administradores": (200000, 1),
+}
+
+INSUMOS_DEFECTO = {
+    "Arroz": (50, 45),
+    "Carne": (150, 200),
+    "Papa": (200, 70),
+    "Maduro y otros": (75, 45),
+}
+
+ASIGNACION_DEFECTO = {
+    "Arriendo_Ventas": 0.80,
+    "Arriendo_Cocina": 0.20,
+    "Depreciacion_Ventas": 0.50,
+    "Depreciacion_Cocina": 0.50,
+}
+
+# Orden de los rubros tal como los reciben las funciones insert_* de bd.db_queries
+CLAVES_TRADICIONAL = (
+    "Ventas", "Materia Prima", "Mano de Obra Directa", "CIF", "Total Costo de Ventas",
+    "Utilidad Bruta en Ventas", "Salario Administración", "Salario Meseros",
+    "Arrendamiento (OyV)", "Depreciación (OyV)", "Industria y Comercio",
+    "Total Gastos Admon y Ventas", "Utilidad Operacional",
+)
+
+CLAVES_VARIABLE = (
+    "Ventas", "Costo Variable de Materia Prima", "Costo Variable de Servicios Públicos",
+    "Costo Variable de Comisiones", "Costo Variable de Industria y Comercio",
+    "Total Costos Variables", "Margen de Contribución", "Costo Fijo de Mano de Obra",
+    "Sueldo Fijo Administración", "Sueldo Fijo Meseros", "Arrendamiento", "Depreciación",
+    "Total Costos Fijos", "Utilidad Operacional", "Rentabilidad en Ventas",
+)
+
+CLAVES_PUNTO_EQUILIBRIO = (
+    "Punto de Equilibrio (Mes - Unidades)",
+    "Punto de Equilibrio (Día - Unidades)",
+    "Punto de Equilibrio (Valor)",
+    "Margen de Seguridad (%)",
+    "Margen de Seguridad (Valor)",
+    "Ventas para Utilidad Objetivo (Unidades)",
+    "Ventas para Utilidad Objetivo (Valor)",
+)
+
+
+@dataclass(slots=True)
+class EntradasFinancieras:
+    """
+    Variables de entrada del modelo financiero como valores planos.
+
+    Attributes:
+        personal (dict): {puesto: (salario_base, cantidad)}.
+        insumos (dict): {insumo: (precio_kilo, cantidad_g)}.
+        asignacion (dict): Porcentajes de asignación de arriendo y depreciación.
+    """
+    precio_almuerzo: float = 2500
+    dias_trabajados: int = 22
+    almuerzos_diarios: float = 120
+    factor_prestacional: float = 0.52
+    personal: dict = field(default_factory=lambda: dict(PERSONAL_DEFECTO))
+    insumos: dict = field(default_factory=lambda: dict(INSUMOS_DEFECTO))
+    arriendo: float = 900000
+    servicios_publicos: float = 50
+    industria_comercio: float = 0.005
+    depreciacion: float = 250000
+    asignacion: dict = field(default_factory=lambda: dict(ASIGNACION_DEFECTO))
+    utilidad_objetivo: float = 2500000
+
+    def con_simulacion(self, almuerzos_diarios, carne_g):
+        """
+        Devuelve una copia con los almuerzos diarios y la cantidad de carne
+        reemplazados por valores simulados (escalares o arreglos).
+        """
+        insumos = dict(self.insumos)
+        insumos["Carne"] = (insumos["Carne"][0], carne_g)
+        return replace(self, almuerzos_diarios=almuerzos_diarios, insumos=insumos)
+
+
+# --- Auxiliares ---
+
+def _es_arreglo(valor):
+    return isinstance(valor, np.ndarray)
+
+
+def _proporcion(valor, base):
+    """valor / base, o 0 donde la base es 0 (escalares o arreglos)."""
+    if _es_arreglo(valor) or _es_arreglo(base):
+        valor, base = np.broadcast_arrays(np.asarray(valor, dtype=float), np.asarray(base, dtype=float))
+        return np.divide(valor, base, out=np.zeros(valor.shape), where=base != 0)
+    return valor / base if base else 0
+
+
+def _si_no_cero(condicion, valor):
+    """valor donde la condición es distinta de 0, o 0 en caso contrario."""
+    if _es_arreglo(condicion) or _es_arreglo(valor):
+        return np.where(np.asarray(condicion) != 0, valor, 0.0)
+    return valor if condicion else 0
+
+
+# --- Ventas y Personal ---
+
+def ventas_mensuales(precio_almuerzo, almuerzos_diarios, dias_trabajados):
+    """Ventas mensuales: precio × almuerzos diarios × días trabajados."""
+    return precio_almuerzo * almuerzos_diarios * dias_trabajados
+
+
+def calcular_ventas(entradas):
+    """Ventas mensuales a partir de un EntradasFinancieras."""
+    return ventas_mensuales(entradas.precio_almuerzo, entradas.almuerzos_diarios, entradas.dias_trabajados)
+
+
+def calcular_costo_puesto(puesto, salario_base, cantidad, ventas, factor_prestacional):
+    """
+    Calcula el costo mensual de un puesto de trabajo.
+
+    Los meseros reciben 1% de comisión sobre ventas y los administradores 10%.
+
+    Returns:
+        dict: {"Salario", "Comisiones", "Prestaciones", "Total"}
+    """
+    salario = salario_base * cantidad
+
+    comisiones = 0.0
+    if "Meseros" in puesto:
+        comisiones = ventas * 0.01
+    elif "Administradores" in puesto:
+        comisiones = ventas * 0.10
+
+    prestaciones = (salario + comisiones) * factor_prestacional
+    return {
+        "Salario": salario,
+        "Comisiones": comisiones,
+        "Prestaciones": prestaciones,
+        "Total": salario + comisiones + prestaciones,
+    }
+
+
+def calcular_personal(entradas, ventas=None):
+    """
+    Calcula el costo de cada puesto.
+
+    Returns:
+        dict: {puesto: {"Salario", "Comisiones", "Prestaciones", "Total"}}
+    """
+    if ventas is None:
+        ventas = calcular_ventas(entradas)
+    return {
+        puesto: calcular_costo_puesto(puesto, salario_base, cantidad, ventas, entradas.factor_prestacional)
+        for puesto, (salario_base, cantidad) in entradas.personal.items()
+    }
+
+
+def _costo_materia_prima_unidad(entradas):
+    costo = 0.0
+    for precio_kilo, cantidad_g in entradas.insumos.values():
+        costo = costo + (precio_kilo * cantidad_g) / 1000
+    return costo
+
+
+# --- Estado de Resultados Tradicional ---
+
+def calcular_estado_tradicional(entradas, personal=None):
+    """
+    Calcula todos los rubros del Estado de Resultados Tradicional.
+
+    Returns:
+        dict: {rubro: (valor, porcentaje_sobre_ventas)} en el orden de CLAVES_TRADICIONAL.
+
+    Raises:
+        ZeroDivisionError: Si las ventas (escalares) son cero.
+    """
+    ventas = calcular_ventas(entradas)
+    if not _es_arreglo(ventas) and ventas == 0:
+        raise ZeroDivisionError("Las ventas no pueden ser cero.")
+    if personal is None:
+        personal = calcular_personal(entradas, ventas)
+
+    asignacion = entradas.asignacion
+    almuerzos_mensuales = entradas.almuerzos_diarios * entradas.dias_trabajados
+
+    materia_prima = _costo_materia_prima_unidad(entradas) * almuerzos_mensuales
+    mano_obra = personal["Cocineros"]["Total"] + personal["Ayudantes de Cocina"]["Total"]
+
+    arriendo_cif = entradas.arriendo * asignacion["Arriendo_Cocina"]
+    sp_cif = entradas.servicios_publicos * almuerzos_mensuales
+    depreciacion_cif = entradas.depreciacion * asignacion["Depreciacion_Cocina"]
+    cif_total = arriendo_cif + sp_cif + depreciacion_cif
+
+    total_costo_ventas = materia_prima + mano_obra + cif_total
+    utilidad_bruta = ventas - total_costo_ventas
+
+    salario_adm = personal["Administradores"]["Total"]
+    salario_meseros = personal["Meseros"]["Total"]
+    arriendo_oyv = entradas.arriendo * asignacion["Arriendo_Ventas"]
+    depreciacion_oyv = entradas.depreciacion * asignacion["Depreciacion_Ventas"]
+    ic_oyv = entradas.industria_comercio * ventas
+    total_gastos_oyv = salario_adm + salario_meseros + arriendo_oyv + depreciacion_oyv + ic_oyv
+    utilidad_operacional = utilidad_bruta - total_gastos_oyv
+
+    valores = (
+        ventas, materia_prima, mano_obra, cif_total, total_costo_ventas, utilidad_bruta,
+        salario_adm, salario_meseros, arriendo_oyv, depreciacion_oyv, ic_oyv,
+        total_gastos_oyv, utilidad_operacional,
+    )
+    statement = {clave: (valor, _proporcion(valor, ventas)) for clave, valor in zip(CLAVES_TRADICIONAL, valores)}
+    statement["Ventas"] = (ventas, 1.0)
+    return statement
+
+
+# --- Estado de Resultados por Costo Variable y Punto de Equilibrio ---
+
+def calcular_estado_variable(entradas, personal=None, incluir_punto_equilibrio=True):
+    """
+    Calcula el Estado de Resultados por Costo Variable (o Marginal) junto con
+    los indicadores del Punto de Equilibrio.
+
+    Returns:
+        dict: {rubro: (valor, porcentaje)} con las claves de CLAVES_VARIABLE
+        seguidas de las de CLAVES_PUNTO_EQUILIBRIO (si incluir_punto_equilibrio).
+    """
+    ventas = calcular_ventas(entradas)
+    if personal is None:
+        personal = calcular_personal(entradas, ventas)
+
+    factor = entradas.factor_prestacional
+    dias_trabajados = entradas.dias_trabajados
+    almuerzos_mensuales = entradas.almuerzos_diarios * dias_trabajados
+
+    # --- 1. Costos Variables ---
+    total_materia_prima = _costo_materia_prima_unidad(entradas) * almuerzos_mensuales
+    total_sp = entradas.servicios_publicos * almuerzos_mensuales
+    total_comisiones = sum(datos["Comisiones"] for datos in personal.values())
+    comisiones_sobre_ventas = total_comisiones * (1 + factor)
+    total_ind_y_com = ventas * entradas.industria_comercio
+    total_costos_variables = total_materia_prima + total_sp + comisiones_sobre_ventas + total_ind_y_com
+
+    # --- 2. Margen de Contribución ---
+    margen_contribucion = ventas - total_costos_variables
+
+    # --- 3. Costos Fijos ---
+    mano_obra_fija = personal["Cocineros"]["Total"] + personal["Ayudantes de Cocina"]["Total"]
+    salario_fijo_admin = personal["Administradores"]["Salario"] * (1 + factor)
+    salario_fijo_meseros = personal["Meseros"]["Salario"] * (1 + factor)
+    arriendo = entradas.arriendo
+    depreciacion = entradas.depreciacion
+    total_costos_fijos = mano_obra_fija + salario_fijo_admin + salario_fijo_meseros + arriendo + depreciacion
+
+    # --- 4. Utilidad Operacional ---
+    utilidad_operacional = margen_contribucion - total_costos_fijos
+    rentabilidad = _proporcion(utilidad_operacional, ventas)
+
+    valores = (
+        ventas, total_materia_prima, total_sp, comisiones_sobre_ventas, total_ind_y_com,
+        total_costos_variables, margen_contribucion, mano_obra_fija, salario_fijo_admin,
+        salario_fijo_meseros, arriendo, depreciacion, total_costos_fijos,
+    )
+    results = {clave: (valor, _proporcion(valor, ventas)) for clave, valor in zip(CLAVES_VARIABLE, valores)}
+    results["Ventas"] = (ventas, 1.0)
+    results["Utilidad Operacional"] = (utilidad_operacional, rentabilidad)
+    results["Rentabilidad en Ventas"] = (rentabilidad, rentabilidad)
+
+    if incluir_punto_equilibrio:
+        results.update(calcular_punto_equilibrio(
+            entradas, ventas, total_costos_variables, total_costos_fijos
+        ))
+    return results
+
+
+def calcular_punto_equilibrio(entradas, ventas, total_costos_variables, total_costos_fijos):
+    """
+    Calcula el Punto de Equilibrio, el Margen de Seguridad y las ventas
+    necesarias para alcanzar la utilidad objetivo.
+
+    Returns:
+        dict: {indicador: (valor, porcentaje)} en el orden de CLAVES_PUNTO_EQUILIBRIO.
+    """
+    precio_plato = entradas.precio_almuerzo
+    dias_trabajados = entradas.dias_trabajados
+    almuerzos_mensuales = entradas.almuerzos_diarios * dias_trabajados
+
+    costo_variable_unitario = _proporcion(total_costos_variables, almuerzos_mensuales)
+    margen_unitario = precio_plato - costo_variable_unitario
+
+    pe_mes = _proporcion(total_costos_fijos, margen_unitario)
+    pe_dia = _proporcion(pe_mes, dias_trabajados)
+    pe_valor = pe_mes * precio_plato
+
+    margen_seguridad = _proporcion(almuerzos_mensuales - pe_mes, almuerzos_mensuales)
+    margen_seguridad_valor = _si_no_cero(ventas, ventas - pe_valor)
+
+    ventas_objetivo_unidades = _proporcion(entradas.utilidad_objetivo + total_costos_fijos, margen_unitario)
+    almuerzos_diarios_objetivo = _proporcion(ventas_objetivo_unidades, dias_trabajados)
+    ventas_objetivo_valor = ventas_objetivo_unidades * precio_plato
+
+    return {
+        "Punto de Equilibrio (Mes - Unidades)": (pe_mes, _proporcion(pe_mes, almuerzos_mensuales)),
+        "Punto de Equilibrio (Día - Unidades)": (pe_dia, _proporcion(pe_dia, almuerzos_diarios_objetivo)),
+        "Punto de Equilibrio (Valor)": (pe_valor, _proporcion(pe_valor, ventas)),
+        "Margen de Seguridad (%)": (margen_seguridad, margen_seguridad),
+        "Margen de Seguridad (Valor)": (margen_seguridad_valor, _proporcion(margen_seguridad_valor, ventas)),
+        "Ventas para Utilidad Objetivo (Unidades)": (ventas_objetivo_unidades, _proporcion(ventas_objetivo_unidades, almuerzos_mensuales)),
+        "Ventas para Utilidad Objetivo (Valor)": (ventas_objetivo_valor, _proporcion(ventas_objetivo_valor, ventas)),
+    }
+
+
+def valores(statement, claves):
+    """Devuelve sólo los valores (sin porcentajes) de las claves indicadas, en orden."""
+    return tuple(statement[clave][0] for clave in claves)
+
+
+# --- Huella de contenido y memorización ---
+
+def _normalizar(valor):
+    """Convierte números a float y tuplas a listas, para que 2500 y 2500.0 den la misma huella."""
+    if isinstance(valor, dict):
+        return {str(clave): _normalizar(v) for clave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_normalizar(v) for v in valor]
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        return float(valor)
+    if _es_arreglo(valor):
+        raise TypeError("La huella sólo se define para entradas escalares.")
+    return valor
+
+
+def huella_entradas(entradas, semilla=None):
+    """
+    Huella SHA-256 de las entradas normalizadas más la semilla. Dos corridas
+    con la misma huella producen los mismos estados de resultados.
+
+    Returns:
+        str: 64 caracteres hexadecimales.
+    """
+    contenido = {"entradas": _normalizar(asdict(entradas)), "semilla": semilla}
+    texto = json.dumps(contenido, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class MemoEstados:
+    """
+    Memoriza los estados de resultados por huella de las entradas, con un
+    LRU acotado. Pedir otra vez un estado para las mismas entradas (aunque
+    entre medio se hayan calculado otras) no vuelve a calcularlo.
+
+    Args:
+        tamano (int): Máximo de estados guardados.
+    """
+
+    def __init__(self, tamano=128):
+        self.tamano = tamano
+        self._estados = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _obtener(self, clave, calcular):
+        if clave in self._estados:
+            self._estados.move_to_end(clave)
+            self.aciertos += 1
+            return self._estados[clave]
+        resultado = calcular()
+        self.fallos += 1
+        self._estados[clave] = resultado
+        if len(self._estados) > self.tamano:
+            self._estados.popitem(last=False)
+        return resultado
+
+    def estado_tradicional(self, entradas, huella=None):
+        huella = huella or huella_entradas(entradas)
+        return self._obtener((huella, "tradicional"), lambda: calcular_estado_tradicional(entradas))
+
+    def estado_variable(self, entradas, huella=None):
+        """Estado variable sin el punto de equilibrio (ver punto_equilibrio)."""
+        huella = huella or huella_entradas(entradas)
+        return self._obtener(
+            (huella, "variable"),
+            lambda: calcular_estado_variable(entradas, incluir_punto_equilibrio=False),
+        )
+
+    def punto_equilibrio(self, entradas, huella=None):
+        huella = huella or huella_entradas(entradas)
+
+        def calcular():
+            estado = self.estado_variable(entradas, huella)
+            return calcular_punto_equilibrio(
+                entradas, estado["Ventas"][0], estado["Total Costos Variables"][0], estado["Total Costos Fijos"][0]
+            )
+
+        return self._obtener((huella, "punto_equilibrio"), calcular)
+
+
+if __name__ == "__main__":
+    entradas = EntradasFinancieras()
+    for titulo, estado in (
+        ("ESTADO TRADICIONAL", calcular_estado_tradicional(entradas)),
+        ("ESTADO VARIABLE Y PUNTO DE EQUILIBRIO", calcular_estado_variable(entradas)),
+    ):
+        print(titulo)
+        for rubro, (valor, porcentaje) in estado.items():
+            print(f"  {rubro:<45} {valor:>18,.2f} {porcentaje * 100:>9,.2f} %")
@@ -0,0 +1,144 @@
+"""
+Comparación de N reportes guardados como una matriz columnar.
+
+Los reportes (tal como los devuelve bd.db_queries.get_reports_data) se
+cargan en un arreglo métrica × reporte; las diferencias, los deltas contra un
+reporte base y las estadísticas por métrica se calculan de forma vectorizada
+sobre ese arreglo. Los valores faltantes quedan como NaN.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+# Rubros comparables por estado: (etiqueta, columna, formato)
+CONCEPTOS_COMPARACION = {
+    "tradicional": [
+        ("Ventas Totales", "Ventas", "currency"), ("Materia Prima", "MateriaPrima", "currency"),
+        ("Mano de Obra", "ManoDeObra", "currency"), ("CIF (Costo Indirecto)", "CIF", "currency"),
+        ("Total Costo Ventas", "TotalCostoVentas", "currency"), ("Utilidad Bruta", "UtilidadBruta", "currency"),
+        ("Salario Administración", "SalarioAdministracion", "currency"),
+        ("Total Gastos ADM/Vtas", "TotalGastosAdmonVentas", "currency"),
+        ("Utilidad Operacional", "UtilidadOperacional", "currency"),
+    ],
+    "variable": [
+        ("Ventas Totales", "Ventas", "currency"), ("Costo Var. Materia Prima", "CostoVariableMateriaPrima", "currency"),
+        ("Total Costos Variables", "TotalCostosVariables", "currency"), ("Margen de Contribución", "MargenContribucion", "currency"),
+        ("Costo Fijo Mano Obra", "CostoFijoManoObra", "currency"), ("Sueldo Fijo Administración", "SueldoFijoAdministracion", "currency"),
+        ("Total Costos Fijos", "TotalCostosFijos", "currency"), ("Utilidad Operacional", "UtilidadOperacional", "currency"),
+        ("Rentabilidad sobre Ventas", "RentabilidadVentas", "percent"),
+    ],
+    "punto_equilibrio": [
+        ("PE en Valor ($)", "PuntoEquilibrioValor", "currency"), ("PE en Unidades (Mes)", "PuntoEquilibrioMesUnidades", "number"),
+        ("PE en Unidades (Día)", "PuntoEquilibrioDiaUnidades", "number"), ("Margen de Seguridad (%)", "MargenSeguridadPorc", "percent"),
+        ("Ventas Objetivo (Valor)", "VentasUtilidadObjetivoValor", "currency"),
+    ],
+}
+
+# Nombre de cada estado en las etiquetas de la matriz
+NOMBRES_SECCION = {
+    "tradicional": "Tradicional",
+    "variable": "Variable",
+    "punto_equilibrio": "PE",
+}
+
+
+def formatear(valor, formato, con_signo=False):
+    """Da formato a un valor de la comparación; NaN o None se muestran como N/A."""
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+        return "N/A"
+    signo = "+" if con_signo else ""
+    if formato == "currency":
+        return f"${valor:{signo},.2f}"
+    if formato == "percent":
+        return f"{valor * 100:{signo},.2f} %"
+    return f"{valor:{signo},.0f}"
+
+
+@dataclass(slots=True)
+class MatrizComparacion:
+    """
+    Valores de N reportes en forma columnar.
+
+    Attributes:
+        etiquetas (list[str]): Nombre de cada métrica (fila), con su estado.
+        formatos (list[str]): "currency", "percent" o "number" por métrica.
+        reportes (list[int]): ReporteID de cada columna.
+        valores (np.ndarray): Arreglo (métricas, reportes); NaN si falta el dato.
+        base (int): Columna del reporte base para los deltas.
+    """
+    etiquetas: list
+    formatos: list
+    reportes: list
+    valores: np.ndarray
+    base: int = 0
+
+    @property
+    def delta_base(self):
+        """Diferencia de cada reporte contra el reporte base."""
+        return self.valores - self.valores[:, [self.base]]
+
+    @property
+    def delta_base_pct(self):
+        """Diferencia relativa contra el base (NaN donde el base es 0)."""
+        base = self.valores[:, [self.base]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(base != 0, self.delta_base / np.abs(base), np.nan)
+
+    @property
+    def diferencias(self):
+        """Diferencia de cada reporte contra el anterior (la primera columna queda en NaN)."""
+        diferencias = np.full_like(self.valores, np.nan)
+        diferencias[:, 1:] = np.diff(self.valores, axis=1)
+        return diferencias
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: {"Mínimo", "Máximo", "Media", "Desv. Estándar"} con un arreglo por métrica.
+        """
+        # Una métrica sin ningún dato da NaN sin advertencias de numpy
+        hay_datos = ~np.all(np.isnan(self.valores), axis=1)
+        resultado = {nombre: np.full(len(self.etiquetas), np.nan)
+                     for nombre in ("Mínimo", "Máximo", "Media", "Desv. Estándar")}
+        if hay_datos.any():
+            valores = self.valores[hay_datos]
+            resultado["Mínimo"][hay_datos] = np.nanmin(valores, axis=1)
+            resultado["Máximo"][hay_datos] = np.nanmax(valores, axis=1)
+            resultado["Media"][hay_datos] = np.nanmean(valores, axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                resultado["Desv. Estándar"][hay_datos] = np.nanstd(valores, axis=1)
+        return resultado
+
+
+def construir_matriz(reportes, report_ids, base=0, conceptos=CONCEPTOS_COMPARACION):
+    """
+    Arma la matriz métrica × reporte.
+
+    Args:
+        reportes (dict): {report_id: {"tradicional": {...}, "variable": {...}, "punto_equilibrio": {...}}}.
+        report_ids (list[int]): Reportes a incluir, en el orden de las columnas.
+        base (int): Posición (en report_ids) del reporte base.
+        conceptos (dict): Rubros por estado, como CONCEPTOS_COMPARACION.
+
+    Returns:
+        MatrizComparacion
+    """
+    filas = [(seccion, etiqueta, columna, formato)
+             for seccion, rubros in conceptos.items()
+             for etiqueta, columna, formato in rubros]
+    valores = np.full((len(filas), len(report_ids)), np.nan)
+    for j, report_id in enumerate(report_ids):
+        reporte = reportes.get(report_id) or {}
+        for i, (seccion, _, columna, _) in enumerate(filas):
+            datos = reporte.get(seccion)
+            valor = datos.get(columna) if datos else None
+            if valor is not None:
+                valores[i, j] = float(valor)
+
+    return MatrizComparacion(
+        etiquetas=[f"{NOMBRES_SECCION[seccion]} · {etiqueta}" for seccion, etiqueta, _, _ in filas],
+        formatos=[formato for _, _, _, formato in filas],
+        reportes=list(report_ids),
+        valores=valores,
+        base=base,
+    )
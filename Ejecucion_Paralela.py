@@ -0,0 +1,132 @@
+"""
+Ejecución paralela de la simulación Monte Carlo de los estados de resultados.
+
+Las réplicas se reparten en fragmentos, uno por proceso de trabajo. Cada
+fragmento usa su propio flujo aleatorio derivado de la semilla maestra con
+np.random.SeedSequence.spawn, de modo que los flujos no se solapan y el
+resultado es idéntico bit a bit para la misma semilla y número de procesos.
+Cada proceso devuelve sólo un AcumuladorEstadistico por métrica, no las
+muestras, y los acumuladores se fusionan en el proceso principal.
+
+Nota: en Windows y macOS los procesos se crean con "spawn", por lo que el
+código que llame a simular_en_paralelo debe estar protegido con
+if __name__ == "__main__".
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from Calculos_Financieros import EntradasFinancieras
+from Estadisticas_Streaming import AcumuladorEstadistico
+from Simulacion_Monte_Carlo import SIM_PARAMS_DEFECTO, simular_metricas
+
+
+@dataclass(slots=True)
+class ResultadoParalelo:
+    """
+    Resultado de una corrida paralela.
+
+    Attributes:
+        resumen (dict): {métrica: {"Media", "Desv. Estándar", "Mínimo", "Máximo", "P5", ...}}.
+            Los percentiles son aproximados (ver AcumuladorEstadistico).
+        replicaciones (int): Réplicas simuladas en total.
+        trabajadores (int): Procesos usados.
+        semilla (int): Semilla maestra.
+        segundos (float): Tiempo total de pared.
+    """
+    resumen: dict
+    replicaciones: int
+    trabajadores: int
+    semilla: int
+    segundos: float
+
+    @property
+    def replicaciones_por_segundo(self):
+        return self.replicaciones / self.segundos if self.segundos else float("inf")
+
+
+def _ejecutar_fragmento(entradas, sim_params, replicaciones, semilla):
+    """Simula un fragmento en un proceso de trabajo y devuelve un acumulador por métrica."""
+    rng = np.random.default_rng(semilla)
+    muestras = simular_metricas(entradas, sim_params, replicaciones, rng=rng)
+    return {
+        nombre: AcumuladorEstadistico().actualizar(valores)
+        for nombre, valores in muestras.items()
+    }
+
+
+def _dividir_replicaciones(replicaciones, fragmentos):
+    """Reparte las réplicas en fragmentos de tamaño casi igual (determinista)."""
+    base, resto = divmod(replicaciones, fragmentos)
+    return [base + (1 if i < resto else 0) for i in range(fragmentos)]
+
+
+def simular_en_paralelo(entradas, sim_params, replicaciones, semilla, trabajadores=None):
+    """
+    Corre la simulación Monte Carlo repartida en un ProcessPoolExecutor.
+
+    Args:
+        entradas (EntradasFinancieras): Valores de entrada del modelo.
+        sim_params (dict): Parámetros de simulación (SIM_PARAMS).
+        replicaciones (int): Número total de réplicas.
+        semilla (int): Semilla maestra de la que se derivan los flujos de cada fragmento.
+        trabajadores (int, optional): Procesos a usar. Por defecto os.cpu_count().
+
+    Returns:
+        ResultadoParalelo: Estadísticas combinadas y rendimiento de la corrida.
+
+    Raises:
+        ValueError: Si replicaciones es menor que 1.
+    """
+    if replicaciones < 1:
+        raise ValueError("Se necesita al menos una réplica.")
+    trabajadores = trabajadores or os.cpu_count() or 1
+    tamanos = [t for t in _dividir_replicaciones(replicaciones, trabajadores) if t > 0]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=trabajadores) as executor:
+        futuros = [
+            executor.submit(_ejecutar_fragmento, entradas, sim_params, tamano, semilla_fragmento)
+            for tamano, semilla_fragmento in zip(tamanos, semillas)
+        ]
+        # Se combinan en el orden de los fragmentos para que el resultado sea reproducible
+        fragmentos = [futuro.result() for futuro in futuros]
+
+    resumen = {}
+    for nombre, acumulador in fragmentos[0].items():
+        for fragmento in fragmentos[1:]:
+            acumulador.fusionar(fragmento[nombre])
+        resumen[nombre] = acumulador.resumen()
+    segundos = time.perf_counter() - inicio
+
+    return ResultadoParalelo(
+        resumen=resumen,
+        replicaciones=sum(tamanos),
+        trabajadores=len(tamanos),
+        semilla=semilla,
+        segundos=segundos,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulación Monte Carlo paralela de los estados de resultados.")
+    parser.add_argument("--replicaciones", type=int, default=1_000_000)
+    parser.add_argument("--trabajadores", type=int, default=None)
+    parser.add_argument("--semilla", type=int, default=12345)
+    args = parser.parse_args()
+
+    resultado = simular_en_paralelo(
+        EntradasFinancieras(), SIM_PARAMS_DEFECTO, args.replicaciones, args.semilla, args.trabajadores
+    )
+    for metrica, estadisticas in resultado.resumen.items():
+        print(metrica)
+        for nombre, valor in estadisticas.items():
+            print(f"  {nombre:<15} {valor:>18,.2f}")
+    print(f"{resultado.replicaciones:,} réplicas en {resultado.segundos:.3f} s "
+          f"con {resultado.trabajadores} procesos "
+          f"({resultado.replicaciones_por_segundo:,.0f} réplicas/s)")
@@ -0,0 +1,190 @@
+"""
+Estadísticas de una sola pasada para la salida de la simulación.
+
+AcumuladorEstadistico recibe los datos por bloques (arreglos) y mantiene, en
+memoria acotada, la media y la varianza (Welford / Chan), el mínimo, el
+máximo, cuantiles aproximados con un resumen tipo t-digest y un histograma
+de bins fijos. Dos acumuladores se pueden fusionar, por lo que cada proceso
+de trabajo puede llevar el suyo y combinarlos al final.
+"""
+import math
+
+import numpy as np
+
+# Percentiles reportados por defecto en los resúmenes
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _comprimir(medias, pesos, compresion):
+    """
+    Agrupa centroides contiguos (ordenados por media) usando la función de
+    escala k1 del t-digest: k(q) = δ / 2π · asin(2q - 1). Los centroides cuyo
+    cuantil central cae en el mismo intervalo unitario de k se fusionan, lo
+    que deja ~δ/2 centroides, más finos en las colas que en el centro.
+    """
+    orden = np.argsort(medias, kind="stable")
+    medias = medias[orden]
+    pesos = pesos[orden]
+
+    acumulado = np.cumsum(pesos)
+    q = (acumulado - pesos / 2) / acumulado[-1]
+    k = compresion / (2 * math.pi) * np.arcsin(np.clip(2 * q - 1, -1.0, 1.0))
+    grupo = np.floor(k)
+
+    inicios = np.flatnonzero(np.r_[True, grupo[1:] != grupo[:-1]])
+    pesos_grupo = np.add.reduceat(pesos, inicios)
+    medias_grupo = np.add.reduceat(medias * pesos, inicios) / pesos_grupo
+    return medias_grupo, pesos_grupo
+
+
+class AcumuladorEstadistico:
+    """
+    Acumulador de estadísticas en streaming, fusionable entre procesos.
+
+    Args:
+        compresion (int): Parámetro δ del resumen de cuantiles. Más alto, más preciso.
+        rango_histograma (tuple, optional): (mínimo, máximo) de los bins del histograma.
+            Si es None no se lleva histograma.
+        bins (int): Número de bins del histograma.
+    """
+    __slots__ = ("n", "media", "m2", "minimo", "maximo", "compresion",
+                 "_centroides", "_pesos", "bordes", "conteos", "bajo_rango", "sobre_rango")
+
+    def __init__(self, compresion=200, rango_histograma=None, bins=50):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        self.compresion = compresion
+        self._centroides = np.empty(0)
+        self._pesos = np.empty(0)
+
+        if rango_histograma is None:
+            self.bordes = None
+            self.conteos = None
+        else:
+            self.bordes = np.linspace(rango_histograma[0], rango_histograma[1], bins + 1)
+            self.conteos = np.zeros(bins, dtype=np.int64)
+        self.bajo_rango = 0
+        self.sobre_rango = 0
+
+    # --- Actualización ---
+
+    def actualizar(self, valores):
+        """Incorpora un bloque de valores (escalar, lista o arreglo)."""
+        valores = np.asarray(valores, dtype=float).ravel()
+        if valores.size == 0:
+            return self
+
+        n = valores.size
+        media = float(valores.mean())
+        m2 = float(np.sum((valores - media) ** 2))
+        self._combinar_momentos(n, media, m2)
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+
+        self._centroides, self._pesos = _comprimir(
+            np.concatenate([self._centroides, valores]),
+            np.concatenate([self._pesos, np.ones(n)]),
+            self.compresion,
+        )
+
+        if self.bordes is not None:
+            self.conteos += np.histogram(valores, bins=self.bordes)[0]
+            self.bajo_rango += int(np.count_nonzero(valores < self.bordes[0]))
+            self.sobre_rango += int(np.count_nonzero(valores > self.bordes[-1]))
+        return self
+
+    def fusionar(self, otro):
+        """Incorpora en este acumulador el estado de otro (p. ej. de otro proceso)."""
+        if otro.n == 0:
+            return self
+        if (self.bordes is None) != (otro.bordes is None) or (
+                self.bordes is not None and not np.array_equal(self.bordes, otro.bordes)):
+            raise ValueError("Los acumuladores tienen histogramas con bins distintos.")
+
+        self._combinar_momentos(otro.n, otro.media, otro.m2)
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+        self._centroides, self._pesos = _comprimir(
+            np.concatenate([self._centroides, otro._centroides]),
+            np.concatenate([self._pesos, otro._pesos]),
+            self.compresion,
+        )
+        if self.bordes is not None:
+            self.conteos += otro.conteos
+            self.bajo_rango += otro.bajo_rango
+            self.sobre_rango += otro.sobre_rango
+        return self
+
+    def _combinar_momentos(self, n, media, m2):
+        """Fórmula paralela de Chan et al. para media y suma de cuadrados."""
+        total = self.n + n
+        delta = media - self.media
+        self.media += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    # --- Consultas ---
+
+    @property
+    def varianza(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def desviacion(self):
+        return math.sqrt(self.varianza)
+
+    def cuantil(self, q):
+        """
+        Cuantil aproximado (q entre 0 y 1), interpolando entre centroides.
+        Acepta un escalar o una secuencia de cuantiles.
+        """
+        if self.n == 0:
+            raise ValueError("El acumulador está vacío.")
+        centros = np.cumsum(self._pesos) - self._pesos / 2
+        posiciones = np.r_[0.0, centros, float(self.n)]
+        medias = np.r_[self.minimo, self._centroides, self.maximo]
+        return np.interp(np.asarray(q, dtype=float) * self.n, posiciones, medias)
+
+    def histograma(self):
+        """
+        Returns:
+            tuple: (conteos, bordes, bajo_rango, sobre_rango), o None si no hay histograma.
+        """
+        if self.bordes is None:
+            return None
+        return self.conteos.copy(), self.bordes.copy(), self.bajo_rango, self.sobre_rango
+
+    def resumen(self, percentiles=PERCENTILES):
+        """
+        Resumen en el mismo formato que Simulacion_Monte_Carlo.resumir_distribucion,
+        más el mínimo y el máximo.
+        """
+        resumen = {
+            "Media": self.media,
+            "Desv. Estándar": self.desviacion,
+            "Mínimo": self.minimo,
+            "Máximo": self.maximo,
+        }
+        for p, valor in zip(percentiles, self.cuantil(np.asarray(percentiles) / 100)):
+            resumen[f"P{p}"] = float(valor)
+        return resumen
+
+
+def acumular_simulacion(bloques, **kwargs):
+    """
+    Consume un flujo de bloques (lunches, cost), p. ej. de
+    Generacion_Variables.generate_simulation_chunks, y devuelve un acumulador
+    por serie. Los kwargs se pasan a AcumuladorEstadistico.
+
+    Returns:
+        tuple: (acumulador_almuerzos, acumulador_costo)
+    """
+    almuerzos = AcumuladorEstadistico(**kwargs)
+    costo = AcumuladorEstadistico(**kwargs)
+    for lunches, cost in bloques:
+        almuerzos.actualizar(lunches)
+        costo.actualizar(cost)
+    return almuerzos, costo
@@ -1,9 +1,11 @@
 import random
 import math
 
+import numpy as np
+
 # --- Generación de Distribuciones ---
 
-def triangular_variate(min_val, max_val, mode):
+def triangular_variate(min_val, max_val, mode, rng=None):
     """
     Genera un número aleatorio a partir de una distribución triangular.
     
@@ -11,29 +13,58 @@ def triangular_variate(min_val, max_val, mode):
         min_val (float): Valor mínimo (a).
         max_val (float): Valor máximo (b).
         mode (float): Valor más probable (c).
+        rng (random.Random, optional): Generador a usar. Por defecto el módulo random.
         
     Returns:
         float: El valor aleatorio generado.
     """
-    return random.triangular(min_val, max_val, mode)
+    if rng is None:
+        rng = random
+    return rng.triangular(min_val, max_val, mode)
 
-def normal_variate(mu, sigma):
+def normal_variate(mu, sigma, rng=None):
     """
     Genera un número aleatorio a partir de una distribución normal.
     
     Args:
         mu (float): Media (valor esperado).
         sigma (float): Desviación estándar.
+        rng (random.Random, optional): Generador a usar. Por defecto el módulo random.
         
     Returns:
         float: El valor aleatorio generado.
     """
+    if rng is None:
+        rng = random
     # Usa max(0, ...) para asegurar que el número de platos no sea negativo.
-    return max(0, random.normalvariate(mu, sigma))
+    return max(0, rng.normalvariate(mu, sigma))
+
+def new_seed():
+    """
+    Genera una semilla nueva a partir de la entropía del sistema operativo.
+
+    Se usa cuando el usuario no fija una semilla, para que cada corrida
+    quede registrada con la semilla que permite reproducirla.
+    """
+    return random.SystemRandom().randrange(2**32)
 
 # --- Función de Generación de Datos de Simulación Principal ---
 
-def generate_simulation_data(days, avg_lunches, sigma_lunches, avg_cost, min_cost, max_cost, mode_cost):
+def _resolve_triangular_params(avg_cost, min_cost, max_cost, mode_cost):
+    """
+    Devuelve los parámetros (mínimo, máximo, modo) de la triangular del costo.
+
+    Si alguno no es explícito se usa avg_cost como modo y un rango de ±20%.
+    """
+    if not (min_cost and max_cost and mode_cost):
+        mode_cost = avg_cost
+        min_cost = avg_cost * 0.8  # Mínimo 20% menos
+        max_cost = avg_cost * 1.2  # Máximo 20% más
+    return min_cost, max_cost, mode_cost
+
+
+def generate_simulation_data(days, avg_lunches, sigma_lunches, avg_cost, min_cost, max_cost, mode_cost,
+                             seed=None, rng=None):
     """
     Genera series de tiempo simuladas para las variables clave.
 
@@ -45,28 +76,323 @@ def generate_simulation_data(days, avg_lunches, sigma_lunches, avg_cost, min_cos
         min_cost (float): Mínimo costo de la carne (parámetro triangular).
         max_cost (float): Máximo costo de la carne (parámetro triangular).
         mode_cost (float): Modo (más probable) del costo (parámetro triangular).
+        seed (int, optional): Semilla para reproducir la corrida. Se ignora si se pasa rng.
+        rng (random.Random, optional): Generador a usar. Por defecto random.Random(seed),
+            o el módulo random si tampoco hay semilla.
         
     Returns:
         tuple: (lunches_data: list[float], cost_data: list[float])
     """
+    if rng is None and seed is not None:
+        rng = random.Random(seed)
+
     lunches_data = []
     cost_data = []
     
     # 1. Simulación de Almuerzos Vendidos (Distribución Normal)
     for _ in range(days):
-        lunches = normal_variate(avg_lunches, sigma_lunches)
+        lunches = normal_variate(avg_lunches, sigma_lunches, rng)
         # Redondear a número entero de platos
         lunches_data.append(int(round(lunches)))
         
     # 2. Simulación de Costo de Carne (Distribución Triangular)
-    # Definimos valores por defecto para la triangular si no son explícitos
-    if not (min_cost and max_cost and mode_cost):
-        mode_cost = avg_cost
-        min_cost = avg_cost * 0.8  # Mínimo 20% menos
-        max_cost = avg_cost * 1.2  # Máximo 20% más
+    min_cost, max_cost, mode_cost = _resolve_triangular_params(avg_cost, min_cost, max_cost, mode_cost)
 
     for _ in range(days):
-        cost = triangular_variate(min_cost, max_cost, mode_cost)
+        cost = triangular_variate(min_cost, max_cost, mode_cost, rng)
         cost_data.append(round(cost, 2)) # Redondear a dos decimales
         
     return lunches_data, cost_data
+
+
+# --- Motor Vectorizado (NumPy) ---
+
+class SimulationBatch:
+    """
+    Resultado de una simulación por lotes respaldado por arreglos NumPy.
+
+    Attributes:
+        lunches (np.ndarray): Almuerzos vendidos, forma (replications, days), enteros.
+        cost (np.ndarray): Costo de la carne, forma (replications, days), 2 decimales.
+    """
+    __slots__ = ("lunches", "cost")
+
+    def __init__(self, lunches, cost):
+        self.lunches = lunches
+        self.cost = cost
+
+    @property
+    def replications(self):
+        return self.lunches.shape[0]
+
+    @property
+    def days(self):
+        return self.lunches.shape[1]
+
+    def final_values(self):
+        """Devuelve (almuerzos, costo) del último día de cada réplica."""
+        return self.lunches[:, -1], self.cost[:, -1]
+
+
+def generate_simulation_batch(replications, days, avg_lunches, sigma_lunches, avg_cost,
+                              min_cost, max_cost, mode_cost, seed=None, rng=None):
+    """
+    Genera de una sola vez todas las réplicas de la simulación con NumPy.
+
+    Aplica las mismas reglas que generate_simulation_data: los almuerzos se
+    truncan en cero y se redondean a entero, el costo se redondea a dos
+    decimales y la triangular usa los mismos valores por defecto.
+
+    Args:
+        replications (int): Número de réplicas independientes.
+        days (int): Número de días por réplica.
+        avg_lunches (float): Media de almuerzos vendidos.
+        sigma_lunches (float): Desviación estándar para almuerzos.
+        avg_cost (float): Valor base del costo (usado como modo si no se especifica).
+        min_cost (float): Mínimo costo de la carne (parámetro triangular).
+        max_cost (float): Máximo costo de la carne (parámetro triangular).
+        mode_cost (float): Modo (más probable) del costo (parámetro triangular).
+        seed (int, optional): Semilla para reproducir la corrida. Se ignora si se pasa rng.
+        rng (np.random.Generator, optional): Generador a usar. Por defecto np.random.default_rng(seed).
+
+    Returns:
+        SimulationBatch: Arreglos de forma (replications, days).
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    shape = (replications, days)
+    min_cost, max_cost, mode_cost = _resolve_triangular_params(avg_cost, min_cost, max_cost, mode_cost)
+
+    lunches = _draw_lunches(rng, shape, avg_lunches, sigma_lunches)
+    cost = _draw_cost(rng, shape, min_cost, max_cost, mode_cost)
+    return SimulationBatch(lunches, cost)
+
+
+def _draw_lunches(rng, shape, avg_lunches, sigma_lunches):
+    """Almuerzos Vendidos (Normal truncada en cero, redondeo a entero)."""
+    lunches = rng.normal(avg_lunches, sigma_lunches, size=shape)
+    np.maximum(lunches, 0, out=lunches)
+    return np.rint(lunches).astype(np.int64)
+
+
+def _draw_cost(rng, shape, min_cost, max_cost, mode_cost):
+    """Costo de Carne (Triangular, redondeo a dos decimales)."""
+    if min_cost == max_cost:
+        # numpy no acepta un rango degenerado; random.triangular sí (precio fijo)
+        return np.full(shape, round(min_cost, 2), dtype=float)
+    cost = rng.triangular(min_cost, mode_cost, max_cost, size=shape)
+    np.round(cost, 2, out=cost)
+    return cost
+
+
+def generate_simulation_chunks(days, avg_lunches, sigma_lunches, avg_cost, min_cost, max_cost, mode_cost,
+                               chunk_size=10_000, seed=None, rng=None):
+    """
+    Versión perezosa de generate_simulation_data: produce la serie de tiempo
+    en bloques de a lo sumo chunk_size días, sin materializar todo el horizonte.
+
+    Los bloques se generan a medida que se consumen, por lo que la memoria
+    usada no depende de days y el primer bloque está disponible de inmediato.
+
+    Args:
+        days (int): Número total de días a simular.
+        avg_lunches, sigma_lunches, avg_cost, min_cost, max_cost, mode_cost:
+            Igual que en generate_simulation_data.
+        chunk_size (int): Días por bloque.
+        seed (int, optional): Semilla para reproducir la corrida. Se ignora si se pasa rng.
+        rng (np.random.Generator, optional): Generador a usar. Por defecto np.random.default_rng(seed).
+
+    Yields:
+        tuple: (lunches: np.ndarray, cost: np.ndarray) de un bloque de días consecutivos.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size debe ser positivo.")
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    min_cost, max_cost, mode_cost = _resolve_triangular_params(avg_cost, min_cost, max_cost, mode_cost)
+
+    for start in range(0, days, chunk_size):
+        size = min(chunk_size, days - start)
+        yield (
+            _draw_lunches(rng, size, avg_lunches, sigma_lunches),
+            _draw_cost(rng, size, min_cost, max_cost, mode_cost),
+        )
+
+
+# --- Estrategias de Muestreo (Reducción de Varianza) ---
+
+SAMPLING_METHODS = ("random", "antithetic", "latin_hypercube", "sobol")
+
+# Coeficientes de la aproximación racional de Acklam para la inversa de la normal
+_ACKLAM_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+             1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_ACKLAM_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+             6.680131188771972e+01, -1.328068155288572e+01)
+_ACKLAM_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+             -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_ACKLAM_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+             3.754408661907416e+00)
+_ACKLAM_P_LOW = 0.02425
+
+
+def _polyval(coefs, x):
+    result = np.zeros_like(x)
+    for c in coefs:
+        result = result * x + c
+    return result
+
+
+def normal_ppf(u, mu, sigma):
+    """
+    Inversa de la función de distribución normal (Acklam, error relativo < 1.2e-9).
+
+    Args:
+        u (np.ndarray): Probabilidades en (0, 1).
+        mu (float): Media.
+        sigma (float): Desviación estándar.
+
+    Returns:
+        np.ndarray: Cuantiles correspondientes.
+    """
+    u = np.asarray(u, dtype=float)
+    z = np.empty_like(u)
+
+    low = u < _ACKLAM_P_LOW
+    high = u > 1 - _ACKLAM_P_LOW
+    mid = ~(low | high)
+
+    q = u[mid] - 0.5
+    r = q * q
+    z[mid] = _polyval(_ACKLAM_A, r) * q / (_polyval(_ACKLAM_B, r) * r + 1)
+
+    q = np.sqrt(-2 * np.log(u[low]))
+    z[low] = _polyval(_ACKLAM_C, q) / (_polyval(_ACKLAM_D, q) * q + 1)
+
+    q = np.sqrt(-2 * np.log1p(-u[high]))
+    z[high] = -_polyval(_ACKLAM_C, q) / (_polyval(_ACKLAM_D, q) * q + 1)
+
+    return mu + sigma * z
+
+
+def triangular_ppf(u, min_val, max_val, mode):
+    """
+    Inversa de la función de distribución triangular.
+
+    Args:
+        u (np.ndarray): Probabilidades en (0, 1).
+        min_val (float): Valor mínimo (a).
+        max_val (float): Valor máximo (b).
+        mode (float): Valor más probable (c).
+
+    Returns:
+        np.ndarray: Cuantiles correspondientes. Con un rango degenerado
+        (min_val == max_val) todos valen min_val, como en random.triangular.
+    """
+    u = np.asarray(u, dtype=float)
+    width = max_val - min_val
+    if width == 0:
+        return np.full_like(u, min_val)
+    # Un modo fuera del rango se lleva al extremo más cercano
+    mode = min(max(mode, min_val), max_val)
+    split = (mode - min_val) / width
+    return np.where(
+        u < split,
+        min_val + np.sqrt(u * width * (mode - min_val)),
+        max_val - np.sqrt((1 - u) * width * (max_val - mode)),
+    )
+
+
+def _sobol_2d(n, rng):
+    """
+    Primeros n puntos de la secuencia de Sobol en 2 dimensiones, aleatorizados
+    con un desplazamiento digital (XOR con un entero aleatorio por dimensión).
+
+    Dimensión 1: números directores 2^(32-k) (van der Corput en base 2).
+    Dimensión 2: polinomio primitivo x + 1, con m1 = 1.
+    """
+    bits = max(1, int(n - 1).bit_length())
+    if bits > 32:
+        raise ValueError("La secuencia de Sobol admite a lo sumo 2**32 puntos.")
+
+    v1 = [1 << (31 - k) for k in range(bits)]
+    v2 = [1 << 31]
+    for _ in range(1, bits):
+        v2.append(v2[-1] ^ (v2[-1] >> 1))
+
+    index = np.arange(n, dtype=np.uint64)
+    x1 = np.zeros(n, dtype=np.uint64)
+    x2 = np.zeros(n, dtype=np.uint64)
+    for k in range(bits):
+        bit = (index >> np.uint64(k)) & np.uint64(1)
+        x1 ^= bit * np.uint64(v1[k])
+        x2 ^= bit * np.uint64(v2[k])
+
+    shift = rng.integers(0, 2**32, size=2, dtype=np.uint64)
+    x1 ^= shift[0]
+    x2 ^= shift[1]
+    # Centrar en la celda evita valores exactamente 0
+    return np.column_stack([(x1 + 0.5) / 2**32, (x2 + 0.5) / 2**32])
+
+
+def uniform_samples(n, dimensions, method="random", rng=None):
+    """
+    Genera n puntos uniformes en (0, 1)^dimensions con la estrategia indicada.
+
+    Args:
+        n (int): Número de puntos.
+        dimensions (int): Dimensiones de cada punto.
+        method (str): "random" (pseudoaleatorio), "antithetic" (pares u, 1 - u),
+            "latin_hypercube" (estratificación en n intervalos por dimensión) o
+            "sobol" (cuasi-aleatorio con desplazamiento digital, hasta 2 dimensiones).
+        rng (np.random.Generator, optional): Generador a usar.
+
+    Returns:
+        np.ndarray: Arreglo de forma (n, dimensions).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    if method == "random":
+        return rng.random((n, dimensions))
+    if method == "antithetic":
+        half = rng.random(((n + 1) // 2, dimensions))
+        return np.concatenate([half, 1 - half])[:n]
+    if method == "latin_hypercube":
+        strata = np.argsort(rng.random((n, dimensions)), axis=0)
+        return (strata + rng.random((n, dimensions))) / n
+    if method == "sobol":
+        if dimensions > 2:
+            raise ValueError("El muestreo de Sobol sólo está implementado para 2 dimensiones.")
+        return _sobol_2d(n, rng)[:, :dimensions]
+    raise ValueError(f"Método de muestreo desconocido: {method}. Opciones: {SAMPLING_METHODS}")
+
+
+def sample_lunches_and_cost(n, avg_lunches, sigma_lunches, avg_cost, min_cost, max_cost, mode_cost,
+                            method="random", seed=None, rng=None):
+    """
+    Genera n pares independientes (almuerzos, costo de carne) con la estrategia
+    de muestreo indicada, aplicando las reglas de generate_simulation_data.
+
+    Con method="random" los valores son idénticos a los de
+    generate_simulation_batch(n, 1, ...) para el mismo generador. Los demás
+    métodos pasan uniformes estratificados o cuasi-aleatorios por las inversas
+    de la normal y de la triangular.
+
+    Returns:
+        tuple: (lunches: np.ndarray, cost: np.ndarray) de largo n.
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    min_cost, max_cost, mode_cost = _resolve_triangular_params(avg_cost, min_cost, max_cost, mode_cost)
+
+    if method == "random":
+        return (
+            _draw_lunches(rng, n, avg_lunches, sigma_lunches),
+            _draw_cost(rng, n, min_cost, max_cost, mode_cost),
+        )
+
+    u = uniform_samples(n, 2, method, rng)
+    lunches = np.maximum(normal_ppf(u[:, 0], avg_lunches, sigma_lunches), 0)
+    lunches = np.rint(lunches).astype(np.int64)
+    cost = np.round(triangular_ppf(u[:, 1], min_cost, max_cost, mode_cost), 2)
+    return lunches, cost
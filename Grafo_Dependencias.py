@@ -0,0 +1,111 @@
+"""
+Grafo de dependencias con recálculo incremental.
+
+Los nodos de entrada guardan valores asignados desde fuera; los nodos
+calculados guardan una función de los valores de sus dependencias. Al
+cambiar una entrada sólo se marcan como sucios sus descendientes, y un
+nodo sucio se recalcula únicamente cuando alguien pide su valor. Si al
+recalcular un nodo su valor no cambia, sus descendientes no se recalculan
+(corte temprano).
+"""
+from collections import defaultdict
+
+
+class _Nodo:
+    __slots__ = ("funcion", "dependencias", "valor", "version", "versiones_deps", "sucio")
+
+    def __init__(self, funcion=None, dependencias=(), valor=None):
+        self.funcion = funcion
+        self.dependencias = tuple(dependencias)
+        self.valor = valor
+        self.version = 0
+        self.versiones_deps = None
+        self.sucio = funcion is not None
+
+
+class GrafoDependencias:
+    """Grafo de nodos con recálculo perezoso de sólo los nodos sucios."""
+
+    def __init__(self):
+        self._nodos = {}
+        self._dependientes = defaultdict(list)
+        self.recalculos = 0  # Número de funciones evaluadas (útil para medir)
+
+    # --- Definición ---
+
+    def entrada(self, nombre, valor):
+        """Define un nodo de entrada con su valor inicial."""
+        self._nodos[nombre] = _Nodo(valor=valor)
+
+    def nodo(self, nombre, funcion, dependencias):
+        """
+        Define un nodo calculado.
+
+        Args:
+            nombre (str): Nombre del nodo.
+            funcion (callable): Recibe los valores de las dependencias, en orden.
+            dependencias (list[str]): Nodos ya definidos de los que depende.
+        """
+        for dep in dependencias:
+            if dep not in self._nodos:
+                raise KeyError(f"Dependencia no definida: {dep}")
+            self._dependientes[dep].append(nombre)
+        self._nodos[nombre] = _Nodo(funcion, dependencias)
+
+    # --- Uso ---
+
+    def asignar(self, nombre, valor):
+        """
+        Cambia el valor de una entrada y marca como sucios sus descendientes.
+
+        Returns:
+            bool: False si el valor no cambió (no se marca nada).
+        """
+        nodo = self._nodos[nombre]
+        if nodo.funcion is not None:
+            raise ValueError(f"{nombre} es un nodo calculado, no una entrada.")
+        if nodo.valor == valor:
+            return False
+        nodo.valor = valor
+        nodo.version += 1
+        self._marcar_sucios(nombre)
+        return True
+
+    def valor(self, nombre):
+        """Devuelve el valor del nodo, recalculando sólo lo necesario."""
+        nodo = self._nodos[nombre]
+        if nodo.sucio:
+            self._actualizar(nodo)
+        return nodo.valor
+
+    def version(self, nombre):
+        """Versión del nodo; aumenta sólo cuando su valor cambia."""
+        nodo = self._nodos[nombre]
+        if nodo.sucio:
+            self._actualizar(nodo)
+        return nodo.version
+
+    def _marcar_sucios(self, nombre):
+        pendientes = list(self._dependientes[nombre])
+        while pendientes:
+            dependiente = pendientes.pop()
+            nodo = self._nodos[dependiente]
+            if not nodo.sucio:
+                nodo.sucio = True
+                pendientes.extend(self._dependientes[dependiente])
+
+    def _actualizar(self, nodo):
+        deps = [self._nodos[dep] for dep in nodo.dependencias]
+        for dep in deps:
+            if dep.sucio:
+                self._actualizar(dep)
+
+        versiones = tuple(dep.version for dep in deps)
+        if versiones != nodo.versiones_deps:
+            nuevo = nodo.funcion(*(dep.valor for dep in deps))
+            self.recalculos += 1
+            if nodo.versiones_deps is None or nuevo != nodo.valor:
+                nodo.valor = nuevo
+                nodo.version += 1
+            nodo.versiones_deps = versiones
+        nodo.sucio = False
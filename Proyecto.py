@@ -1,14 +1,36 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 import os
-from Generacion_Variables import generate_simulation_data 
+import numpy as np
+import datetime
+from Generacion_Variables import generate_simulation_data, new_seed, SAMPLING_METHODS
+from Simulacion_Monte_Carlo import evaluar_metricas, resumir_distribucion, simular_muestras, simular_hasta_convergencia, estimar_reduccion_varianza, PROB_BAJO_EQUILIBRIO
+from Almacen_Corridas import CORRIDAS_PATH, COLUMNA_ALMUERZOS, COLUMNA_CARNE, guardar_corrida, abrir_corrida
+from Estadisticas_Streaming import AcumuladorEstadistico
+from Calculos_Financieros import (
+    EntradasFinancieras, CLAVES_TRADICIONAL, CLAVES_VARIABLE, CLAVES_PUNTO_EQUILIBRIO,
+    ventas_mensuales, calcular_costo_puesto, huella_entradas, MemoEstados, valores,
+)
+from Grafo_Dependencias import GrafoDependencias
+from Comparacion_Reportes import CONCEPTOS_COMPARACION, construir_matriz, formatear
+from Tabla_Virtual import TablaVirtual
 from export_pdf import exportar_simulacion_pdf
-from bd.db_queries import insert_estado_tradicional, insert_estado_variable, insert_punto_equilibrio, get_available_reports, get_full_report_data
-import threading
+from bd.db_queries import REPORT_PAGE_SIZE
+from bd.db_async import get_reports_page_async, get_reports_data_async, get_report_trends_async
+from bd.db_writer import get_report_writer
+from Bucle_Asyncio import BucleAsyncioTk
+import queue
+
+# Reportes vecinos (arriba y abajo de cada seleccionado) que se precargan en la comparación
+COMPARISON_PREFETCH = 2
+
 
 class ModernFinancialUI:
+    # Espera tras la última tecla antes de refrescar los campos calculados
+    RECALC_DEBOUNCE_MS = 150
+
     def __init__(self, root):
         self.root = root
         self.root.title("Sistema de Simulación Financiera")
@@ -80,8 +102,20 @@ class ModernFinancialUI:
             "Sigma Almuerzos": 15,
             "Carne Min": 750,
             "Carne Max": 1150,
-            "Carne Mode": 900
+            "Carne Mode": 900,
+            "Replicas Monte Carlo": 100000,
+            "Semilla": None, # None = semilla nueva en cada corrida
+            "Objetivo Monte Carlo": "Utilidad Operacional (Variable)",
+            "Confianza Monte Carlo": 0.95,
         }
+        # Semiamplitud deseada del IC del objetivo; 0 = número fijo de réplicas
+        self.Tolerancia_MC = tk.DoubleVar(value=0.0)
+        # Estrategia de muestreo de la simulación Monte Carlo (ver SAMPLING_METHODS)
+        self.Muestreo_MC = tk.StringVar(value="random")
+        # Semilla de la última simulación; se guarda junto con cada reporte
+        self.semilla_actual = None
+        # Última simulación diaria (muestras, semilla, entradas y parámetros), para guardarla a pedido
+        self.corrida_diaria = None
         
         self.ASIGNACION = {
             "Arriendo_Ventas": 0.80,
@@ -105,8 +139,19 @@ class ModernFinancialUI:
         self.ventas_totales_mensuales = tk.DoubleVar(value=0.0)
 
         # ============================
-        # 3. INICIALIZACIÓN Y TRAZADO (Mantenidas)
+        # 3. INICIALIZACIÓN Y TRAZADO
         # ============================
+        self._recalc_after_id = None
+        self._entradas_invalidas = set()
+        self._costos_mostrados = {}
+        self._reportes_guardados = set()  # Huellas (entradas + semilla) ya enviadas a la base
+        self.memo_estados = MemoEstados()
+        self._comparison_request = 0
+        self._report_list_request = 0
+        # Las consultas a la base corren como corrutinas en este bucle, dentro del mainloop
+        self.async_loop = BucleAsyncioTk(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._build_dependency_graph()
         self._calculate_sales_and_personnel_costs()
         self._setup_variable_tracing()
 
@@ -115,122 +160,179 @@ class ModernFinancialUI:
         self.show_dashboard()
         
     def _calculate_sales_and_personnel_costs(self):
-        """Calcula las ventas mensuales y los costos de personal."""
-        # Lógica mantenida
-        try:
-            precio_almuerzo = self.Entradas["Precio del Almuerzo"].get()
-            dias_trabajados = self.Entradas["Dias trabajados al mes"].get()
-            almuerzos_diarios = self.Entradas["Almuerzos vendidos diariamente"].get() 
-            factor_prestacional = self.Factor_Prestacional.get()
+        """
+        Refresca las ventas mensuales y los costos de personal mostrados.
 
-            ventas_totales = precio_almuerzo * almuerzos_diarios * dias_trabajados
-            self.ventas_totales_mensuales.set(ventas_totales)
-            
-            for puesto, datos_entrada in self.Entradas_Personal.items():
-                datos_salida = self.personal_calculated_vars[puesto]
-                
-                salario_base_unitario = datos_entrada["Salario Base"].get()
-                cantidad = datos_entrada["Cantidad de " + puesto].get()
-                
-                costo_base_mensual = salario_base_unitario * cantidad
-                datos_salida["Salario"].set(costo_base_mensual)
-                
-                comisiones = 0.0
-                if "Meseros" in puesto:
-                    comisiones = ventas_totales * 0.01 
-                elif "Administradores" in puesto:
-                    comisiones = ventas_totales * 0.10
-                
-                datos_salida["Comisiones"].set(comisiones)
+        Los valores salen del grafo de dependencias, por lo que sólo se
+        recalculan los nodos afectados por las entradas que cambiaron, y sólo
+        se escriben las variables de Tkinter cuyo valor es distinto.
+        """
+        self._recalc_after_id = None
+
+        ventas = self.grafo.valor("Ventas")
+        if self._costos_mostrados.get("Ventas") != ventas:
+            self.ventas_totales_mensuales.set(ventas)
+            self._costos_mostrados["Ventas"] = ventas
+
+        for puesto, datos_salida in self.personal_calculated_vars.items():
+            costos = self.grafo.valor(f"Costo/{puesto}")
+            anteriores = self._costos_mostrados.get(puesto, {})
+            for clave, valor in costos.items():
+                if anteriores.get(clave) != valor:
+                    datos_salida[clave].set(valor)
+            self._costos_mostrados[puesto] = costos
+
+    def _input_variables(self):
+        """Devuelve {nombre_de_nodo: variable_tk} para todas las entradas."""
+        variables = {f"Entradas/{nombre}": var for nombre, var in self.Entradas.items()}
+        for puesto, datos in self.Entradas_Personal.items():
+            for campo, var in datos.items():
+                variables[f"Personal/{puesto}/{campo}"] = var
+        variables["Factor Prestacional"] = self.Factor_Prestacional
+        for insumo, datos in self.insumos.items():
+            for campo, var in datos.items():
+                variables[f"Insumos/{insumo}/{campo}"] = var
+        for gasto, var in self.GastosGenerales.items():
+            variables[f"GastosGenerales/{gasto}"] = var
+        return variables
+
+    def _inputs_from_values(self, valores):
+        """Arma un EntradasFinancieras a partir de {nombre_de_nodo: valor}."""
+        return EntradasFinancieras(
+            precio_almuerzo=valores["Entradas/Precio del Almuerzo"],
+            dias_trabajados=valores["Entradas/Dias trabajados al mes"],
+            almuerzos_diarios=valores["Entradas/Almuerzos vendidos diariamente"],
+            factor_prestacional=valores["Factor Prestacional"],
+            personal={
+                puesto: (valores[f"Personal/{puesto}/Salario Base"], valores[f"Personal/{puesto}/Cantidad de {puesto}"])
+                for puesto in self.Entradas_Personal
+            },
+            insumos={
+                insumo: (valores[f"Insumos/{insumo}/Precio Kilo"], valores[f"Insumos/{insumo}/Cantidad (g)"])
+                for insumo in self.insumos
+            },
+            arriendo=valores["GastosGenerales/Arriendo"],
+            servicios_publicos=valores["GastosGenerales/Servicios Públicos"],
+            industria_comercio=valores["GastosGenerales/Industria y Comercio"],
+            depreciacion=valores["GastosGenerales/Depreciacion"],
+            asignacion=dict(self.ASIGNACION),
+        )
 
-                base_prestaciones = costo_base_mensual + comisiones
-                prestaciones = base_prestaciones * factor_prestacional
-                datos_salida["Prestaciones"].set(prestaciones)
-                
-                total = costo_base_mensual + comisiones + prestaciones
-                datos_salida["Total"].set(total)
-                
+    def _build_dependency_graph(self):
+        """
+        Modela los rubros como un grafo: entradas → ventas → costos de personal
+        (campos calculados) y entradas → huella → estados de resultados.
+        """
+        self.grafo = grafo = GrafoDependencias()
+        variables = self._input_variables()
+        for nombre, var in variables.items():
+            grafo.entrada(nombre, var.get())
+        nombres_entrada = list(variables)
+
+        grafo.nodo("Ventas", ventas_mensuales, [
+            "Entradas/Precio del Almuerzo",
+            "Entradas/Almuerzos vendidos diariamente",
+            "Entradas/Dias trabajados al mes",
+        ])
+
+        puestos = list(self.Entradas_Personal)
+        for puesto in puestos:
+            grafo.nodo(
+                f"Costo/{puesto}",
+                lambda salario, cantidad, ventas, factor, puesto=puesto:
+                    calcular_costo_puesto(puesto, salario, cantidad, ventas, factor),
+                [f"Personal/{puesto}/Salario Base", f"Personal/{puesto}/Cantidad de {puesto}",
+                 "Ventas", "Factor Prestacional"],
+            )
+
+        grafo.nodo("Entradas", lambda *vals: self._inputs_from_values(dict(zip(nombres_entrada, vals))), nombres_entrada)
+        grafo.nodo("Huella", huella_entradas, ["Entradas"])
+
+        # Los estados se piden a MemoEstados: volver a unas entradas ya vistas no recalcula nada
+        memo = self.memo_estados
+        grafo.nodo("Estado Tradicional", memo.estado_tradicional, ["Entradas", "Huella"])
+        grafo.nodo("Estado Variable", memo.estado_variable, ["Entradas", "Huella"])
+        grafo.nodo("Punto de Equilibrio", memo.punto_equilibrio, ["Entradas", "Huella"])
+
+    def _on_input_changed(self, nombre, var):
+        """Pasa el nuevo valor al grafo y agenda un único refresco (debounce)."""
+        try:
+            valor = var.get()
         except tk.TclError:
-            pass
-            
+            # Campo a medio escribir o inválido: se conserva el último valor válido
+            self._entradas_invalidas.add(nombre)
+            return
+        self._entradas_invalidas.discard(nombre)
+
+        if self.grafo.asignar(nombre, valor):
+            if self._recalc_after_id is not None:
+                self.root.after_cancel(self._recalc_after_id)
+            self._recalc_after_id = self.root.after(self.RECALC_DEBOUNCE_MS, self._calculate_sales_and_personnel_costs)
+
+    def _check_valid_inputs(self):
+        """
+        Raises:
+            tk.TclError: Si algún campo de entrada no contiene un número válido.
+        """
+        if self._entradas_invalidas:
+            campos = ", ".join(sorted(self._entradas_invalidas))
+            raise tk.TclError(f"Valores inválidos en: {campos}")
+
+    def _collect_inputs(self):
+        """
+        Devuelve las variables de entrada como un EntradasFinancieras, para
+        que los cálculos no dependan de la interfaz.
+
+        Raises:
+            tk.TclError: Si algún campo no contiene un número válido.
+        """
+        self._check_valid_inputs()
+        return self.grafo.valor("Entradas")
+
     def _setup_variable_tracing(self):
-        """Configura el rastreo de cambios."""
-        # Lógica mantenida
-        relevant_vars = []
-        relevant_vars.extend(self.Entradas.values())
-        for datos in self.Entradas_Personal.values():
-            relevant_vars.extend(datos.values())
-        relevant_vars.append(self.Factor_Prestacional)
-        for datos in self.insumos.values():
-            relevant_vars.extend(datos.values())
-        relevant_vars.extend(self.GastosGenerales.values())
-        
-        for var in relevant_vars:
-            var.trace_add("write", lambda name, index, mode: self._calculate_sales_and_personnel_costs())
+        """Configura el rastreo de cambios: cada entrada alimenta su nodo del grafo."""
+        for nombre, var in self._input_variables().items():
+            var.trace_add("write", lambda name, index, mode, nombre=nombre, var=var: self._on_input_changed(nombre, var))
+
+    def _save_report(self):
+        """
+        Encola en el escritor de reportes los tres estados de la corrida
+        actual como un solo reporte. El reporte se identifica por la huella de
+        las entradas y la semilla: si ya se guardó, no se vuelve a enviar, y la
+        base tampoco lo duplica.
+        """
+        try:
+            estado_tradicional = self.grafo.valor("Estado Tradicional")
+            estado_variable = self.grafo.valor("Estado Variable")
+            punto_equilibrio = self.grafo.valor("Punto de Equilibrio")
+        except ZeroDivisionError:
+            return
+
+        huella = huella_entradas(self.grafo.valor("Entradas"), self.semilla_actual)
+        if huella in self._reportes_guardados:
+            return
+
+        try:
+            get_report_writer().submit(
+                valores(estado_tradicional, CLAVES_TRADICIONAL),
+                valores(estado_variable, CLAVES_VARIABLE),
+                valores(punto_equilibrio, CLAVES_PUNTO_EQUILIBRIO),
+                semilla=self.semilla_actual,
+                content_hash=huella,
+                block=False,
+            )
+        except queue.Full:
+            messagebox.showwarning("Reporte no guardado",
+                                   "La cola de reportes está llena; el reporte de esta corrida no se guardó.")
+            return
+        self._reportes_guardados.add(huella)
 
     def _calculate_traditional_statement(self):
         """Calcula todos los rubros del Estado de Resultados Tradicional."""
-        ventas_mensuales = self.ventas_totales_mensuales.get() 
-        almuerzos_mensuales = self.Entradas["Almuerzos vendidos diariamente"].get() * self.Entradas["Dias trabajados al mes"].get()
-        dias_trabajados = self.Entradas["Dias trabajados al mes"].get()
-        statement = {}
         try:
-            insumos_arroz = self.insumos["Arroz"]["Precio Kilo"].get() * (self.insumos["Arroz"]["Cantidad (g)"].get() / 1000)
-            insumos_carne = self.insumos["Carne"]["Precio Kilo"].get() * (self.insumos["Carne"]["Cantidad (g)"].get() / 1000)
-            insumos_papa = self.insumos["Papa"]["Precio Kilo"].get() * (self.insumos["Papa"]["Cantidad (g)"].get() / 1000)
-            insumos_maduro = self.insumos["Maduro y otros"]["Precio Kilo"].get() * (self.insumos["Maduro y otros"]["Cantidad (g)"].get() / 1000)
-            total_insumos_por_almuerzo = insumos_arroz + insumos_carne + insumos_papa + insumos_maduro
-            materia_prima = total_insumos_por_almuerzo * almuerzos_mensuales
-            mod_cocineros = self.personal_calculated_vars["Cocineros"]["Total"].get()
-            mod_ayudantes = self.personal_calculated_vars["Ayudantes de Cocina"]["Total"].get()
-            mano_obra = mod_cocineros + mod_ayudantes
-            arriendo_local = self.GastosGenerales["Arriendo"].get()
-            arriendo_cif = arriendo_local * self.ASIGNACION["Arriendo_Cocina"]
-            sp_unitario = self.GastosGenerales["Servicios Públicos"].get() 
-            almuerzos_diarios = self.Entradas["Almuerzos vendidos diariamente"].get()
-            sp_cif = sp_unitario * almuerzos_diarios * dias_trabajados
-            depreciacion_equipos = self.GastosGenerales["Depreciacion"].get()
-            depreciacion_cif = depreciacion_equipos * self.ASIGNACION["Depreciacion_Cocina"]
-            cif_total = arriendo_cif + sp_cif + depreciacion_cif
-            total_costo_ventas = materia_prima + mano_obra + cif_total
-            utilidad_bruta = ventas_mensuales - total_costo_ventas
-            salario_adm = self.personal_calculated_vars["Administradores"]["Total"].get()
-            salario_meseros = self.personal_calculated_vars["Meseros"]["Total"].get()
-            arriendo_oyv = arriendo_local * self.ASIGNACION["Arriendo_Ventas"]
-            depreciacion_oyv = depreciacion_equipos * self.ASIGNACION["Depreciacion_Ventas"]
-            ic_tasa = self.GastosGenerales["Industria y Comercio"].get()
-            ic_oyv = ic_tasa * ventas_mensuales
-            total_gastos_oyv = salario_adm + salario_meseros + arriendo_oyv + depreciacion_oyv + ic_oyv
-            utilidad_operacional = utilidad_bruta - total_gastos_oyv
-            
-            # Poblar el diccionario (asumo que las ventas no son cero, si no, salta la excepción)
-            statement["Ventas"] = (ventas_mensuales, 1.0)
-            statement["Materia Prima"] = (materia_prima, materia_prima / ventas_mensuales)
-            statement["Mano de Obra Directa"] = (mano_obra, mano_obra / ventas_mensuales)
-            statement["CIF"] = (cif_total, cif_total / ventas_mensuales)
-            statement["Total Costo de Ventas"] = (total_costo_ventas, total_costo_ventas / ventas_mensuales)
-            statement["Utilidad Bruta en Ventas"] = (utilidad_bruta, utilidad_bruta / ventas_mensuales)
-            statement["Salario Administración"] = (salario_adm, salario_adm / ventas_mensuales)
-            statement["Salario Meseros"] = (salario_meseros, salario_meseros / ventas_mensuales)
-            statement["Arrendamiento (OyV)"] = (arriendo_oyv, arriendo_oyv / ventas_mensuales)
-            statement["Depreciación (OyV)"] = (depreciacion_oyv, depreciacion_oyv / ventas_mensuales)
-            statement["Industria y Comercio"] = (ic_oyv, ic_oyv / ventas_mensuales)
-            statement["Total Gastos Admon y Ventas"] = (total_gastos_oyv, total_gastos_oyv / ventas_mensuales)
-            statement["Utilidad Operacional"] = (utilidad_operacional, utilidad_operacional / ventas_mensuales)
-
-
-            def insertar():
-                try:
-                    insert_estado_tradicional(
-                        ventas_mensuales, materia_prima, mano_obra, cif_total, total_costo_ventas,
-                        utilidad_bruta, salario_adm, salario_meseros, arriendo_oyv,
-                        depreciacion_oyv, ic_oyv, total_gastos_oyv, utilidad_operacional
-                    )
-                except Exception as e:
-                    print(f"Error al insertar Estado Tradicional: {e}")
-
-            threading.Thread(target=insertar).start()
-
+            self._check_valid_inputs()
+            statement = self.grafo.valor("Estado Tradicional")
+            self._save_report()
             return statement
 
         except ZeroDivisionError:
@@ -245,155 +347,10 @@ class ModernFinancialUI:
         Calcula el Estado de Resultados por Costo Variable (o Marginal).
         """
         try:
-            ventas_totales = self.ventas_totales_mensuales.get()
-            
-            # --- 1. CÁLCULO DE COSTOS VARIABLES ---
-            
-            # A. Costo Variable de Materia Prima (Insumos)
-            almuerzos_diarios = self.Entradas["Almuerzos vendidos diariamente"].get()
-            dias_trabajados = self.Entradas["Dias trabajados al mes"].get()
-            almuerzos_mensuales = almuerzos_diarios * dias_trabajados
-            
-            costo_materia_prima_unidad = 0.0
-            for _, datos in self.insumos.items():
-                precio_kilo = datos["Precio Kilo"].get()
-                cantidad_g = datos["Cantidad (g)"].get()
-                costo_materia_prima_unidad += (precio_kilo * cantidad_g) / 1000 
-                
-            total_materia_prima = costo_materia_prima_unidad * almuerzos_mensuales
-
-            # B. Costo Variable de servicios publicos (proporcional a almuerzos vendidos)
-            sp = self.GastosGenerales["Servicios Públicos"].get()
-            total_sp = sp * dias_trabajados * almuerzos_diarios
-            
-
-            # C. Costo Variable de Comisiones (Meseros y Administradores)
-            total_comisiones = sum(
-                datos["Comisiones"].get() 
-                for datos in self.personal_calculated_vars.values()
-            )
-            factor_prestacional = self.Factor_Prestacional.get()
-            comisiones_sobre_ventas = total_comisiones * (1 + factor_prestacional)
-            
-            # D. Costo Variable de Impuesto (Industria y Comercio)
-            ind_y_com = self.GastosGenerales["Industria y Comercio"].get()
-            total_ind_y_com = ventas_totales * ind_y_com
-
-            # D. Total Costos Variables
-            total_costos_variables = total_materia_prima + total_sp + comisiones_sobre_ventas + total_ind_y_com
-            
-            # --- 2. CÁLCULO DEL MARGEN DE CONTRIBUCIÓN ---
-            margen_contribucion = ventas_totales - total_costos_variables
-            
-            # --- 3. CÁLCULO DE COSTOS FIJOS ---
-            
-            # A. Costo Fijo de Mano de Obra (Salarios cocineros y ayudantes)
-            mano_obra_fija = sum(
-                self.personal_calculated_vars[puesto]["Total"].get()
-                for puesto in ["Cocineros", "Ayudantes de Cocina"]
-            )
-
-            # B. Sueldo Fijo (Administracion)
-            SalarioAdmin = self.personal_calculated_vars["Administradores"]["Salario"].get()
-            SalarioFijoAdmin = SalarioAdmin * (1 + factor_prestacional)
-            
-            # C. Sueldo Fijo (Meseros)
-            SalarioMeseros = self.personal_calculated_vars["Meseros"]["Salario"].get()
-            SalarioFijoMeseros = SalarioMeseros * (1 + factor_prestacional)
-            
-            # D. Arrendamiento local
-            arriendo = self.GastosGenerales["Arriendo"].get()
-
-            # E. Depreciación equipos
-            depreciacion = self.GastosGenerales["Depreciacion"].get()
-
-            total_costos_fijos = mano_obra_fija + SalarioFijoAdmin + SalarioFijoMeseros + arriendo + depreciacion
-            
-            # --- 4. CÁLCULO DE UTILIDAD OPERACIONAL ---
-            utilidad_operacional = margen_contribucion - total_costos_fijos
-
-            Rentabilidad_en_ventas = utilidad_operacional / ventas_totales if ventas_totales else 0
-            
-            # --- 5. Estructura de Salida ---
-
-
-            def insertar():
-                try:
-                    insert_estado_variable(
-                        ventas_totales, total_materia_prima, total_sp,
-                        comisiones_sobre_ventas, total_ind_y_com,
-                        total_costos_variables, margen_contribucion,
-                        mano_obra_fija, SalarioFijoAdmin, SalarioFijoMeseros,
-                        arriendo, depreciacion, total_costos_fijos,
-                        utilidad_operacional, Rentabilidad_en_ventas
-                    )
-                except Exception as e:
-                    print(f"Error al insertar Estado Variable: {e}")
-                
-            threading.Thread(target=insertar).start()
-            
-            results = {
-                "Ventas": (ventas_totales, 1.0),
-                "Costo Variable de Materia Prima": (total_materia_prima, total_materia_prima / ventas_totales if ventas_totales else 0),
-                "Costo Variable de Servicios Públicos": (total_sp, total_sp / ventas_totales if ventas_totales else 0),
-                "Costo Variable de Comisiones": (comisiones_sobre_ventas, comisiones_sobre_ventas / ventas_totales if ventas_totales else 0),
-                "Costo Variable de Industria y Comercio": (total_ind_y_com, total_ind_y_com / ventas_totales if ventas_totales else 0),
-
-                "Total Costos Variables": (total_costos_variables, total_costos_variables / ventas_totales if ventas_totales else 0),
-                "Margen de Contribución": (margen_contribucion, margen_contribucion / ventas_totales if ventas_totales else 0),
-
-                "Costo Fijo de Mano de Obra": (mano_obra_fija, mano_obra_fija / ventas_totales if ventas_totales else 0),
-                "Sueldo Fijo Administración": (SalarioFijoAdmin, SalarioFijoAdmin / ventas_totales if ventas_totales else 0),
-                "Sueldo Fijo Meseros": (SalarioFijoMeseros, SalarioFijoMeseros / ventas_totales if ventas_totales else 0),
-                "Arrendamiento": (arriendo, arriendo / ventas_totales if ventas_totales else 0),
-                "Depreciación": (depreciacion, depreciacion / ventas_totales if ventas_totales else 0),
-
-                "Total Costos Fijos": (total_costos_fijos, total_costos_fijos / ventas_totales if ventas_totales else 0),
-                "Utilidad Operacional": (utilidad_operacional, Rentabilidad_en_ventas),
-
-                "Rentabilidad en Ventas": (Rentabilidad_en_ventas, Rentabilidad_en_ventas),
-            }
-
-            # -------------------- Punto de Equilibrio --------------------
-            costo_variable_unitario = total_costos_variables / almuerzos_mensuales if almuerzos_mensuales else 0
-            precio_plato = self.Entradas["Precio del Almuerzo"].get()
-            margen_contribucion_unitario =  precio_plato - costo_variable_unitario if almuerzos_mensuales else 0
-
-            Punto_Equilibrio_Mes = total_costos_fijos / (precio_plato - costo_variable_unitario) if (precio_plato - costo_variable_unitario) else 0
-            Punto_Equilibrio_Dia = Punto_Equilibrio_Mes / dias_trabajados if dias_trabajados else 0
-            Punto_Equilibrio_Unidades = Punto_Equilibrio_Mes * precio_plato if precio_plato else 0
-
-            margen_seguridad = (almuerzos_mensuales - Punto_Equilibrio_Mes) / almuerzos_mensuales if almuerzos_mensuales else 0
-            margen_seguridad_valor = ventas_totales - Punto_Equilibrio_Unidades if ventas_totales else 0
-
-            utilidad_objetivo = 2500000
-
-            Ventas_Mensuales_unidades = (utilidad_objetivo + total_costos_fijos) / (precio_plato - costo_variable_unitario) if (precio_plato - costo_variable_unitario) else 0
-            almuerzos_diarios = Ventas_Mensuales_unidades / dias_trabajados if dias_trabajados else 0
-            Ventas_Mensuales_valor = Ventas_Mensuales_unidades * precio_plato if precio_plato else 0
-
-            results.update({
-                "Punto de Equilibrio (Mes - Unidades)": (Punto_Equilibrio_Mes, Punto_Equilibrio_Mes / almuerzos_mensuales if almuerzos_mensuales else 0),
-                "Punto de Equilibrio (Día - Unidades)": (Punto_Equilibrio_Dia, Punto_Equilibrio_Dia / almuerzos_diarios if almuerzos_diarios else 0),
-                "Punto de Equilibrio (Valor)": (Punto_Equilibrio_Unidades, Punto_Equilibrio_Unidades / ventas_totales if ventas_totales else 0),
-                "Margen de Seguridad (%)": (margen_seguridad, margen_seguridad),
-                "Margen de Seguridad (Valor)": (margen_seguridad_valor, margen_seguridad_valor / ventas_totales if ventas_totales else 0),
-                "Ventas para Utilidad Objetivo (Unidades)": (Ventas_Mensuales_unidades, Ventas_Mensuales_unidades / almuerzos_mensuales if almuerzos_mensuales else 0),
-                "Ventas para Utilidad Objetivo (Valor)": (Ventas_Mensuales_valor, Ventas_Mensuales_valor / ventas_totales if ventas_totales else 0),
-            })
-
-            def insertar_pe():
-                try:
-                    insert_punto_equilibrio(
-                        Punto_Equilibrio_Mes, Punto_Equilibrio_Dia, Punto_Equilibrio_Unidades,
-                        margen_seguridad, margen_seguridad_valor,
-                        Ventas_Mensuales_unidades, Ventas_Mensuales_valor
-                    )
-                except Exception as e:
-                    print(f"Error al insertar Punto de Equilibrio: {e}")
-
-            threading.Thread(target=insertar_pe).start()
-            
+            self._check_valid_inputs()
+            results = dict(self.grafo.valor("Estado Variable"))
+            results.update(self.grafo.valor("Punto de Equilibrio"))
+            self._save_report()
             return results
             
         except tk.TclError as e:
@@ -402,47 +359,15 @@ class ModernFinancialUI:
     
     def _execute_comparison_logic(self):
         """
-        Obtiene los ReporteIDs seleccionados, usa datos estáticos, y genera la vista 
-        de comparación con pestañas, ajustando el tamaño del contenedor.
+        Obtiene los ReporteIDs seleccionados y pide sus datos a la base en un
+        hilo de trabajo; mientras tanto muestra un estado de carga. Al llegar
+        los datos se genera la vista de comparación con pestañas.
         """
         
         # 1. Limpiar el área de resultados anterior
         for widget in self.comparison_results_frame.winfo_children():
             widget.destroy()
 
-        # 📝 DATOS ESTÁTICOS DE EJEMPLO (Simulando la estructura de la base de datos)
-        STATIC_DATA_REPORT_A = {
-            "tradicional": {
-                "Ventas": 1500000, "MateriaPrima": 300000, "ManoDeObra": 100000, "CIF": 50000,
-                "TotalCostoVentas": 450000, "UtilidadBruta": 1050000, "SalarioAdministracion": 80000,
-                "TotalGastosAdmonVentas": 120000, "UtilidadOperacional": 930000,
-            },
-            "variable": {
-                "Ventas": 1500000, "TotalCostosVariables": 500000, "MargenContribucion": 1000000,
-                "TotalCostosFijos": 250000, "UtilidadOperacional": 750000, "RentabilidadVentas": 0.50,
-            },
-            "punto_equilibrio": {
-                "PuntoEquilibrioValor": 500000, "PuntoEquilibrioMesUnidades": 1000, "PuntoEquilibrioDiaUnidades": 33.33,
-                "MargenSeguridadPorc": 0.66, "VentasUtilidadObjetivoValor": 1200000,
-            },
-        }
-
-        STATIC_DATA_REPORT_B = {
-            "tradicional": {
-                "Ventas": 1800000, "MateriaPrima": 350000, "ManoDeObra": 120000, "CIF": 60000,
-                "TotalCostoVentas": 530000, "UtilidadBruta": 1270000, "SalarioAdministracion": 80000,
-                "TotalGastosAdmonVentas": 130000, "UtilidadOperacional": 1140000,
-            },
-            "variable": {
-                "Ventas": 1800000, "TotalCostosVariables": 600000, "MargenContribucion": 1200000,
-                "TotalCostosFijos": 250000, "UtilidadOperacional": 950000, "RentabilidadVentas": 0.527,
-            },
-            "punto_equilibrio": {
-                "PuntoEquilibrioValor": 500000, "PuntoEquilibrioMesUnidades": 1000, "PuntoEquilibrioDiaUnidades": 33.33,
-                "MargenSeguridadPorc": 0.72, "VentasUtilidadObjetivoValor": 1400000,
-            },
-        }
-
         # 2. Extracción y Validación de ReporteIDs
         try:
             report1_id = int(self.report1_var.get().split(' ')[1])
@@ -457,11 +382,158 @@ class ModernFinancialUI:
                     font=("Segoe UI", 11), fg="#f39c12").pack(pady=10)
             return
 
-        # Asignación de datos estáticos
-        data1 = STATIC_DATA_REPORT_A
-        data2 = STATIC_DATA_REPORT_B
+        self._load_reports_async(
+            [report1_id, report2_id],
+            lambda reports: self._show_comparison(reports[report1_id], reports[report2_id], report1_id, report2_id),
+        )
+
+    def _execute_multi_comparison(self):
+        """
+        Compara todos los reportes marcados en la lista como una matriz
+        métrica × reporte, en orden cronológico; el más antiguo es la base.
+        """
+        seleccion = self.report_listbox.curselection()
+        if len(seleccion) < 2:
+            for widget in self.comparison_results_frame.winfo_children():
+                widget.destroy()
+            tk.Label(self.comparison_results_frame,
+                     text="⚠️ Marca al menos dos reportes en la lista para compararlos.",
+                     font=("Segoe UI", 11), fg="#f39c12").pack(pady=10)
+            return
+
+        filas = sorted((self._report_rows[i] for i in seleccion), key=lambda r: (r[1], r[0]))
+        report_ids = [r[0] for r in filas]
+        fechas = {r[0]: r[1] for r in filas}
+        self._load_reports_async(report_ids, lambda reports: self._show_multi_comparison(reports, report_ids, fechas))
+
+    def _on_close(self):
+        """Cancela las consultas en curso y cierra la ventana."""
+        self.async_loop.cerrar()
+        self.root.destroy()
+
+    def _load_reports_async(self, report_ids, on_loaded):
+        """
+        Muestra un estado de carga y pide los reportes al bucle asíncrono.
+        on_loaded(reports) se ejecuta en el hilo de Tkinter cuando llegan todos.
+        """
+        for widget in self.comparison_results_frame.winfo_children():
+            widget.destroy()
+        tk.Label(self.comparison_results_frame, text="⏳ Cargando reportes...",
+                 font=("Segoe UI", 11), bg="#ecf0f1", fg="#7f8c8d").pack(pady=10)
+
+        # Las respuestas de clics anteriores que lleguen tarde se descartan
+        self._comparison_request += 1
+        request = self._comparison_request
+        self.async_loop.ejecutar(
+            get_reports_data_async(report_ids),
+            lambda reports: self._on_reports_loaded(reports, request, report_ids, on_loaded),
+        )
+        self._prefetch_neighbour_reports()
+
+    def _on_reports_loaded(self, reports, request, report_ids, on_loaded):
+        """Muestra los reportes pedidos, salvo que ya se haya pedido otra comparación."""
+        if request != self._comparison_request or not self.comparison_results_frame.winfo_exists():
+            return
+
+        for widget in self.comparison_results_frame.winfo_children():
+            widget.destroy()
+        faltantes = [i for i in report_ids if not reports or i not in reports]
+        if faltantes:
+            tk.Label(self.comparison_results_frame,
+                     text=f"❌ No se pudieron cargar los reportes {faltantes} de la base de datos.",
+                     font=("Segoe UI", 11), fg="#e74c3c").pack(pady=10)
+            return
+        on_loaded(reports)
+
+    def _prefetch_neighbour_reports(self):
+        """
+        Precarga en segundo plano los reportes vecinos de la selección en la
+        lista, para que cambiar el par a comparar salga de la caché.
+        """
+        seleccion = self.report_listbox.curselection()
+        if not seleccion:
+            return
+        vecinos = set()
+        for indice in seleccion:
+            for k in range(indice - COMPARISON_PREFETCH, indice + COMPARISON_PREFETCH + 1):
+                if 0 <= k < len(self._report_rows):
+                    vecinos.add(self._report_rows[k][0])
+        self.async_loop.ejecutar(get_reports_data_async(sorted(vecinos)))
+
+    def _show_multi_comparison(self, reports, report_ids, fechas):
+        """Muestra la matriz de N reportes en una tabla virtualizada."""
+        matriz = construir_matriz(reports, report_ids)
+        columnas_stats = ("Mínimo", "Máximo", "Media", "Desv. Estándar")
+        modos = ("Valores", "Δ vs base", "Δ % vs base", "Δ vs anterior")
+        estado = {}
+
+        def recalcular():
+            """Calcula (vectorizado) la matriz del modo elegido; el formato se hace sólo al dibujar."""
+            modo = modo_var.get()
+            matriz.base = report_ids.index(int(base_var.get().split(" ")[1]))
+            estado["datos"] = {
+                "Valores": matriz.valores,
+                "Δ vs base": matriz.delta_base,
+                "Δ % vs base": matriz.delta_base_pct,
+                "Δ vs anterior": matriz.diferencias,
+            }[modo]
+            estado["stats"] = matriz.estadisticas()
+            estado["modo"] = modo
+            tabla.refrescar()
+
+        def celda(fila, columna):
+            n = len(report_ids)
+            if columna >= n:
+                valor = estado["stats"][columnas_stats[columna - n]][fila]
+                return formatear(valor, matriz.formatos[fila]), "#f4f6f7"
+            valor = estado["datos"][fila, columna]
+            modo = estado["modo"]
+            if modo == "Valores":
+                fondo = "#fcf3cf" if columna == matriz.base else "white"
+                return formatear(valor, matriz.formatos[fila]), fondo
+            fondo = "white" if not valor or np.isnan(valor) else ("#d5f5e3" if valor > 0 else "#fadbd8")
+            formato = "percent" if modo == "Δ % vs base" else matriz.formatos[fila]
+            return formatear(valor, formato, con_signo=True), fondo
+
+        def encabezado(columna):
+            if columna >= len(report_ids):
+                return columnas_stats[columna - len(report_ids)]
+            report_id = report_ids[columna]
+            return f"ID {report_id} · {fechas[report_id].strftime('%m-%d %H:%M')}"
+
+        controles = tk.Frame(self.comparison_results_frame, bg="#ecf0f1")
+        controles.pack(pady=(10, 5))
+        tk.Label(controles, text=f"Comparación de {len(report_ids)} reportes", font=("Segoe UI", 14, "bold"),
+                 bg="#ecf0f1").pack(side="left", padx=10)
+        tk.Label(controles, text="Mostrar:", font=("Segoe UI", 10), bg="#ecf0f1").pack(side="left", padx=(20, 4))
+        modo_var = tk.StringVar(controles, value=modos[0])
+        modo_combo = ttk.Combobox(controles, textvariable=modo_var, values=modos, state="readonly", width=14)
+        modo_combo.pack(side="left")
+        tk.Label(controles, text="Base:", font=("Segoe UI", 10), bg="#ecf0f1").pack(side="left", padx=(20, 4))
+        opciones_base = [f"ID {report_id}" for report_id in report_ids]
+        base_var = tk.StringVar(controles, value=opciones_base[0])
+        base_combo = ttk.Combobox(controles, textvariable=base_var, values=opciones_base, state="readonly", width=10)
+        base_combo.pack(side="left")
+
+        tabla = TablaVirtual(
+            self.comparison_results_frame,
+            n_filas=len(matriz.etiquetas),
+            n_columnas=len(report_ids) + len(columnas_stats),
+            celda=celda,
+            etiqueta_fila=lambda fila: matriz.etiquetas[fila],
+            encabezado=encabezado,
+            bg="#ecf0f1",
+        )
+        tabla.pack(fill="both", expand=True, padx=10, pady=10)
+        tabla.canvas.configure(height=420)
+
+        modo_combo.bind("<<ComboboxSelected>>", lambda event: recalcular())
+        base_combo.bind("<<ComboboxSelected>>", lambda event: recalcular())
+        recalcular()
 
-        # 3. Configurar la vista con Pestañas (Notebook)
+    def _show_comparison(self, data1, data2, report1_id, report2_id):
+        """Genera la vista de comparación con pestañas para dos reportes ya cargados."""
+        # 1. Configurar la vista con Pestañas (Notebook)
         
         tk.Label(self.comparison_results_frame, text="Indicadores Clave", 
                 font=("Segoe UI", 14, "bold"), bg="#ecf0f1").pack(pady=(10, 5))
@@ -485,7 +557,7 @@ class ModernFinancialUI:
         notebook.add(variable_comp_frame, text="Costo Variable ⚖️")
         notebook.add(pe_comp_frame, text="Punto de Equilibrio ⚖️")
 
-        # 4. Dibujar las tablas
+        # 2. Dibujar las tablas
         self._draw_comparison_table(tradicional_comp_frame, data1, data2, report1_id, report2_id, "tradicional")
         self._draw_comparison_table(variable_comp_frame, data1, data2, report1_id, report2_id, "variable")
         self._draw_comparison_table(pe_comp_frame, data1, data2, report1_id, report2_id, "punto_equilibrio")
@@ -620,12 +692,18 @@ class ModernFinancialUI:
                 
         return per_frame
 
-    def _generate_and_plot_random_data(self, scroll_frame):
+    def _generate_and_plot_random_data(self, scroll_frame, corrida=None):
         """
         Genera datos simulados, actualiza variables de Tkinter y plotea la serie de tiempo.
         Añade líneas de referencia para Mínimo, Máximo y Valor Final establecido.
+        La corrida queda lista para guardarla en el almacén en disco
+        (Almacen_Corridas) con el botón Guardar Corrida; con corrida se vuelve
+        a graficar una corrida guardada, sin simular ni tocar las entradas.
         """
-        plot_frame = tk.LabelFrame(scroll_frame, text="Gráfica de Simulación Dinámica (30 Días)",
+        titulo = "Gráfica de Simulación Dinámica (30 Días)"
+        if corrida is not None:
+            titulo = f"Corrida Guardada ({corrida.fecha:%Y-%m-%d %H:%M:%S}, {corrida.filas} Días)"
+        plot_frame = tk.LabelFrame(scroll_frame, text=titulo,
                                      font=("Segoe UI", 12, "bold"), bg="white")
         plot_frame.pack(fill="x", padx=20, pady=10)
 
@@ -635,7 +713,7 @@ class ModernFinancialUI:
         canvas = tk.Canvas(plot_frame, width=canvas_width, height=canvas_height, bg="#f7f7f7", bd=1, relief="solid")
         canvas.pack(padx=10, pady=10)
 
-        days = self.SIM_PARAMS["Dias"]
+        days = self.SIM_PARAMS["Dias"] if corrida is None else corrida.filas
         margin = 60 # Aumentado para etiquetas en el Eje Y
         x_scale = (canvas_width - 2 * margin) / (days - 1)
         
@@ -644,38 +722,51 @@ class ModernFinancialUI:
 
         try:
             # --- 1. Generación de Datos Usando el Motor de Simulación ---
-            avg_lunches = self.Entradas["Almuerzos vendidos diariamente"].get()
-            avg_price_kilo = self.insumos["Carne"]["Precio Kilo"].get()
-            
-            lunches_data, cost_data = generate_simulation_data(
-                days=days,
-                avg_lunches=avg_lunches,
-                sigma_lunches=self.SIM_PARAMS["Sigma Almuerzos"],
-                avg_cost=avg_price_kilo,
-                min_cost=self.SIM_PARAMS["Carne Min"],
-                max_cost=self.SIM_PARAMS["Carne Max"],
-                mode_cost=self.SIM_PARAMS["Carne Mode"]
-            )
-            
-            # --- 2. Obtener Valores de Referencia ---
-            min_lunches = min(lunches_data)
-            max_lunches = max(lunches_data)
+            if corrida is None:
+                avg_lunches = self.Entradas["Almuerzos vendidos diariamente"].get()
+                avg_price_kilo = self.insumos["Carne"]["Precio Kilo"].get()
+                semilla = self._resolve_seed()
+
+                lunches_data, cost_data = generate_simulation_data(
+                    days=days,
+                    avg_lunches=avg_lunches,
+                    sigma_lunches=self.SIM_PARAMS["Sigma Almuerzos"],
+                    avg_cost=avg_price_kilo,
+                    min_cost=self.SIM_PARAMS["Carne Min"],
+                    max_cost=self.SIM_PARAMS["Carne Max"],
+                    mode_cost=self.SIM_PARAMS["Carne Mode"],
+                    seed=semilla
+                )
+                self.semilla_actual = semilla
+                # Se guarda a pedido, con las entradas de antes de fijar los valores finales
+                self.corrida_diaria = (lunches_data, cost_data, semilla, self._collect_inputs(),
+                                       dict(self.SIM_PARAMS))
+            else:
+                # Columnas mapeadas en memoria desde el disco
+                lunches_data = corrida[COLUMNA_ALMUERZOS]
+                cost_data = corrida[COLUMNA_CARNE]
+                semilla = corrida.semilla
             
-            min_cost = min(cost_data)
-            max_cost = max(cost_data)
+            # --- 2. Obtener Valores de Referencia (una sola pasada por serie) ---
+            stats_lunches = AcumuladorEstadistico().actualizar(lunches_data)
+            stats_cost = AcumuladorEstadistico().actualizar(cost_data)
+
+            min_lunches, max_lunches = stats_lunches.minimo, stats_lunches.maximo
+            min_cost, max_cost = stats_cost.minimo, stats_cost.maximo
             
             # Valores finales actualizados por la simulación
             final_lunches = lunches_data[-1] 
             final_cost = cost_data[-1] 
 
-            self.Entradas["Almuerzos vendidos diariamente"].set(final_lunches)
-            self.insumos["Carne"]["Cantidad (g)"].set(final_cost)
+            if corrida is None:
+                self.Entradas["Almuerzos vendidos diariamente"].set(final_lunches)
+                self.insumos["Carne"]["Cantidad (g)"].set(final_cost)
 
             # --- 3. Preparación de Ejes y Escala para el plot ---
             
             # Escala Vertical (Eje Y): Incluir TODOS los datos (almuerzos y costos)
-            min_y_data = min(min(lunches_data), min(cost_data))
-            max_y_data = max(max(lunches_data), max(cost_data))
+            min_y_data = min(min_lunches, min_cost)
+            max_y_data = max(max_lunches, max_cost)
             
             # Ajuste de margen para la escala del eje Y (5% de buffer)
             min_y = min_y_data * 0.95
@@ -787,7 +878,7 @@ class ModernFinancialUI:
             
             tk.Label(left_stats, text=f"   Mínimo: {formato_float(min_lunches)}", bg="white").pack(anchor="w")
             tk.Label(left_stats, text=f"   Máximo: {formato_float(max_lunches)}", bg="white").pack(anchor="w")
-            tk.Label(left_stats, text=f"   Promedio: {formato_float(sum(lunches_data)/len(lunches_data))}", bg="white").pack(anchor="w")
+            tk.Label(left_stats, text=f"   Promedio: {formato_float(stats_lunches.media)}", bg="white").pack(anchor="w")
             tk.Label(left_stats, text=f"   Valor Final Establecido: {formato_float(final_lunches)}", bg="white", font=("Segoe UI", 10, "bold")).pack(anchor="w")
 
             # Columna Derecha: Costo de Carne
@@ -798,17 +889,101 @@ class ModernFinancialUI:
 
             tk.Label(right_stats, text=f"   Mínimo: {formato_float(min_cost)}", bg="white").pack(anchor="w")
             tk.Label(right_stats, text=f"   Máximo: {formato_float(max_cost)}", bg="white").pack(anchor="w")
-            tk.Label(right_stats, text=f"   Promedio: {formato_float(sum(cost_data)/len(cost_data))}", bg="white").pack(anchor="w")
+            tk.Label(right_stats, text=f"   Promedio: {formato_float(stats_cost.media)}", bg="white").pack(anchor="w")
             tk.Label(right_stats, text=f"   Valor Final Establecido: {formato_float(final_cost)}", bg="white", font=("Segoe UI", 10, "bold")).pack(anchor="w")
 
+            tk.Label(stats_frame, text=f"Semilla: {semilla}", fg="gray", bg="white", font=("Segoe UI", 9)).pack(side="right", anchor="s", padx=10)
+
         except Exception as e:
             canvas.create_text(canvas_width / 2, canvas_height / 2, text=f"Error al graficar: {e}", fill="red")
         
     def show_dashboard(self):
+        """
+        Tendencias de los reportes guardados. Los agregados por período y las
+        medias móviles se calculan en la base (get_report_trends); aquí sólo
+        se grafican.
+        """
         self.clear_main()
         tk.Label(self.main_frame, text="📊 Dashboard", font=("Segoe UI", 26, "bold"),
                   bg="#ecf0f1", fg="#2c3e50").pack(pady=20)
 
+        controls = tk.Frame(self.main_frame, bg="#ecf0f1")
+        controls.pack(pady=(0, 10))
+
+        granularidades = {"Diario": "day", "Semanal": "week", "Mensual": "month"}
+        self.dashboard_granularity = tk.StringVar(self.main_frame, value="Diario")
+        self.dashboard_window = tk.IntVar(self.main_frame, value=7)
+
+        tk.Label(controls, text="Agrupar:", font=("Segoe UI", 10), bg="#ecf0f1").pack(side="left", padx=(10, 4))
+        ttk.Combobox(controls, textvariable=self.dashboard_granularity, values=list(granularidades),
+                     state="readonly", width=10).pack(side="left")
+        tk.Label(controls, text="Media móvil (períodos):", font=("Segoe UI", 10), bg="#ecf0f1").pack(side="left", padx=(20, 4))
+        ttk.Spinbox(controls, from_=1, to=90, textvariable=self.dashboard_window, width=5).pack(side="left")
+        tk.Button(controls, text="Actualizar", bg="#2980b9", fg="white", font=("Segoe UI", 10, "bold"),
+                  command=lambda: self._load_dashboard(granularidades[self.dashboard_granularity.get()])
+                  ).pack(side="left", padx=15)
+
+        self.dashboard_frame = tk.Frame(self.main_frame, bg="#ecf0f1")
+        self.dashboard_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        self._load_dashboard("day")
+
+    def _load_dashboard(self, granularity):
+        """Pide las tendencias al bucle asíncrono y las grafica al llegar."""
+        for widget in self.dashboard_frame.winfo_children():
+            widget.destroy()
+        try:
+            window = self.dashboard_window.get()
+        except tk.TclError:
+            window = 7
+        tk.Label(self.dashboard_frame, text="⏳ Calculando tendencias...",
+                 font=("Segoe UI", 11), bg="#ecf0f1", fg="#7f8c8d").pack(pady=10)
+        self.async_loop.ejecutar(get_report_trends_async(granularity, max(window, 1)),
+                                 lambda trends: self._on_trends_loaded(trends, window))
+
+    def _on_trends_loaded(self, trends, window):
+        if not self.dashboard_frame.winfo_exists():
+            return
+
+        for widget in self.dashboard_frame.winfo_children():
+            widget.destroy()
+        if not trends:
+            mensaje = ("No se pudo consultar la base de datos." if trends is None
+                       else "Aún no hay reportes guardados para mostrar tendencias.")
+            tk.Label(self.dashboard_frame, text=mensaje, font=("Segoe UI", 12),
+                     bg="#ecf0f1", fg="#e74c3c").pack(pady=30)
+            return
+        self._draw_dashboard(trends, window)
+
+    def _draw_dashboard(self, trends, window):
+        """Grafica promedio, rango (mín-máx) y media móvil por período de cada métrica."""
+        periodos = [fila["Periodo"] for fila in trends]
+        total = sum(fila["Reportes"] for fila in trends)
+        tk.Label(self.dashboard_frame, text=f"{total} reportes en {len(trends)} períodos",
+                 font=("Segoe UI", 11), bg="#ecf0f1", fg="#2c3e50").pack()
+
+        metricas = (
+            ("UtilidadOperacional", "Utilidad Operacional"),
+            ("MargenContribucion", "Margen de Contribución"),
+            ("PuntoEquilibrioValor", "Punto de Equilibrio (Valor)"),
+        )
+        fig, axes = plt.subplots(len(metricas), 1, figsize=(9, 7), dpi=100, sharex=True)
+        for ax, (clave, titulo) in zip(axes, metricas):
+            ax.fill_between(periodos, [f[f"{clave}Min"] for f in trends], [f[f"{clave}Max"] for f in trends],
+                            alpha=0.2, label="Rango (mín - máx)")
+            ax.plot(periodos, [f[clave] for f in trends], "o-", markersize=3, linewidth=1, label="Promedio del período")
+            ax.plot(periodos, [f[f"{clave}Movil"] for f in trends], linewidth=2,
+                    label=f"Media móvil ({window} períodos)")
+            ax.set_title(titulo, fontsize=10)
+            ax.grid(True, linestyle=":")
+        axes[0].legend(fontsize=8, loc="upper left")
+        fig.autofmt_xdate()
+        fig.tight_layout()
+
+        canvas = FigureCanvasTkAgg(fig, master=self.dashboard_frame)
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+        canvas.draw()
+        plt.close(fig)
+
     def show_simulation_view(self):
         self.clear_main()
 
@@ -862,8 +1037,10 @@ class ModernFinancialUI:
         # Crear todas las secciones de entrada
         self._create_input_sections(scroll_frame, left_col, right_col)
 
-        # Generar y plotear la gráfica de simulación
-        self._generate_and_plot_random_data(scroll_frame)
+        # Generar y plotear la gráfica de simulación (en su propio contenedor, para poder reemplazarla)
+        self.simulation_plot_frame = tk.Frame(scroll_frame, bg="#ecf0f1")
+        self.simulation_plot_frame.pack(fill="x")
+        self._generate_and_plot_random_data(self.simulation_plot_frame)
 
         # ================================================================
         # BOTÓN GENERAR ESTADOS DE RESULTADOS
@@ -871,6 +1048,32 @@ class ModernFinancialUI:
         button_frame = tk.Frame(scroll_frame, bg="#ecf0f1")
         button_frame.pack(fill="x", padx=20, pady=20)
 
+        tk.Button(
+            button_frame,
+            text="Simulación Monte Carlo 🎲",
+            command=lambda: self._show_monte_carlo_summary(monte_carlo_frame),
+            font=("Segoe UI", 14, "bold"),
+            bg="#8e44ad", fg="white",
+            activebackground="#71368a", activeforeground="white",
+            bd=0, relief="raised", padx=20, pady=10,
+            cursor="hand2"
+        ).pack(side="left", padx=10)
+
+        tk.Label(button_frame, text="Tolerancia IC (±$, 0 = fijo)", bg="#ecf0f1").pack(side="left", padx=(10, 5))
+        tk.Entry(button_frame, textvariable=self.Tolerancia_MC, width=12, justify='right').pack(side="left")
+
+        tk.Label(button_frame, text="Muestreo", bg="#ecf0f1").pack(side="left", padx=(10, 5))
+        ttk.Combobox(button_frame, textvariable=self.Muestreo_MC, values=SAMPLING_METHODS,
+                     state="readonly", width=15).pack(side="left")
+
+        tk.Button(button_frame, text="Guardar Corrida 💾", command=self._save_daily_run,
+                  bg="#34495e", fg="white", bd=0, padx=10, pady=5,
+                  cursor="hand2").pack(side="left", padx=(10, 0))
+
+        tk.Button(button_frame, text="Abrir Corrida 📂", command=self._open_saved_run,
+                  bg="#34495e", fg="white", bd=0, padx=10, pady=5,
+                  cursor="hand2").pack(side="left", padx=(10, 0))
+
         tk.Button(
             button_frame,
             text="Generar Estados de Resultados 🧾",
@@ -882,10 +1085,154 @@ class ModernFinancialUI:
             cursor="hand2"
         ).pack(side="right", padx=10)
 
+        # Frame donde se mostrará el resumen Monte Carlo
+        monte_carlo_frame = tk.Frame(scroll_frame, bg="#ecf0f1")
+        monte_carlo_frame.pack(fill="x", padx=20, pady=(0, 20))
+
+    def _resolve_seed(self):
+        """Devuelve la semilla fijada en SIM_PARAMS o genera una nueva."""
+        semilla = self.SIM_PARAMS["Semilla"]
+        return new_seed() if semilla is None else semilla
+
+    def _save_run(self, tipo, almuerzos, carne, semilla, entradas=None, **parametros):
+        """
+        Guarda la corrida (muestras y rubros de los estados por fila) en el
+        almacén en disco, con las entradas dadas o las actuales. Un fallo al
+        guardar se avisa pero no interrumpe la simulación.
+        """
+        try:
+            if entradas is None:
+                entradas = self._collect_inputs()
+            return guardar_corrida(tipo, almuerzos, carne, entradas, semilla, {**self.SIM_PARAMS, **parametros})
+        except (tk.TclError, OSError, ValueError) as e:
+            messagebox.showwarning("Corrida no guardada", f"No se pudo guardar la corrida: {e}")
+            return None
+
+    def _save_daily_run(self):
+        """Guarda en el almacén la última simulación diaria graficada."""
+        if self.corrida_diaria is None:
+            messagebox.showinfo("Corrida", "No hay una simulación diaria para guardar.")
+            return
+        almuerzos, carne, semilla, entradas, parametros = self.corrida_diaria
+        ruta = self._save_run("diaria", almuerzos, carne, semilla, entradas, **parametros)
+        if ruta:
+            messagebox.showinfo("Corrida", f"Corrida guardada en {ruta}")
+
+    def _open_saved_run(self):
+        """Vuelve a graficar una corrida diaria guardada, leyendo sus columnas del disco sin simular."""
+        ruta = filedialog.askdirectory(title="Abrir corrida guardada", mustexist=True,
+                                       initialdir=CORRIDAS_PATH if os.path.isdir(CORRIDAS_PATH) else None)
+        if not ruta:
+            return
+        try:
+            corrida = abrir_corrida(ruta)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Corrida", f"No se pudo abrir la corrida: {e}")
+            return
+        if corrida.tipo != "diaria":
+            messagebox.showinfo("Corrida", "Sólo las corridas diarias se grafican aquí; las de Monte Carlo "
+                                           "se analizan con Almacen_Corridas.abrir_corrida.")
+            return
+        for widget in self.simulation_plot_frame.winfo_children():
+            widget.destroy()
+        self._generate_and_plot_random_data(self.simulation_plot_frame, corrida=corrida)
+
+    def _show_monte_carlo_summary(self, target_frame):
+        """
+        Corre la simulación Monte Carlo de los estados de resultados y muestra
+        la distribución (media, desviación y percentiles) de cada métrica.
+        """
+        for widget in target_frame.winfo_children():
+            widget.destroy()
+
+        replicaciones = self.SIM_PARAMS["Replicas Monte Carlo"]
+        semilla = self._resolve_seed()
+        precision = None
+        reduccion = None
+        muestreo = self.Muestreo_MC.get()
+        try:
+            tolerancia = self.Tolerancia_MC.get()
+            if tolerancia > 0:
+                # Modo adaptativo: agrega lotes hasta alcanzar la tolerancia pedida
+                resultado = simular_hasta_convergencia(
+                    self._collect_inputs(), self.SIM_PARAMS, tolerancia,
+                    objetivo=self.SIM_PARAMS["Objetivo Monte Carlo"],
+                    confianza=self.SIM_PARAMS["Confianza Monte Carlo"],
+                    max_replicaciones=replicaciones * 100,
+                    semilla=semilla,
+                    muestreo=muestreo,
+                )
+                resumen = resultado.resumen
+                replicaciones = resultado.replicaciones
+                precision = resultado
+            else:
+                # Se muestrea una sola vez: las mismas réplicas se resumen y se guardan
+                entradas = self._collect_inputs()
+                almuerzos, carne = simular_muestras(entradas, self.SIM_PARAMS, replicaciones,
+                                                    semilla=semilla, muestreo=muestreo)
+                muestras = evaluar_metricas(entradas.con_simulacion(almuerzos, carne))
+                resumen = {nombre: resumir_distribucion(valores) for nombre, valores in muestras.items()}
+                self._save_run("montecarlo", almuerzos, carne, semilla, entradas, Muestreo=muestreo)
+            if muestreo != "random":
+                reduccion = estimar_reduccion_varianza(
+                    self._collect_inputs(), self.SIM_PARAMS, muestreo,
+                    replicaciones=min(replicaciones, 10_000), repeticiones=20,
+                    metrica=self.SIM_PARAMS["Objetivo Monte Carlo"], semilla=semilla,
+                )
+        except (tk.TclError, ValueError) as e:
+            messagebox.showerror("Error de Simulación", f"No se pudo correr la simulación Monte Carlo: {e}")
+            return
+
+        table_frame = tk.LabelFrame(target_frame, text=f"Distribución Monte Carlo ({replicaciones:,} réplicas, semilla {semilla})",
+                                    font=("Segoe UI", 12, "bold"), bg="white", padx=10, pady=10)
+        table_frame.pack(fill="x")
+
+        if precision is not None:
+            estado = "alcanzada" if precision.convergio else "NO alcanzada (límite de réplicas)"
+            tk.Label(table_frame,
+                     text=f"{precision.objetivo}: {precision.estimacion:,.2f} ± {precision.semiamplitud:,.2f} "
+                          f"({precision.confianza:.0%} confianza) — tolerancia {estado}",
+                     bg="white", fg="#2c3e50" if precision.convergio else "#e74c3c",
+                     font=("Segoe UI", 10, "bold")).pack(anchor="w", pady=(0, 5))
+            tk.Label(table_frame,
+                     text="Las réplicas del modo adaptativo no se guardan en el almacén de corridas "
+                          "(use tolerancia 0 para guardar la corrida).",
+                     bg="white", fg="#7f8c8d", font=("Segoe UI", 9)).pack(anchor="w", pady=(0, 5))
+
+        if reduccion is not None:
+            tk.Label(table_frame,
+                     text=f"Muestreo {muestreo}: factor de reducción de varianza {reduccion.factor:,.1f}x "
+                          f"sobre {reduccion.metrica} ({reduccion.repeticiones} repeticiones de "
+                          f"{reduccion.replicaciones:,} réplicas)",
+                     bg="white", fg="#8e44ad", font=("Segoe UI", 10)).pack(anchor="w", pady=(0, 5))
+
+        columnas = list(next(iter(resumen.values())).keys())
+        tree = ttk.Treeview(table_frame, columns=columnas, show="tree headings", height=len(resumen))
+        tree.heading("#0", text="Métrica")
+        tree.column("#0", width=280, anchor="w")
+        for col in columnas:
+            tree.heading(col, text=col)
+            tree.column(col, width=110, anchor="e")
+
+        for metrica, estadisticas in resumen.items():
+            if metrica == PROB_BAJO_EQUILIBRIO:
+                valores = [f"{v*100:,.2f} %" for v in estadisticas.values()]
+            elif "Unidades" in metrica:
+                valores = [f"{v:,.0f}" for v in estadisticas.values()]
+            else:
+                valores = [f"${v:,.2f}" for v in estadisticas.values()]
+            tree.insert("", "end", text=metrica, values=valores)
+
+        tree.pack(fill="x")
+
     def show_comparison_view(self):
         """
         Limpia el área principal y muestra la interfaz para seleccionar dos reportes
         de estados financieros guardados para su comparación.
+
+        La lista se carga por páginas: al acercarse al final del desplazamiento
+        se pide la siguiente página a la base, con los filtros de fecha y texto
+        aplicados en SQL.
         """
         # 1. Limpiar la vista y configurar el título
         self.clear_main()
@@ -893,57 +1240,169 @@ class ModernFinancialUI:
         tk.Label(self.main_frame, text="⚖️ Comparar Estados Financieros", 
                 font=("Segoe UI", 24, "bold"), bg="#ecf0f1", fg="#2c3e50").pack(pady=(20, 8))
 
-        # 2. Obtener y Validar Reportes
-        reports = get_available_reports()
-        
-        if not reports or len(reports) < 2:
-            tk.Label(self.main_frame, 
-                    text="Se necesitan al menos dos simulaciones guardadas para comparar.",
-                    font=("Segoe UI", 14), fg="#e74c3c").pack(pady=40)
-            tk.Label(self.main_frame, 
-                    text=f"Reportes encontrados: {len(reports)}",
-                    font=("Segoe UI", 10)).pack()
-            return
-
-        # Formatear la lista para mostrarla en el menú (ID - Fecha)
-        # r[0] es ReporteID, r[1] es FechaGeneracion
-        report_options = [f"ID {r[0]} - {r[1].strftime('%Y-%m-%d %H:%M')}" for r in reports]
-        
-        # 3. Controles de Selección
+        # 2. Filtros (se aplican en la consulta, no en memoria)
+        filter_frame = tk.Frame(self.main_frame, bg="#ecf0f1")
+        filter_frame.pack(pady=(10, 0))
+
+        self.report_filter_from = tk.StringVar(self.main_frame)
+        self.report_filter_to = tk.StringVar(self.main_frame)
+        self.report_filter_text = tk.StringVar(self.main_frame)
+
+        for col, (texto, var, ancho) in enumerate((
+            ("Desde (AAAA-MM-DD):", self.report_filter_from, 12),
+            ("Hasta (AAAA-MM-DD):", self.report_filter_to, 12),
+            ("Buscar:", self.report_filter_text, 16),
+        )):
+            tk.Label(filter_frame, text=texto, font=("Segoe UI", 10), bg="#ecf0f1").grid(row=0, column=2 * col, padx=(10, 4))
+            entry = ttk.Entry(filter_frame, textvariable=var, width=ancho)
+            entry.grid(row=0, column=2 * col + 1)
+            entry.bind("<Return>", lambda event: self._reload_report_list())
+        tk.Button(filter_frame, text="Filtrar", command=self._reload_report_list,
+                  bg="#2980b9", fg="white", font=("Segoe UI", 10, "bold")).grid(row=0, column=6, padx=10)
+
+        # 3. Lista de reportes (selección de dos)
         selection_frame = tk.Frame(self.main_frame, bg="#ecf0f1", padx=15, pady=15)
-        selection_frame.pack(pady=20)
-        
+        selection_frame.pack(pady=10)
+
+        self._report_rows = []
+        self._report_list_done = True
+        self._report_page_pending = False
+        list_frame = tk.Frame(selection_frame, bg="#ecf0f1")
+        list_frame.grid(row=0, column=0, rowspan=3, padx=10)
+        self.report_scrollbar = tk.Scrollbar(list_frame, orient="vertical")
+        self.report_listbox = tk.Listbox(list_frame, selectmode="multiple", height=10, width=34,
+                                         font=("Segoe UI", 10), exportselection=False,
+                                         yscrollcommand=self._on_report_list_scroll)
+        self.report_scrollbar.config(command=self.report_listbox.yview)
+        self.report_listbox.pack(side="left", fill="y")
+        self.report_scrollbar.pack(side="right", fill="y")
+        self.report_listbox.bind("<<ListboxSelect>>", self._on_report_selected)
+
         self.report1_var = tk.StringVar(self.main_frame)
         self.report2_var = tk.StringVar(self.main_frame)
-        
-        # Establecer valores iniciales
-        self.report1_var.set(report_options[0])
-        if len(report_options) > 1:
-            self.report2_var.set(report_options[1])
-        else:
-            # En caso de solo dos reportes, igual se seleccionan los dos para inicializar
-            self.report2_var.set(report_options[0]) 
-
-        # Selector 1
-        tk.Label(selection_frame, text="Reporte Base (1):", font=("Segoe UI", 11), bg="#ecf0f1").grid(row=0, column=0, padx=10, pady=5, sticky="w")
-        ttk.Combobox(selection_frame, textvariable=self.report1_var, values=report_options, state="readonly", width=30).grid(row=0, column=1, padx=10, pady=5)
-
-        # Selector 2
-        tk.Label(selection_frame, text="Reporte a Comparar (2):", font=("Segoe UI", 11), bg="#ecf0f1").grid(row=1, column=0, padx=10, pady=5, sticky="w")
-        ttk.Combobox(selection_frame, textvariable=self.report2_var, values=report_options, state="readonly", width=30).grid(row=1, column=1, padx=10, pady=5)
-
-        # Botón para ejecutar la comparación
+
+        tk.Label(selection_frame, text="Reporte Base (1):", font=("Segoe UI", 11), bg="#ecf0f1").grid(row=0, column=1, padx=10, pady=5, sticky="w")
+        tk.Label(selection_frame, textvariable=self.report1_var, font=("Segoe UI", 11, "bold"), bg="#ecf0f1", width=28, anchor="w").grid(row=0, column=2, padx=10, pady=5)
+        tk.Label(selection_frame, text="Reporte a Comparar (2):", font=("Segoe UI", 11), bg="#ecf0f1").grid(row=1, column=1, padx=10, pady=5, sticky="w")
+        tk.Label(selection_frame, textvariable=self.report2_var, font=("Segoe UI", 11, "bold"), bg="#ecf0f1", width=28, anchor="w").grid(row=1, column=2, padx=10, pady=5)
+
+        self.report_list_status = tk.Label(selection_frame, text="", font=("Segoe UI", 9), bg="#ecf0f1", fg="#7f8c8d")
+        self.report_list_status.grid(row=2, column=1, columnspan=2, padx=10, sticky="w")
+
+        # Botones para ejecutar la comparación (par o todos los marcados)
+        self.report_selection_count = tk.StringVar(self.main_frame)
+        buttons_frame = tk.Frame(self.main_frame, bg="#ecf0f1")
+        buttons_frame.pack(pady=15)
         tk.Button(
-            self.main_frame, 
+            buttons_frame, 
             text="Generar Comparación", 
             command=self._execute_comparison_logic, # Llama a la lógica de extracción
             bg="#27ae60", fg="white", font=("Segoe UI", 12, "bold"), relief="raised", padx=10, pady=5
-        ).pack(pady=15)
+        ).pack(side="left", padx=5)
+        tk.Button(
+            buttons_frame,
+            text="Comparar Marcados",
+            command=self._execute_multi_comparison,
+            bg="#8e44ad", fg="white", font=("Segoe UI", 12, "bold"), relief="raised", padx=10, pady=5
+        ).pack(side="left", padx=5)
+        tk.Label(buttons_frame, textvariable=self.report_selection_count, font=("Segoe UI", 9),
+                 bg="#ecf0f1", fg="#7f8c8d").pack(side="left", padx=10)
 
         # Frame donde se mostrará el resultado
         self.comparison_results_frame = tk.Frame(self.main_frame, bg="#ecf0f1")
         self.comparison_results_frame.pack(fill="both", expand=True, padx=20, pady=10)
 
+        self._reload_report_list()
+
+    def _reload_report_list(self):
+        """Vacía la lista y carga la primera página con los filtros actuales."""
+        try:
+            desde = self.report_filter_from.get().strip()
+            hasta = self.report_filter_to.get().strip()
+            self._report_filters = {
+                "date_from": datetime.datetime.strptime(desde, "%Y-%m-%d") if desde else None,
+                # "Hasta" incluye todo ese día
+                "date_to": datetime.datetime.strptime(hasta, "%Y-%m-%d") + datetime.timedelta(days=1) if hasta else None,
+                "text": self.report_filter_text.get().strip() or None,
+            }
+        except ValueError:
+            messagebox.showerror("Filtro inválido", "Las fechas deben tener el formato AAAA-MM-DD.")
+            return
+
+        self._report_rows = []
+        self._report_list_done = False
+        self._report_page_pending = False
+        # Las páginas que lleguen de una lista anterior (otros filtros) se descartan
+        self._report_list_request += 1
+        self.report_listbox.delete(0, "end")
+        self.report1_var.set("")
+        self.report2_var.set("")
+        self.report_list_status.config(text="⏳ Cargando reportes...", fg="#7f8c8d")
+        self._load_more_reports()
+
+    def _load_more_reports(self):
+        """Pide al bucle asíncrono la siguiente página de reportes, si la hay."""
+        if self._report_list_done or self._report_page_pending:
+            return
+        self._report_page_pending = True
+        request = self._report_list_request
+        after = tuple(self._report_rows[-1]) if self._report_rows else None
+        self.async_loop.ejecutar(
+            get_reports_page_async(REPORT_PAGE_SIZE, after=after, **self._report_filters),
+            lambda rows: self._on_reports_page(rows, request),
+        )
+
+    def _on_reports_page(self, rows, request):
+        """Agrega a la lista la página recibida."""
+        if request != self._report_list_request or not self.report_listbox.winfo_exists():
+            return
+        self._report_page_pending = False
+        primera = not self._report_rows
+        if rows is None:
+            self._report_list_done = True
+            self.report_list_status.config(text="No se pudo consultar la base de datos.", fg="#e74c3c")
+            return
+
+        self._report_rows.extend(rows)
+        # r[0] es ReporteID, r[1] es FechaGeneracion
+        for r in rows:
+            self.report_listbox.insert("end", f"ID {r[0]} - {r[1].strftime('%Y-%m-%d %H:%M')}")
+        if len(rows) < REPORT_PAGE_SIZE:
+            self._report_list_done = True
+        mas = "" if self._report_list_done else " (desplácese para cargar más)"
+        self.report_list_status.config(text=f"{len(self._report_rows)} reportes cargados{mas}", fg="#7f8c8d")
+        if primera:
+            self._on_first_reports_page()
+
+    def _on_first_reports_page(self):
+        """Con la primera página, preselecciona los dos reportes más recientes."""
+        if len(self._report_rows) >= 2:
+            self.report_listbox.selection_set(0, 1)
+            self._on_report_selected()
+        elif self._report_list_done:
+            self.report_list_status.config(
+                text=f"Se necesitan al menos dos simulaciones guardadas para comparar. "
+                     f"Reportes encontrados: {len(self._report_rows)}",
+                fg="#e74c3c",
+            )
+
+    def _on_report_list_scroll(self, first, last):
+        """Actualiza la barra y, cerca del final de la lista, carga otra página."""
+        self.report_scrollbar.set(first, last)
+        if float(last) >= 0.9:
+            self._load_more_reports()
+
+    def _on_report_selected(self, event=None):
+        """
+        Los dos primeros elementos marcados son el Reporte 1 y el Reporte 2;
+        todos los marcados entran en la comparación múltiple.
+        """
+        seleccion = self.report_listbox.curselection()
+        self.report_selection_count.set(f"{len(seleccion)} reportes marcados")
+        self.report1_var.set(self.report_listbox.get(seleccion[0]) if len(seleccion) > 0 else "")
+        self.report2_var.set(self.report_listbox.get(seleccion[1]) if len(seleccion) > 1 else "")
+        self._prefetch_neighbour_reports()
+
     def _show_traditional_statement_in_frame(self, target_frame):
         # Lógica de la tabla mantenida
 
@@ -1294,30 +1753,7 @@ class ModernFinancialUI:
         tree.column("DIF", anchor="e", width=150)
 
         # 2. Definición de Conceptos
-        conceptos_maestro = {
-            "tradicional": [
-                ("Ventas Totales", "Ventas", "currency"), ("Materia Prima", "MateriaPrima", "currency"),
-                ("Mano de Obra", "ManoDeObra", "currency"), ("CIF (Costo Indirecto)", "CIF", "currency"),
-                ("Total Costo Ventas", "TotalCostoVentas", "currency"), ("Utilidad Bruta", "UtilidadBruta", "currency"),
-                ("Salario Administración", "SalarioAdministracion", "currency"), 
-                ("Total Gastos ADM/Vtas", "TotalGastosAdmonVentas", "currency"),
-                ("Utilidad Operacional", "UtilidadOperacional", "currency"),
-            ],
-            "variable": [
-                ("Ventas Totales", "Ventas", "currency"), ("Costo Var. Materia Prima", "CostoVariableMateriaPrima", "currency"),
-                ("Total Costos Variables", "TotalCostosVariables", "currency"), ("Margen de Contribución", "MargenContribucion", "currency"),
-                ("Costo Fijo Mano Obra", "CostoFijoManoObra", "currency"), ("Sueldo Fijo Administración", "SueldoFijoAdministracion", "currency"),
-                ("Total Costos Fijos", "TotalCostosFijos", "currency"), ("Utilidad Operacional", "UtilidadOperacional", "currency"),
-                ("Rentabilidad sobre Ventas", "RentabilidadVentas", "percent"),
-            ],
-            "punto_equilibrio": [
-                ("PE en Valor ($)", "PuntoEquilibrioValor", "currency"), ("PE en Unidades (Mes)", "PuntoEquilibrioMesUnidades", "number"),
-                ("PE en Unidades (Día)", "PuntoEquilibrioDiaUnidades", "number"), ("Margen de Seguridad (%)", "MargenSeguridadPorc", "percent"),
-                ("Ventas Objetivo (Valor)", "VentasUtilidadObjetivoValor", "currency"),
-            ],
-        }
-
-        conceptos_a_dibujar = conceptos_maestro.get(table_key, [])
+        conceptos_a_dibujar = CONCEPTOS_COMPARACION.get(table_key, [])
         
         # Función auxiliar para formato
         def format_value(value, fmt):
@@ -1382,37 +1818,16 @@ class ModernFinancialUI:
         """
         Extrae solo los datos de Punto de Equilibrio del diccionario completo.
         """
-        pe_keys = [
-            "Punto de Equilibrio (Mes - Unidades)",
-            "Punto de Equilibrio (Día - Unidades)",
-            "Punto de Equilibrio (Valor)",
-            "Margen de Seguridad (%)",
-            "Margen de Seguridad (Valor)",
-            "Ventas para Utilidad Objetivo (Unidades)",
-            "Ventas para Utilidad Objetivo (Valor)",
-        ]
-        
         # Filtrar solo las claves de PE
-        datos_pe = {k: all_data[k] for k in pe_keys if k in all_data}
+        datos_pe = {k: all_data[k] for k in CLAVES_PUNTO_EQUILIBRIO if k in all_data}
         return datos_pe 
 
     def _extract_variable_statement_data(self, all_data):
         """
         Extrae solo los datos del Estado Variable (excluyendo PE).
         """
-        # Identificar claves de PE para excluirlas
-        pe_keys = [
-            "Punto de Equilibrio (Mes - Unidades)",
-            "Punto de Equilibrio (Día - Unidades)",
-            "Punto de Equilibrio (Valor)",
-            "Margen de Seguridad (%)",
-            "Margen de Seguridad (Valor)",
-            "Ventas para Utilidad Objetivo (Unidades)",
-            "Ventas para Utilidad Objetivo (Valor)",
-        ]
-        
         # Crear un nuevo diccionario excluyendo las claves de PE
-        datos_variable = {k: v for k, v in all_data.items() if k not in pe_keys}
+        datos_variable = {k: v for k, v in all_data.items() if k not in CLAVES_PUNTO_EQUILIBRIO}
         return datos_variable
 
     def _exportar_pdf(self):
@@ -0,0 +1,302 @@
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+
+from Calculos_Financieros import calcular_personal, calcular_estado_tradicional, calcular_estado_variable
+from Estadisticas_Streaming import PERCENTILES, AcumuladorEstadistico
+from Generacion_Variables import sample_lunches_and_cost
+
+# --- Métricas reportadas por la simulación Monte Carlo ---
+
+METRICAS = (
+    "Utilidad Operacional (Tradicional)",
+    "Utilidad Operacional (Variable)",
+    "Margen de Contribución",
+    "Punto de Equilibrio (Mes - Unidades)",
+    "Punto de Equilibrio (Valor)",
+)
+
+# Objetivo adicional para el modo adaptativo: fracción de réplicas cuyas ventas
+# quedan por debajo del Punto de Equilibrio (Utilidad Operacional < 0)
+PROB_BAJO_EQUILIBRIO = "Probabilidad bajo Punto de Equilibrio"
+
+# Parámetros de simulación por defecto (los mismos de SIM_PARAMS en la interfaz)
+SIM_PARAMS_DEFECTO = {
+    "Sigma Almuerzos": 15,
+    "Carne Min": 750,
+    "Carne Max": 1150,
+    "Carne Mode": 900,
+}
+
+
+def evaluar_metricas(entradas):
+    """
+    Evalúa en bloque los estados de resultados para cada réplica.
+
+    Args:
+        entradas (EntradasFinancieras): Entradas con arreglos en los valores simulados.
+
+    Returns:
+        dict: {nombre_metrica: np.ndarray} con una entrada por réplica.
+    """
+    personal = calcular_personal(entradas)
+    tradicional = calcular_estado_tradicional(entradas, personal)
+    variable = calcular_estado_variable(entradas, personal)
+    return {
+        "Utilidad Operacional (Tradicional)": tradicional["Utilidad Operacional"][0],
+        "Utilidad Operacional (Variable)": variable["Utilidad Operacional"][0],
+        "Margen de Contribución": variable["Margen de Contribución"][0],
+        "Punto de Equilibrio (Mes - Unidades)": variable["Punto de Equilibrio (Mes - Unidades)"][0],
+        "Punto de Equilibrio (Valor)": variable["Punto de Equilibrio (Valor)"][0],
+    }
+
+
+def resumir_distribucion(valores, percentiles=PERCENTILES):
+    """
+    Resume una muestra en media, desviación estándar y percentiles.
+
+    Returns:
+        dict: {"Media", "Desv. Estándar", "P5", ...}
+    """
+    resumen = {
+        "Media": float(np.mean(valores)),
+        "Desv. Estándar": float(np.std(valores, ddof=1)) if valores.size > 1 else 0.0,
+    }
+    for p, valor in zip(percentiles, np.percentile(valores, percentiles)):
+        resumen[f"P{p}"] = float(valor)
+    return resumen
+
+
+def simular_muestras(entradas, sim_params, replicaciones, rng=None, semilla=None, muestreo="random"):
+    """
+    Muestrea los valores simulados de cada réplica (los que simular_metricas
+    pasa por los estados de resultados).
+
+    Returns:
+        tuple: (almuerzos: np.ndarray, carne: np.ndarray) de largo replicaciones.
+    """
+    return sample_lunches_and_cost(
+        replicaciones,
+        avg_lunches=entradas.almuerzos_diarios,
+        sigma_lunches=sim_params["Sigma Almuerzos"],
+        avg_cost=entradas.insumos["Carne"][0],
+        min_cost=sim_params["Carne Min"],
+        max_cost=sim_params["Carne Max"],
+        mode_cost=sim_params["Carne Mode"],
+        method=muestreo,
+        seed=semilla,
+        rng=rng,
+    )
+
+
+def simular_metricas(entradas, sim_params, replicaciones, rng=None, semilla=None, muestreo="random"):
+    """
+    Igual que simular_estados, pero devuelve las muestras crudas por réplica.
+
+    Returns:
+        dict: {nombre_metrica: np.ndarray}
+    """
+    almuerzos, carne = simular_muestras(entradas, sim_params, replicaciones, rng=rng, semilla=semilla,
+                                        muestreo=muestreo)
+    return evaluar_metricas(entradas.con_simulacion(almuerzos, carne))
+
+
+def simular_estados(entradas, sim_params, replicaciones, rng=None, semilla=None, muestreo="random"):
+    """
+    Corre una simulación Monte Carlo completa de los estados de resultados.
+
+    Cada réplica toma el valor final de una trayectoria simulada (almuerzos
+    diarios y cantidad de carne), igual que la interfaz, y lo pasa por el
+    estado tradicional, el estado variable y el punto de equilibrio.
+    Como sólo interesa el último día y los días son independientes, cada
+    réplica se simula con un único día.
+
+    Args:
+        entradas (EntradasFinancieras): Valores de entrada del modelo.
+        sim_params (dict): Parámetros de simulación (SIM_PARAMS).
+        replicaciones (int): Número de réplicas.
+        rng (np.random.Generator, optional): Generador a usar.
+        semilla (int, optional): Semilla para reproducir la corrida si no se pasa rng.
+        muestreo (str): Estrategia de muestreo (ver Generacion_Variables.SAMPLING_METHODS).
+
+    Returns:
+        dict: {nombre_metrica: resumen} con el resumen de cada métrica.
+    """
+    muestras = simular_metricas(entradas, sim_params, replicaciones, rng=rng, semilla=semilla, muestreo=muestreo)
+    return {nombre: resumir_distribucion(valores) for nombre, valores in muestras.items()}
+
+
+# --- Modo Adaptativo (parada por convergencia) ---
+
+@dataclass(slots=True)
+class ResultadoAdaptativo:
+    """
+    Resultado de una simulación con parada por convergencia.
+
+    Attributes:
+        objetivo (str): Métrica cuya media se estimó.
+        estimacion (float): Media estimada del objetivo.
+        semiamplitud (float): Semiamplitud alcanzada del intervalo de confianza.
+        confianza (float): Nivel de confianza del intervalo (p. ej. 0.95).
+        replicaciones (int): Réplicas simuladas hasta detenerse.
+        convergio (bool): False si se alcanzó max_replicaciones sin lograr la tolerancia.
+        resumen (dict): {métrica: resumen} de todas las métricas con las réplicas usadas.
+    """
+    objetivo: str
+    estimacion: float
+    semiamplitud: float
+    confianza: float
+    replicaciones: int
+    convergio: bool
+    resumen: dict
+
+
+def semiamplitud_wilson(proporcion, n, z):
+    """
+    Semiamplitud del intervalo de Wilson para una proporción. A diferencia
+    del intervalo normal (z·√(p(1-p)/n)), no se anula cuando todas las
+    réplicas dan 0 o todas dan 1.
+
+    Args:
+        proporcion (float): Fracción observada de eventos.
+        n (int): Réplicas observadas.
+        z (float): Cuantil normal del nivel de confianza.
+    """
+    z2 = z * z
+    return z / (1 + z2 / n) * math.sqrt(proporcion * (1 - proporcion) / n + z2 / (4 * n * n))
+
+
+def simular_hasta_convergencia(entradas, sim_params, tolerancia, objetivo="Utilidad Operacional (Variable)",
+                               confianza=0.95, tamano_lote=10_000, max_replicaciones=10_000_000,
+                               rng=None, semilla=None, muestreo="random", lotes_minimos=10):
+    """
+    Agrega lotes de réplicas hasta que la semiamplitud del intervalo de
+    confianza de la media del objetivo sea menor o igual a la tolerancia.
+
+    Args:
+        entradas (EntradasFinancieras): Valores de entrada del modelo.
+        sim_params (dict): Parámetros de simulación (SIM_PARAMS).
+        tolerancia (float): Semiamplitud máxima aceptada, en las unidades del objetivo
+            (pesos para utilidades, unidades para el PE, fracción para la probabilidad).
+        objetivo (str): Una de METRICAS o PROB_BAJO_EQUILIBRIO.
+        confianza (float): Nivel de confianza del intervalo.
+        tamano_lote (int): Réplicas por lote.
+        max_replicaciones (int): Límite de réplicas aunque no se alcance la tolerancia.
+        rng (np.random.Generator, optional): Generador a usar.
+        semilla (int, optional): Semilla para reproducir la corrida si no se pasa rng.
+        muestreo (str): Estrategia de muestreo. Con "random" el intervalo se calcula
+            con la varianza entre réplicas; con las demás, las réplicas de un lote no
+            son independientes y se usa la varianza entre medias de lotes (cada lote
+            es una aleatorización independiente), exigiendo al menos lotes_minimos lotes.
+        lotes_minimos (int): Lotes mínimos antes de evaluar la parada si muestreo != "random".
+
+    Con objetivo=PROB_BAJO_EQUILIBRIO la semiamplitud es además al menos la
+    del intervalo de Wilson sobre todas las réplicas, para que un lote sin
+    eventos (o sólo con eventos) no dé un intervalo de ancho cero.
+
+    Returns:
+        ResultadoAdaptativo
+    """
+    if objetivo not in METRICAS and objetivo != PROB_BAJO_EQUILIBRIO:
+        raise ValueError(f"Objetivo desconocido: {objetivo}")
+    if tolerancia <= 0:
+        raise ValueError("La tolerancia debe ser positiva.")
+    if rng is None:
+        rng = np.random.default_rng(semilla)
+
+    z = NormalDist().inv_cdf(0.5 + confianza / 2)
+    acumuladores = {nombre: AcumuladorEstadistico() for nombre in METRICAS}
+    acumuladores[PROB_BAJO_EQUILIBRIO] = AcumuladorEstadistico()
+    acumulador_objetivo = acumuladores[objetivo]
+
+    medias_lotes = AcumuladorEstadistico()
+
+    semiamplitud = math.inf
+    while acumulador_objetivo.n < max_replicaciones:
+        lote = min(tamano_lote, max_replicaciones - acumulador_objetivo.n)
+        muestras = simular_metricas(entradas, sim_params, lote, rng=rng, muestreo=muestreo)
+        muestras[PROB_BAJO_EQUILIBRIO] = (muestras["Utilidad Operacional (Variable)"] < 0).astype(float)
+        for nombre, valores in muestras.items():
+            acumuladores[nombre].actualizar(valores)
+
+        if muestreo == "random":
+            if acumulador_objetivo.n < 2:
+                continue
+            semiamplitud = z * acumulador_objetivo.desviacion / math.sqrt(acumulador_objetivo.n)
+        else:
+            medias_lotes.actualizar(muestras[objetivo].mean())
+            if medias_lotes.n < max(2, lotes_minimos):
+                continue
+            semiamplitud = z * medias_lotes.desviacion / math.sqrt(medias_lotes.n)
+
+        if objetivo == PROB_BAJO_EQUILIBRIO:
+            semiamplitud = max(semiamplitud, semiamplitud_wilson(acumulador_objetivo.media, acumulador_objetivo.n, z))
+
+        if semiamplitud <= tolerancia:
+            break
+
+    return ResultadoAdaptativo(
+        objetivo=objetivo,
+        estimacion=acumulador_objetivo.media,
+        semiamplitud=semiamplitud,
+        confianza=confianza,
+        replicaciones=acumulador_objetivo.n,
+        convergio=semiamplitud <= tolerancia,
+        resumen={nombre: acumulador.resumen() for nombre, acumulador in acumuladores.items()},
+    )
+
+
+# --- Reducción de Varianza ---
+
+@dataclass(slots=True)
+class ReduccionVarianza:
+    """
+    Comparación de la varianza del estimador de la media entre el muestreo
+    pseudoaleatorio y otra estrategia, con el mismo número de réplicas.
+
+    Attributes:
+        factor (float): Var(pseudoaleatorio) / Var(estrategia). Un factor de 5 significa
+            que la estrategia logra la misma precisión con 5 veces menos réplicas.
+    """
+    muestreo: str
+    metrica: str
+    replicaciones: int
+    repeticiones: int
+    varianza_aleatorio: float
+    varianza_muestreo: float
+
+    @property
+    def factor(self):
+        return self.varianza_aleatorio / self.varianza_muestreo if self.varianza_muestreo else math.inf
+
+
+def estimar_reduccion_varianza(entradas, sim_params, muestreo, replicaciones=10_000, repeticiones=30,
+                               metrica="Utilidad Operacional (Variable)", rng=None, semilla=None):
+    """
+    Estima el factor de reducción de varianza de una estrategia de muestreo.
+
+    Repite `repeticiones` veces la estimación de la media de la métrica con
+    cada estrategia y compara la varianza entre repeticiones.
+
+    Returns:
+        ReduccionVarianza
+    """
+    if rng is None:
+        rng = np.random.default_rng(semilla)
+
+    medias = {"random": AcumuladorEstadistico(), muestreo: AcumuladorEstadistico()}
+    for _ in range(repeticiones):
+        for metodo, acumulador in medias.items():
+            muestras = simular_metricas(entradas, sim_params, replicaciones, rng=rng, muestreo=metodo)
+            acumulador.actualizar(muestras[metrica].mean())
+
+    return ReduccionVarianza(
+        muestreo=muestreo,
+        metrica=metrica,
+        replicaciones=replicaciones,
+        repeticiones=repeticiones,
+        varianza_aleatorio=medias["random"].varianza,
+        varianza_muestreo=medias[muestreo].varianza,
+    )
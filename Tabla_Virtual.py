@@ -0,0 +1,148 @@
+"""
+Tabla virtualizada sobre un Canvas de Tkinter.
+
+Sólo se dibujan las celdas visibles: al desplazarse o cambiar el tamaño se
+borra el Canvas y se vuelven a pedir las celdas del rango visible, de modo
+que el costo de dibujar no depende de cuántas filas o columnas tenga la
+tabla. La columna de etiquetas y la fila de encabezados quedan fijas.
+"""
+import tkinter as tk
+
+
+class TablaVirtual(tk.Frame):
+    """
+    Tabla de filas × columnas cuyas celdas se piden bajo demanda.
+
+    Args:
+        parent: Widget contenedor.
+        n_filas (int): Número de filas de datos.
+        n_columnas (int): Número de columnas de datos.
+        celda (callable): celda(fila, columna) -> (texto, color_fondo).
+        etiqueta_fila (callable): etiqueta_fila(fila) -> str (columna fija de la izquierda).
+        encabezado (callable): encabezado(columna) -> str (fila fija de arriba).
+        ancho_columna (int): Ancho de cada columna de datos, en píxeles.
+        ancho_etiquetas (int): Ancho de la columna de etiquetas.
+        alto_fila (int): Alto de cada fila.
+    """
+
+    def __init__(self, parent, n_filas, n_columnas, celda, etiqueta_fila, encabezado,
+                 ancho_columna=130, ancho_etiquetas=260, alto_fila=24, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.n_filas = n_filas
+        self.n_columnas = n_columnas
+        self.celda = celda
+        self.etiqueta_fila = etiqueta_fila
+        self.encabezado = encabezado
+        self.ancho_columna = ancho_columna
+        self.ancho_etiquetas = ancho_etiquetas
+        self.alto_fila = alto_fila
+
+        # Primera fila y columna visibles
+        self.fila_inicial = 0
+        self.columna_inicial = 0
+
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0)
+        self.barra_v = tk.Scrollbar(self, orient="vertical", command=self._desplazar_filas)
+        self.barra_h = tk.Scrollbar(self, orient="horizontal", command=self._desplazar_columnas)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.barra_v.grid(row=0, column=1, sticky="ns")
+        self.barra_h.grid(row=1, column=0, sticky="ew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.canvas.bind("<Configure>", lambda event: self.refrescar())
+        self.canvas.bind("<MouseWheel>", self._rueda)
+        self.canvas.bind("<Shift-MouseWheel>", self._rueda_horizontal)
+        self.canvas.bind("<Button-4>", lambda event: self._mover(filas=-3))
+        self.canvas.bind("<Button-5>", lambda event: self._mover(filas=3))
+
+    # --- Geometría ---
+
+    def _visibles(self):
+        """(filas, columnas) que caben en el Canvas sin contar los encabezados."""
+        alto = max(self.canvas.winfo_height() - self.alto_fila, 0)
+        ancho = max(self.canvas.winfo_width() - self.ancho_etiquetas, 0)
+        return max(alto // self.alto_fila, 1), max(ancho // self.ancho_columna, 1)
+
+    def _limitar(self):
+        filas, columnas = self._visibles()
+        self.fila_inicial = max(0, min(self.fila_inicial, self.n_filas - filas))
+        self.columna_inicial = max(0, min(self.columna_inicial, self.n_columnas - columnas))
+
+    # --- Desplazamiento ---
+
+    def _mover(self, filas=0, columnas=0):
+        self.fila_inicial += filas
+        self.columna_inicial += columnas
+        self.refrescar()
+
+    def _rueda(self, event):
+        self._mover(filas=-3 if event.delta > 0 else 3)
+
+    def _rueda_horizontal(self, event):
+        self._mover(columnas=-1 if event.delta > 0 else 1)
+
+    @staticmethod
+    def _nueva_posicion(actual, total, visibles, accion, *args):
+        """Traduce los comandos de una Scrollbar ("moveto"/"scroll") a un índice."""
+        if accion == "moveto":
+            return int(round(float(args[0]) * total))
+        cantidad, unidad = int(args[0]), args[1]
+        return actual + cantidad * (visibles if unidad == "pages" else 1)
+
+    def _desplazar_filas(self, accion, *args):
+        filas, _ = self._visibles()
+        self.fila_inicial = self._nueva_posicion(self.fila_inicial, self.n_filas, filas, accion, *args)
+        self.refrescar()
+
+    def _desplazar_columnas(self, accion, *args):
+        _, columnas = self._visibles()
+        self.columna_inicial = self._nueva_posicion(self.columna_inicial, self.n_columnas, columnas, accion, *args)
+        self.refrescar()
+
+    # --- Dibujo ---
+
+    def actualizar(self, n_filas=None, n_columnas=None):
+        """Cambia las dimensiones (p. ej. tras cambiar el modo de la tabla) y redibuja."""
+        if n_filas is not None:
+            self.n_filas = n_filas
+        if n_columnas is not None:
+            self.n_columnas = n_columnas
+        self.refrescar()
+
+    def refrescar(self):
+        """Redibuja sólo el rango visible de filas y columnas."""
+        self._limitar()
+        filas, columnas = self._visibles()
+        fila_final = min(self.fila_inicial + filas, self.n_filas)
+        columna_final = min(self.columna_inicial + columnas, self.n_columnas)
+
+        c = self.canvas
+        c.delete("all")
+        alto, ancho, x0 = self.alto_fila, self.ancho_columna, self.ancho_etiquetas
+
+        # Encabezados de columna
+        c.create_rectangle(0, 0, x0, alto, fill="#2c3e50", outline="#bdc3c7")
+        for k, columna in enumerate(range(self.columna_inicial, columna_final)):
+            x = x0 + k * ancho
+            c.create_rectangle(x, 0, x + ancho, alto, fill="#2c3e50", outline="#bdc3c7")
+            c.create_text(x + ancho / 2, alto / 2, text=self.encabezado(columna),
+                          fill="white", font=("Segoe UI", 9, "bold"))
+
+        for r, fila in enumerate(range(self.fila_inicial, fila_final)):
+            y = alto + r * alto
+            c.create_rectangle(0, y, x0, y + alto, fill="#ecf0f1", outline="#bdc3c7")
+            c.create_text(6, y + alto / 2, text=self.etiqueta_fila(fila), anchor="w",
+                          font=("Segoe UI", 9))
+            for k, columna in enumerate(range(self.columna_inicial, columna_final)):
+                x = x0 + k * ancho
+                texto, fondo = self.celda(fila, columna)
+                c.create_rectangle(x, y, x + ancho, y + alto, fill=fondo, outline="#bdc3c7")
+                c.create_text(x + ancho - 6, y + alto / 2, text=texto, anchor="e",
+                              font=("Segoe UI", 9))
+
+        # Las barras muestran la fracción visible del total
+        if self.n_filas:
+            self.barra_v.set(self.fila_inicial / self.n_filas, fila_final / self.n_filas)
+        if self.n_columnas:
+            self.barra_h.set(self.columna_inicial / self.n_columnas, columna_final / self.n_columnas)
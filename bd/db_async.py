@@ -0,0 +1,325 @@
+"""
+Capa de acceso a datos para asyncio.
+
+Con el backend PostgreSQL las consultas van por conexiones asíncronas de
+psycopg2 (async_=1): el bucle de eventos espera el socket de cada conexión
+con add_reader/add_writer, así que muchas lecturas y guardados pueden estar
+en curso a la vez desde un solo hilo, sin un hilo por llamada. Con otros
+backends (p. ej. SQLite) las funciones bloqueantes de bd.db_queries corren en
+un único hilo auxiliar compartido.
+
+El bucle debe ser un SelectorEventLoop (en Windows el bucle por defecto,
+Proactor, no soporta add_reader); ver Bucle_Asyncio.BucleAsyncioTk.
+
+Uso:
+    reportes = await get_reports_data_async([3, 7, 9])
+    ids = await asyncio.gather(*(save_report_async(t, v, p) for t, v, p in corridas))
+"""
+import asyncio
+import atexit
+import contextlib
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+from psycopg2 import extensions
+
+from . import db_queries
+from .db_connection import DB_CONFIG, POOL_MAX
+from .db_schema import REPORT_PAGE_SIZE
+
+
+async def _wait(conn):
+    """Espera, sin bloquear el bucle, a que la conexión asíncrona termine la operación en curso."""
+    loop = asyncio.get_running_loop()
+    while True:
+        estado = conn.poll()
+        if estado == extensions.POLL_OK:
+            return
+        listo = loop.create_future()
+
+        def despertar():
+            if not listo.done():
+                listo.set_result(None)
+
+        fd = conn.fileno()
+        if estado == extensions.POLL_READ:
+            loop.add_reader(fd, despertar)
+            quitar = loop.remove_reader
+        elif estado == extensions.POLL_WRITE:
+            loop.add_writer(fd, despertar)
+            quitar = loop.remove_writer
+        else:
+            raise psycopg2.OperationalError(f"Estado de conexión inesperado: {estado}")
+        try:
+            await listo
+        finally:
+            quitar(fd)
+
+
+class AsyncConnectionPool:
+    """
+    Pool de conexiones asíncronas de psycopg2 para un bucle de asyncio.
+
+    Las conexiones asíncronas trabajan en autocommit: cada sentencia es su
+    propia transacción (por eso el guardado usa la sentencia única de
+    SAVE_REPORT_QUERY). Cuando las maxconn conexiones están prestadas, las
+    corrutinas siguientes esperan su turno en vez de abrir más.
+
+    Args:
+        maxconn (int): Máximo de conexiones simultáneas.
+        **config: Sobrescribe valores de DB_CONFIG (host, database, user, password...).
+    """
+
+    def __init__(self, maxconn=POOL_MAX, **config):
+        self.maxconn = maxconn
+        self.config = {**DB_CONFIG, **config}
+        self.closed = False
+        self._idle = []
+        self._slots = asyncio.Semaphore(maxconn)
+
+    async def _connect(self):
+        conn = psycopg2.connect(**self.config, async_=1)
+        try:
+            await _wait(conn)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        """
+        Presta una conexión del pool y la devuelve al salir del bloque.
+
+        Una conexión que queda a mitad de una consulta (p. ej. porque se
+        canceló la tarea) o caída se cierra en lugar de devolverse.
+        """
+        if self.closed:
+            raise RuntimeError("El pool asíncrono está cerrado.")
+        async with self._slots:
+            conn = None
+            while self._idle and conn is None:
+                conn = self._idle.pop()
+                if conn.closed:
+                    conn = None
+            if conn is None:
+                conn = await self._connect()
+            try:
+                yield conn
+            finally:
+                if self.closed or conn.closed or conn.isexecuting():
+                    conn.close()
+                else:
+                    self._idle.append(conn)
+
+    async def execute(self, sql, params=None):
+        """
+        Ejecuta una sentencia en una conexión del pool.
+
+        Returns:
+            list[tuple] | None: Las filas, o None si la sentencia no devuelve filas.
+        """
+        async with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                await _wait(conn)
+                return cursor.fetchall() if cursor.description is not None else None
+            finally:
+                cursor.close()
+
+    def close(self):
+        """Cierra las conexiones libres; las prestadas se cierran al devolverse."""
+        self.closed = True
+        for conn in self._idle:
+            conn.close()
+        self._idle.clear()
+
+
+# Un pool por bucle de eventos (el semáforo del pool pertenece a un bucle)
+_pools = weakref.WeakKeyDictionary()
+
+_executor = None
+_executor_lock = threading.Lock()
+_schema_ready = False
+
+
+def get_async_pool():
+    """Devuelve el pool asíncrono del bucle en curso, creándolo la primera vez."""
+    loop = asyncio.get_running_loop()
+    conn_pool = _pools.get(loop)
+    if conn_pool is None or conn_pool.closed:
+        conn_pool = _pools[loop] = AsyncConnectionPool()
+    return conn_pool
+
+
+def close_async_pools():
+    """Cierra los pools asíncronos de todos los bucles. Se registra con atexit."""
+    for conn_pool in list(_pools.values()):
+        conn_pool.close()
+    _pools.clear()
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+
+
+atexit.register(close_async_pools)
+
+
+def _native_backend():
+    """El módulo PostgreSQL si es el backend activo; None si las consultas deben ir al hilo auxiliar."""
+    backend = db_queries.get_backend()
+    if getattr(backend, "__name__", None) == db_queries.BACKENDS["postgres"]:
+        return backend
+    return None
+
+
+async def _in_thread(func, *args, **kwargs):
+    """Corre una función bloqueante de bd.db_queries en el hilo auxiliar compartido."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bd-async")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+async def _ensure_schema(backend):
+    """
+    Migra el esquema la primera vez (con una conexión normal, en el hilo
+    auxiliar: las migraciones usan transacciones y las conexiones asíncronas no).
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    if not await _in_thread(backend.ensure_schema):
+        raise psycopg2.OperationalError("El esquema de la base no está al día.")
+    _schema_ready = True
+
+
+# ------------------------------
+# Guardado
+# ------------------------------
+async def save_report_async(tradicional, variable, punto_equilibrio, semilla=None, content_hash=None):
+    """
+    Versión asíncrona de bd.db_queries.save_report (mismos argumentos).
+
+    Returns:
+        int | None: El ReporteID compartido, o None si no se pudo guardar.
+    """
+    backend = _native_backend()
+    if backend is None:
+        return await _in_thread(db_queries.save_report, tradicional, variable, punto_equilibrio,
+                                semilla=semilla, content_hash=content_hash)
+    try:
+        await _ensure_schema(backend)
+        conn_pool = get_async_pool()
+        filas = await conn_pool.execute(backend.SAVE_REPORT_QUERY, backend.save_report_params(
+            tradicional, variable, punto_equilibrio, semilla, content_hash))
+        if filas:
+            return filas[0][0]
+        # Otra conexión guardó la misma huella al mismo tiempo; ya está confirmada
+        filas = await conn_pool.execute(
+            "SELECT reporteid FROM Reporte WHERE HashEntradas = %s", (content_hash,))
+        return filas[0][0] if filas else None
+    except (psycopg2.Error, OSError) as e:
+        print(f"Error al guardar el reporte: {e}")
+        return None
+
+
+async def save_reports_async(reports):
+    """
+    Guarda varios reportes a la vez, uno por conexión del pool (hasta
+    POOL_MAX en paralelo). Cada reporte es atómico por sí mismo, pero, a
+    diferencia de save_reports, el lote no es una sola transacción.
+
+    Args:
+        reports (list[tuple]): (tradicional, variable, punto_equilibrio, semilla, content_hash) por reporte.
+
+    Returns:
+        list[int | None]: Los ReporteID en el orden recibido (None en los que no se pudieron guardar).
+    """
+    if _native_backend() is None:
+        report_ids = await _in_thread(db_queries.save_reports, reports)
+        return report_ids if report_ids is not None else [None] * len(reports)
+
+    # Una sola tarea por huella: las repeticiones del lote reciben el mismo ReporteID
+    tareas = {}
+    pendientes = []
+    for tradicional, variable, punto_equilibrio, semilla, content_hash in reports:
+        clave = content_hash if content_hash is not None else object()
+        if clave not in tareas:
+            tareas[clave] = asyncio.ensure_future(save_report_async(
+                tradicional, variable, punto_equilibrio, semilla=semilla, content_hash=content_hash))
+        pendientes.append(tareas[clave])
+    await asyncio.gather(*tareas.values())
+    return [tarea.result() for tarea in pendientes]
+
+
+# ------------------------------
+# Lectura
+# ------------------------------
+async def get_available_reports_async():
+    """Versión asíncrona de bd.db_queries.get_available_reports."""
+    backend = _native_backend()
+    if backend is None:
+        return await _in_thread(db_queries.get_available_reports)
+    try:
+        await _ensure_schema(backend)
+        return await get_async_pool().execute(
+            "SELECT reporteid, FechaGeneracion FROM Reporte ORDER BY FechaGeneracion DESC")
+    except (psycopg2.Error, OSError) as e:
+        print(f"Error al recuperar la lista de reportes: {e}")
+        return []
+
+
+async def get_reports_page_async(limit=REPORT_PAGE_SIZE, after=None, date_from=None, date_to=None, text=None):
+    """Versión asíncrona de bd.db_queries.get_reports_page (mismos argumentos y resultado)."""
+    backend = _native_backend()
+    if backend is None:
+        return await _in_thread(db_queries.get_reports_page, limit, after=after,
+                                date_from=date_from, date_to=date_to, text=text)
+    try:
+        await _ensure_schema(backend)
+        return await get_async_pool().execute(*backend.reports_page_query(limit, after, date_from, date_to, text))
+    except (psycopg2.Error, OSError) as e:
+        print(f"Error al recuperar la página de reportes: {e}")
+        return None
+
+
+async def get_reports_data_async(report_ids):
+    """
+    Versión asíncrona de bd.db_queries.get_reports_data; comparte con ella el
+    LRU de reportes, así que lo leído por una sirve a la otra.
+    """
+    resultado, faltantes = db_queries.cached_reports(report_ids)
+    if not faltantes:
+        return resultado
+
+    backend = _native_backend()
+    if backend is None:
+        leidos = await _in_thread(db_queries.get_backend().fetch_reports, faltantes)
+    else:
+        try:
+            await _ensure_schema(backend)
+            leidos = backend.reports_from_rows(
+                await get_async_pool().execute(backend.JOINED_REPORT_QUERY, (faltantes,)))
+        except (psycopg2.Error, OSError) as e:
+            print(f"Error al obtener los reportes {faltantes}: {e}")
+            leidos = None
+    if leidos is None:
+        return None
+    resultado.update(db_queries.cache_reports(leidos))
+    return resultado
+
+
+async def get_report_trends_async(granularity="day", window=7, date_from=None, date_to=None):
+    """
+    Versión asíncrona de bd.db_queries.get_report_trends. Es una sola consulta
+    de agregación por llamada, así que corre en el hilo auxiliar con cualquier backend.
+    """
+    return await _in_thread(db_queries.get_report_trends, granularity, window,
+                            date_from=date_from, date_to=date_to)
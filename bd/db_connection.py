@@ -1,17 +1,178 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import extensions, pool
+
+# Parámetros de conexión a PostgreSQL
+DB_CONFIG = {
+    "host": "localhost",  # O la IP donde se ejecute Postgres
+    "database": "Estados_Financieros",
+    "user": "postgres",  # Tu usuario de Postgres
+    "password": "admin123",  # Tu contraseña
+}
+
+# Tamaño del pool de conexiones del proceso
+POOL_MIN = 1
+POOL_MAX = 5
+
+# Segundos que una conexión puede estar inactiva antes de verificarla con SELECT 1
+HEALTH_CHECK_INTERVAL = 30
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = None          # Semáforo: bloquea en vez de fallar cuando el pool está lleno
+_last_used = {}        # id(conexión) -> instante de la última devolución al pool
+
 
 def get_connection():
     """
     Retorna una conexión a la base de datos PostgreSQL.
     """
     try:
-        conn = psycopg2.connect(
-            host="localhost", # O la IP donde se ejecute Postgres
-            database="Estados_Financieros",
-            user="postgres",  # Tu usuario de Postgres
-            password="admin123" # Tu contraseña
-        )
+        conn = psycopg2.connect(**DB_CONFIG)
         return conn
     except psycopg2.Error as e:
         print("Error al conectar a PostgreSQL:", e)
-        return None
\ No newline at end of file
+        return None
+
+
+def init_pool(minconn=POOL_MIN, maxconn=POOL_MAX, replace=False, **config):
+    """
+    Crea el pool de conexiones del proceso. Si ya hay uno abierto se devuelve
+    ese, salvo con replace=True (p. ej. para cambiar los parámetros de conexión).
+
+    Args:
+        minconn (int): Conexiones que se abren de entrada y se mantienen abiertas.
+        maxconn (int): Máximo de conexiones simultáneas; los hilos adicionales esperan.
+        replace (bool): Cierra el pool actual y crea uno nuevo.
+        **config: Sobrescribe valores de DB_CONFIG (host, database, user, password...).
+
+    Returns:
+        ThreadedConnectionPool | None: El pool, o None si no se pudo conectar.
+    """
+    with _pool_lock:
+        return _init_pool_locked(minconn, maxconn, replace, config)
+
+
+def _init_pool_locked(minconn=POOL_MIN, maxconn=POOL_MAX, replace=False, config=None):
+    global _pool, _slots
+    if _pool is not None and not _pool.closed and not replace:
+        return _pool
+    _close_pool_locked()
+    try:
+        _pool = pool.ThreadedConnectionPool(minconn, maxconn, **{**DB_CONFIG, **(config or {})})
+    except psycopg2.Error as e:
+        print("Error al crear el pool de conexiones de PostgreSQL:", e)
+        _pool = None
+        return None
+    _slots = threading.BoundedSemaphore(maxconn)
+    return _pool
+
+
+def get_pool():
+    """Devuelve el pool del proceso, creándolo la primera vez que se necesita."""
+    conn_pool = _pool
+    if conn_pool is not None:
+        return conn_pool
+    # Doble verificación: dos hilos que lleguen a la vez crean un solo pool
+    with _pool_lock:
+        return _init_pool_locked()
+
+
+def close_pool():
+    """Cierra todas las conexiones del pool. Se registra con atexit."""
+    with _pool_lock:
+        _close_pool_locked()
+
+
+def _close_pool_locked():
+    global _pool
+    if _pool is not None and not _pool.closed:
+        _pool.closeall()
+    _pool = None
+    _last_used.clear()
+
+
+atexit.register(close_pool)
+
+
+def _is_broken(conn):
+    return conn.closed or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN
+
+
+def _is_healthy(conn):
+    """Verifica la conexión; sólo hace un SELECT 1 si lleva un rato inactiva."""
+    if _is_broken(conn):
+        return False
+    if time.monotonic() - _last_used.get(id(conn), 0.0) < HEALTH_CHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Presta una conexión del pool y la devuelve al salir del bloque.
+
+    Las conexiones caídas se descartan y se reemplazan. Si el bloque termina
+    con una transacción abierta (p. ej. por una excepción) se hace rollback
+    antes de devolverla. Produce None si no hay conexión con la base, igual
+    que get_connection().
+
+    Uso:
+        with pooled_connection() as conn:
+            if conn:
+                ...
+    """
+    conn_pool = get_pool()
+    if conn_pool is None:
+        yield None
+        return
+
+    slots = _slots
+    slots.acquire()
+    conn = None
+    try:
+        try:
+            conn = conn_pool.getconn()
+            while not _is_healthy(conn):
+                _last_used.pop(id(conn), None)
+                conn_pool.putconn(conn, close=True)
+                conn = None
+                conn = conn_pool.getconn()
+        except psycopg2.Error as e:
+            print("Error al conectar a PostgreSQL:", e)
+            if conn is not None:
+                conn_pool.putconn(conn, close=True)
+            conn = None
+
+        if conn is None:
+            yield None
+            return
+
+        try:
+            yield conn
+        finally:
+            broken = _is_broken(conn)
+            if not broken and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            if broken:
+                _last_used.pop(id(conn), None)
+            else:
+                _last_used[id(conn)] = time.monotonic()
+            if not conn_pool.closed:
+                conn_pool.putconn(conn, close=broken)
+    finally:
+        slots.release()
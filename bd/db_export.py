@@ -0,0 +1,153 @@
+"""
+Escritura incremental del historial de reportes a CSV, JSON Lines o Parquet.
+
+Los escritores reciben el historial por bloques (ver
+stream_report_history en cada backend) y escriben cada bloque en cuanto
+llega, así que exportar millones de filas usa la misma memoria que exportar
+unas pocas. Parquet necesita pyarrow (opcional: pip install pyarrow).
+
+Uso:
+    python -m bd.db_export historial.parquet
+    python -m bd.db_export historial.csv --desde 2026-01-01 --fetch-size 50000
+"""
+import csv
+import datetime
+import json
+import os
+
+from .db_schema import EXPORT_FETCH_SIZE, history_columns
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+# Extensión del archivo -> formato (para elegirlo a partir de la ruta)
+EXPORT_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+
+
+class _CsvWriter:
+    """CSV con encabezado; los valores faltantes quedan vacíos."""
+
+    def __init__(self, path, columnas):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file, lineterminator="\n")
+        self.writer.writerow(columnas)
+
+    def write(self, filas):
+        self.writer.writerows(filas)
+
+    def close(self):
+        self.file.close()
+
+
+def _json_default(valor):
+    if isinstance(valor, (datetime.datetime, datetime.date)):
+        return valor.isoformat()
+    return float(valor)
+
+
+class _JsonLinesWriter:
+    """Un objeto JSON por línea, con las fechas en ISO 8601."""
+
+    def __init__(self, path, columnas):
+        self.file = open(path, "w", encoding="utf-8")
+        self.columnas = columnas
+
+    def write(self, filas):
+        self.file.writelines(
+            json.dumps(dict(zip(self.columnas, fila)), default=_json_default, ensure_ascii=False) + "\n"
+            for fila in filas
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    """Parquet con un grupo de filas por bloque recibido."""
+
+    def __init__(self, path, columnas):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("La exportación a Parquet necesita pyarrow (pip install pyarrow).") from e
+        self.pa = pa
+        tipos = {"reporteid": pa.int64(), "FechaGeneracion": pa.timestamp("us"), "Semilla": pa.int64()}
+        self.schema = pa.schema([(columna, tipos.get(columna, pa.float64())) for columna in columnas])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, filas):
+        # Las filas se trasponen a columnas sólo para el bloque actual
+        columnas = list(zip(*filas))
+        arreglos = [self.pa.array(valores, type=campo.type) for valores, campo in zip(columnas, self.schema)]
+        self.writer.write_table(self.pa.Table.from_arrays(arreglos, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+_WRITERS = {"csv": _CsvWriter, "jsonl": _JsonLinesWriter, "parquet": _ParquetWriter}
+
+
+def format_from_path(path):
+    """Formato de exportación según la extensión de la ruta, o None si no es conocida."""
+    return EXPORT_EXTENSIONS.get(os.path.splitext(str(path))[1].lower())
+
+
+def write_history(stream, path, fmt="csv"):
+    """
+    Escribe el historial en path a medida que stream lo entrega. Se escribe
+    primero a un archivo temporal junto al destino, que sólo reemplaza a path
+    si el recorrido terminó bien.
+
+    Args:
+        stream (callable): stream(write_batch) -> filas recorridas o None si
+            falló; p. ej. un stream_report_history con sus argumentos ya fijados.
+        path (str | os.PathLike): Archivo de destino.
+        fmt (str): "csv", "jsonl" o "parquet".
+
+    Returns:
+        int | None: Filas escritas, o None si falló la consulta.
+
+    Raises:
+        ValueError: Si el formato no es conocido.
+        ImportError: Si se pide Parquet sin pyarrow instalado.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Formato de exportación desconocido: {fmt} (opciones: {', '.join(EXPORT_FORMATS)})")
+    temporal = f"{os.fspath(path)}.parcial"
+    writer = _WRITERS[fmt](temporal, history_columns())
+    try:
+        total = stream(writer.write)
+    except BaseException:
+        writer.close()
+        os.remove(temporal)
+        raise
+    writer.close()
+    if total is None:
+        os.remove(temporal)
+        return None
+    os.replace(temporal, path)
+    return total
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from . import db_queries
+
+    parser = argparse.ArgumentParser(description="Exporta el historial completo de reportes.")
+    parser.add_argument("destino", help="Archivo de salida (.csv, .jsonl o .parquet)")
+    parser.add_argument("--formato", choices=EXPORT_FORMATS, help="Por defecto, según la extensión del destino")
+    parser.add_argument("--fetch-size", type=int, default=EXPORT_FETCH_SIZE, help="Filas por viaje a la base")
+    parser.add_argument("--desde", type=datetime.datetime.fromisoformat, help="Fecha inicial (inclusive)")
+    parser.add_argument("--hasta", type=datetime.datetime.fromisoformat, help="Fecha final (exclusive)")
+    args = parser.parse_args()
+
+    formato = args.formato or format_from_path(args.destino)
+    if formato is None:
+        parser.error("No se reconoce la extensión del destino; indique --formato.")
+    filas = db_queries.export_report_history(args.destino, fmt=formato, fetch_size=args.fetch_size,
+                                             date_from=args.desde, date_to=args.hasta)
+    if filas is None:
+        raise SystemExit("No se pudo exportar el historial.")
+    print(f"{filas} reportes exportados a {args.destino}.")
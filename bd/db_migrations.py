@@ -0,0 +1,414 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada backend tiene su lista de migraciones, numeradas en orden. La tabla
+SchemaVersion registra las que ya se aplicaron; migrate_postgres() y
+migrate_sqlite() aplican las que falten, cada una en su propia transacción,
+de modo que una base a medio migrar queda siempre en una versión conocida.
+
+Esquema final (versión 6 en PostgreSQL, 2 en SQLite):
+    Reporte                 Encabezado de cada reporte: ReporteID, fecha, semilla
+                            y huella de las entradas (única).
+    EstadoTradicional,      Un registro por reporte con llave foránea a Reporte.
+    EstadoVariable,         En PostgreSQL están particionadas por rango mensual de
+    PuntoEquilibrio         FechaGeneracion (ver CrearParticionesMensuales).
+    ResultadoReplica        Muestras por réplica de Monte Carlo, con llave foránea a Reporte.
+
+Para migrar a mano la base del backend activo:
+    python -m bd.db_migrations
+"""
+import datetime
+import sqlite3
+from dataclasses import dataclass
+
+from .db_schema import (
+    TRADICIONAL_COLUMNS, VARIABLE_COLUMNS, PUNTO_EQUILIBRIO_COLUMNS, REPORT_COLUMNS, REPLICA_COLUMNS,
+)
+
+# Llave del candado de sesión que serializa las migraciones entre procesos (PostgreSQL)
+MIGRATION_LOCK_ID = 7_310_025
+
+# Tablas particionadas por mes y meses hacia adelante que se dejan creados
+PARTITIONED_TABLES = tuple(tabla for tabla, _ in REPORT_COLUMNS.values())
+PARTITION_MONTHS_AHEAD = 3
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    """
+    Attributes:
+        version (int): Número de versión que deja aplicada.
+        description (str): Qué cambia, para la tabla SchemaVersion.
+        sql (str): Sentencias a ejecutar (pueden ser varias).
+    """
+    version: int
+    description: str
+    sql: str
+
+
+def _columnas(columnas, tipo):
+    return ",\n        ".join(f"{columna} {tipo}" for columna in columnas)
+
+
+def _lista(columnas):
+    return ", ".join(columnas)
+
+
+# ------------------------------
+# PostgreSQL
+# ------------------------------
+def _pg_estado(tabla, columnas):
+    """Tabla de un estado como la crea la aplicación original (ReporteID propio)."""
+    return f"""
+    CREATE TABLE IF NOT EXISTS {tabla} (
+        reporteid SERIAL PRIMARY KEY,
+        FechaGeneracion TIMESTAMP NOT NULL,
+        {_columnas(columnas, "NUMERIC")},
+        Semilla BIGINT
+    );"""
+
+
+def _pg_particionar(tabla, columnas):
+    """Reemplaza la tabla de un estado por una particionada por mes con llave foránea a Reporte."""
+    return f"""
+    ALTER TABLE {tabla} RENAME TO {tabla}_anterior;
+    CREATE TABLE {tabla} (
+        reporteid INTEGER NOT NULL REFERENCES Reporte (reporteid) ON DELETE CASCADE,
+        FechaGeneracion TIMESTAMP NOT NULL,
+        {_columnas(columnas, "NUMERIC")},
+        Semilla BIGINT,
+        PRIMARY KEY (reporteid, FechaGeneracion)
+    ) PARTITION BY RANGE (FechaGeneracion);
+    CREATE TABLE {tabla}_default PARTITION OF {tabla} DEFAULT;
+    CREATE INDEX ix_{tabla.lower()}_fecha ON {tabla} (FechaGeneracion);
+    SELECT CrearParticionesMensuales('{tabla}', COALESCE(MIN(FechaGeneracion), LOCALTIMESTAMP), LOCALTIMESTAMP) FROM {tabla}_anterior;
+    INSERT INTO {tabla} (reporteid, FechaGeneracion, {_lista(columnas)}, Semilla)
+    SELECT reporteid, FechaGeneracion, {_lista(columnas)}, Semilla FROM {tabla}_anterior;
+    DROP TABLE {tabla}_anterior;"""
+
+
+# Crea las particiones mensuales que falten entre dos fechas. Cada partición se
+# arma aparte, recibe las filas de ese mes que hayan caído en la partición por
+# defecto y recién entonces se adjunta, así nunca choca con la DEFAULT.
+CREATE_PARTITION_FUNCTION = """
+    CREATE OR REPLACE FUNCTION CrearParticionesMensuales(tabla TEXT, desde TIMESTAMP, hasta TIMESTAMP)
+    RETURNS INTEGER AS $$
+    DECLARE
+        mes TIMESTAMP := date_trunc('month', desde);
+        particion TEXT;
+        creadas INTEGER := 0;
+    BEGIN
+        tabla := lower(tabla);
+        WHILE mes <= hasta LOOP
+            particion := tabla || '_' || to_char(mes, 'YYYYMM');
+            IF to_regclass(particion) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS)', particion, tabla);
+                EXECUTE format(
+                    'WITH movidas AS (DELETE FROM %I WHERE FechaGeneracion >= %L AND FechaGeneracion < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM movidas',
+                    tabla || '_default', mes, mes + interval '1 month', particion);
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                               tabla, particion, mes, mes + interval '1 month');
+                creadas := creadas + 1;
+            END IF;
+            mes := mes + interval '1 month';
+        END LOOP;
+        RETURN creadas;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+POSTGRES_MIGRATIONS = (
+    Migration(1, "Tablas de los tres estados", "".join([
+        _pg_estado("EstadoTradicional", TRADICIONAL_COLUMNS),
+        _pg_estado("EstadoVariable", VARIABLE_COLUMNS),
+        _pg_estado("PuntoEquilibrio", PUNTO_EQUILIBRIO_COLUMNS),
+    ])),
+    # Las tablas creadas por la versión original de la aplicación no tienen Semilla
+    Migration(2, "Semilla de la simulación en los tres estados", "".join(
+        f"""
+    ALTER TABLE {tabla} ADD COLUMN IF NOT EXISTS Semilla BIGINT;"""
+        for tabla, _ in REPORT_COLUMNS.values()
+    )),
+    Migration(3, "Huella de contenido de las entradas", """
+    ALTER TABLE EstadoTradicional ADD COLUMN IF NOT EXISTS HashEntradas CHAR(64);
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_estadotradicional_hashentradas
+        ON EstadoTradicional (HashEntradas);"""),
+    Migration(4, "Índice de la lista de reportes", """
+    CREATE INDEX IF NOT EXISTS ix_estadotradicional_fecha_reporteid
+        ON EstadoTradicional (FechaGeneracion DESC, reporteid DESC);"""),
+    Migration(5, "Resultados por réplica", f"""
+    CREATE TABLE IF NOT EXISTS ResultadoReplica (
+        reporteid INTEGER NOT NULL,
+        Replica INTEGER NOT NULL,
+        {_columnas(REPLICA_COLUMNS.values(), "DOUBLE PRECISION NOT NULL")},
+        PRIMARY KEY (reporteid, Replica)
+    );"""),
+    Migration(6, "Encabezado Reporte, llaves foráneas y particiones mensuales", f"""
+    CREATE TABLE Reporte (
+        reporteid SERIAL PRIMARY KEY,
+        FechaGeneracion TIMESTAMP NOT NULL,
+        Semilla BIGINT,
+        HashEntradas CHAR(64) UNIQUE
+    );
+    CREATE INDEX ix_reporte_fecha_reporteid ON Reporte (FechaGeneracion DESC, reporteid DESC);
+
+    INSERT INTO Reporte (reporteid, FechaGeneracion, Semilla, HashEntradas)
+    SELECT reporteid, FechaGeneracion, Semilla, HashEntradas FROM EstadoTradicional;
+    -- Filas de las otras tablas sin estado tradicional (guardadas con las funciones insert_* sueltas)
+    INSERT INTO Reporte (reporteid, FechaGeneracion, Semilla)
+    SELECT reporteid, MIN(FechaGeneracion), MIN(Semilla)
+    FROM (
+        SELECT reporteid, FechaGeneracion, Semilla FROM EstadoVariable
+        UNION ALL
+        SELECT reporteid, FechaGeneracion, Semilla FROM PuntoEquilibrio
+    ) estados
+    WHERE NOT EXISTS (SELECT 1 FROM Reporte r WHERE r.reporteid = estados.reporteid)
+    GROUP BY reporteid;
+    SELECT setval(pg_get_serial_sequence('Reporte', 'reporteid'), COALESCE(MAX(reporteid), 0) + 1, false)
+    FROM Reporte;
+    {CREATE_PARTITION_FUNCTION}
+    {_pg_particionar("EstadoTradicional", TRADICIONAL_COLUMNS)}
+    {_pg_particionar("EstadoVariable", VARIABLE_COLUMNS)}
+    {_pg_particionar("PuntoEquilibrio", PUNTO_EQUILIBRIO_COLUMNS)}
+
+    -- NOT VALID: se exige para las réplicas nuevas sin revisar (ni borrar) las huérfanas antiguas
+    ALTER TABLE ResultadoReplica ADD CONSTRAINT fk_resultadoreplica_reporte
+        FOREIGN KEY (reporteid) REFERENCES Reporte (reporteid) ON DELETE CASCADE NOT VALID;"""),
+)
+
+CREATE_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS SchemaVersion (
+        version INTEGER PRIMARY KEY,
+        descripcion TEXT NOT NULL,
+        aplicada TIMESTAMP NOT NULL
+    )
+"""
+
+
+def migrate_postgres(conn, migrations=POSTGRES_MIGRATIONS):
+    """
+    Aplica las migraciones pendientes sobre una conexión psycopg2.
+
+    Un candado de sesión (pg_advisory_lock) evita que dos procesos migren a
+    la vez; el segundo espera y encuentra las migraciones ya registradas.
+
+    Returns:
+        list[int]: Versiones aplicadas en esta llamada.
+
+    Raises:
+        psycopg2.Error: Si falla una migración (esa migración se revierte completa).
+    """
+    aplicadas = []
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        try:
+            cursor.execute(CREATE_VERSION_TABLE)
+            conn.commit()
+            cursor.execute("SELECT version FROM SchemaVersion")
+            ya_aplicadas = {fila[0] for fila in cursor.fetchall()}
+            for migration in migrations:
+                if migration.version in ya_aplicadas:
+                    continue
+                cursor.execute(migration.sql)
+                cursor.execute(
+                    "INSERT INTO SchemaVersion (version, descripcion, aplicada) VALUES (%s, %s, LOCALTIMESTAMP)",
+                    (migration.version, migration.description),
+                )
+                conn.commit()
+                aplicadas.append(migration.version)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            conn.commit()
+    return aplicadas
+
+
+def create_monthly_partitions(conn, months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Deja creadas las particiones del mes en curso y de los months_ahead
+    siguientes, para que las inserciones no caigan en la partición DEFAULT.
+
+    CrearParticionesMensuales revisa y después crea, así que se toma el mismo
+    candado que migrate_postgres (hasta el fin de la transacción): dos
+    procesos que arrancan en un cambio de mes no crean la misma partición.
+
+    Returns:
+        int: Particiones creadas.
+    """
+    creadas = 0
+    with conn.cursor() as cursor:
+        try:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            for tabla in PARTITIONED_TABLES:
+                cursor.execute(
+                    "SELECT CrearParticionesMensuales(%s, LOCALTIMESTAMP, LOCALTIMESTAMP + %s * interval '1 month')",
+                    (tabla, months_ahead),
+                )
+                creadas += cursor.fetchone()[0]
+        except Exception:
+            conn.rollback()
+            raise
+    conn.commit()
+    return creadas
+
+
+# ------------------------------
+# SQLite
+# ------------------------------
+def _sqlite_estado(tabla, columnas, autoincrement=False, con_huella=False):
+    """
+    Tabla de un estado en SQLite (versión 1).
+
+    Args:
+        autoincrement (bool): Los ReporteID no se reutilizan aunque se borren filas.
+        con_huella (bool): Agrega la columna HashEntradas (única).
+    """
+    return f"""
+    CREATE TABLE IF NOT EXISTS {tabla} (
+        reporteid INTEGER PRIMARY KEY{" AUTOINCREMENT" if autoincrement else ""},
+        FechaGeneracion TIMESTAMP NOT NULL,
+        {_columnas(columnas, "REAL")},
+        Semilla INTEGER{", HashEntradas TEXT UNIQUE" if con_huella else ""}
+    );"""
+
+
+def _sqlite_reconstruir(tabla, columnas):
+    """SQLite no agrega llaves foráneas con ALTER TABLE: la tabla se vuelve a crear y se copia."""
+    return f"""
+    ALTER TABLE {tabla} RENAME TO {tabla}_v1;
+    CREATE TABLE {tabla} (
+        reporteid INTEGER PRIMARY KEY REFERENCES Reporte (reporteid) ON DELETE CASCADE,
+        FechaGeneracion TIMESTAMP NOT NULL,
+        {_columnas(columnas, "REAL")},
+        Semilla INTEGER
+    );
+    INSERT INTO {tabla} (reporteid, FechaGeneracion, {_lista(columnas)}, Semilla)
+    SELECT reporteid, FechaGeneracion, {_lista(columnas)}, Semilla FROM {tabla}_v1;
+    DROP TABLE {tabla}_v1;
+    CREATE INDEX ix_{tabla.lower()}_fecha ON {tabla} (FechaGeneracion);"""
+
+
+SQLITE_MIGRATIONS = (
+    Migration(1, "Tablas de los tres estados y de réplicas", "".join([
+        _sqlite_estado("EstadoTradicional", TRADICIONAL_COLUMNS, autoincrement=True, con_huella=True),
+        _sqlite_estado("EstadoVariable", VARIABLE_COLUMNS),
+        _sqlite_estado("PuntoEquilibrio", PUNTO_EQUILIBRIO_COLUMNS),
+        """
+    CREATE INDEX IF NOT EXISTS ix_estadotradicional_fecha_reporteid
+        ON EstadoTradicional (FechaGeneracion DESC, reporteid DESC);""",
+        f"""
+    CREATE TABLE IF NOT EXISTS ResultadoReplica (
+        reporteid INTEGER NOT NULL,
+        Replica INTEGER NOT NULL,
+        {_columnas(REPLICA_COLUMNS.values(), "REAL NOT NULL")},
+        PRIMARY KEY (reporteid, Replica)
+    );""",
+    ])),
+    Migration(2, "Encabezado Reporte y llaves foráneas", f"""
+    CREATE TABLE Reporte (
+        reporteid INTEGER PRIMARY KEY AUTOINCREMENT,
+        FechaGeneracion TIMESTAMP NOT NULL,
+        Semilla INTEGER,
+        HashEntradas TEXT UNIQUE
+    );
+    CREATE INDEX ix_reporte_fecha_reporteid ON Reporte (FechaGeneracion DESC, reporteid DESC);
+
+    INSERT INTO Reporte (reporteid, FechaGeneracion, Semilla, HashEntradas)
+    SELECT reporteid, FechaGeneracion, Semilla, HashEntradas FROM EstadoTradicional;
+    INSERT INTO Reporte (reporteid, FechaGeneracion, Semilla)
+    SELECT reporteid, MIN(FechaGeneracion), MIN(Semilla)
+    FROM (
+        SELECT reporteid, FechaGeneracion, Semilla FROM EstadoVariable
+        UNION ALL
+        SELECT reporteid, FechaGeneracion, Semilla FROM PuntoEquilibrio
+    ) estados
+    WHERE reporteid NOT IN (SELECT reporteid FROM Reporte)
+    GROUP BY reporteid;
+    {_sqlite_reconstruir("EstadoTradicional", TRADICIONAL_COLUMNS)}
+    {_sqlite_reconstruir("EstadoVariable", VARIABLE_COLUMNS)}
+    {_sqlite_reconstruir("PuntoEquilibrio", PUNTO_EQUILIBRIO_COLUMNS)}
+
+    ALTER TABLE ResultadoReplica RENAME TO ResultadoReplica_v1;
+    CREATE TABLE ResultadoReplica (
+        reporteid INTEGER NOT NULL REFERENCES Reporte (reporteid) ON DELETE CASCADE,
+        Replica INTEGER NOT NULL,
+        {_columnas(REPLICA_COLUMNS.values(), "REAL NOT NULL")},
+        PRIMARY KEY (reporteid, Replica)
+    );
+    INSERT INTO ResultadoReplica SELECT * FROM ResultadoReplica_v1
+    WHERE reporteid IN (SELECT reporteid FROM Reporte);
+    DROP TABLE ResultadoReplica_v1;"""),
+)
+
+
+def _sqlite_statements(sql):
+    """Separa un script en sentencias completas para ejecutarlas dentro de una transacción."""
+    sentencia = ""
+    for linea in sql.splitlines(keepends=True):
+        sentencia += linea
+        if sqlite3.complete_statement(sentencia):
+            yield sentencia
+            sentencia = ""
+    if sentencia.strip():
+        yield sentencia
+
+
+def migrate_sqlite(conn, migrations=SQLITE_MIGRATIONS):
+    """
+    Aplica las migraciones pendientes sobre una conexión sqlite3.
+
+    Cada migración corre en una transacción BEGIN IMMEDIATE, que además
+    impide que otro proceso migre a la vez, con las llaves foráneas
+    desactivadas mientras se reconstruyen las tablas.
+
+    Returns:
+        list[int]: Versiones aplicadas en esta llamada.
+    """
+    conn.execute(CREATE_VERSION_TABLE)
+    conn.commit()
+    aplicadas = []
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        for migration in migrations:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("SELECT 1 FROM SchemaVersion WHERE version = ?", (migration.version,)).fetchone():
+                    conn.rollback()
+                    continue
+                for sentencia in _sqlite_statements(migration.sql):
+                    conn.execute(sentencia)
+                conn.execute(
+                    "INSERT INTO SchemaVersion (version, descripcion, aplicada) VALUES (?, ?, ?)",
+                    (migration.version, migration.description, datetime.datetime.now()),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            aplicadas.append(migration.version)
+    finally:
+        conn.execute("PRAGMA foreign_keys=ON")
+    return aplicadas
+
+
+def schema_version(conn):
+    """Última versión aplicada (0 si la base nunca se migró); sirve para conexiones psycopg2 y sqlite3."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM SchemaVersion")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    from . import db_queries
+
+    backend = db_queries.get_backend()
+    if db_queries.ensure_schema():
+        print(f"Esquema al día ({backend.__name__}, versión {db_queries.schema_version()}).")
+    else:
+        print(f"No se pudo migrar el esquema ({backend.__name__}).")
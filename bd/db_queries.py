@@ -1,192 +1,375 @@
-from .db_connection import get_connection
-import datetime
-# Necesitamos importar el módulo de error para manejar excepciones específicas
-import psycopg2 
+"""
+Consultas de la aplicación sobre el backend de almacenamiento activo.
+
+Las funciones públicas de este módulo delegan en un backend: un módulo u
+objeto que implementa las funciones de BACKEND_API (bd.postgres_backend o
+bd.sqlite_backend). Por defecto se usa PostgreSQL; con la variable de entorno
+ESTADOS_DB_BACKEND=sqlite (y opcionalmente ESTADOS_DB_PATH) se usa un archivo
+SQLite local, o se puede elegir en tiempo de ejecución con set_backend().
+"""
+import importlib
+import os
+import threading
+from collections import OrderedDict
+
+from .db_export import write_history
+
+# Constantes del esquema que el resto de la aplicación importa desde aquí
+from .db_schema import (  # noqa: F401
+    REPORT_COLUMNS, REPORT_PAGE_SIZE, REPLICA_COLUMNS, COPY_CHUNK_ROWS,
+    TREND_METRICS, TREND_GRANULARITIES, EXPORT_FETCH_SIZE,
+)
+
+# Funciones que todo backend debe implementar
+BACKEND_API = (
+    "insert_estado_tradicional", "insert_estado_variable", "insert_punto_equilibrio",
+    "save_report", "save_reports", "get_available_reports", "get_reports_page",
+    "fetch_reports", "create_replica_table", "copy_replicas", "load_replicas",
+    "export_replicas", "get_report_trends", "stream_report_history", "ensure_schema", "schema_version",
+)
+
+# Nombre de backend -> módulo que lo implementa
+BACKENDS = {
+    "postgres": "bd.postgres_backend",
+    "sqlite": "bd.sqlite_backend",
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+# Reportes completos guardados en memoria (los reportes no cambian una vez escritos)
+REPORT_CACHE_SIZE = 128
+_report_cache = OrderedDict()
+_report_cache_lock = threading.Lock()
+
+
+def set_backend(backend):
+    """
+    Cambia el backend de almacenamiento.
+
+    Args:
+        backend (str | module | object): "postgres", "sqlite" o cualquier objeto
+            que implemente las funciones de BACKEND_API.
+
+    Returns:
+        El backend activo.
+
+    Raises:
+        ValueError: Si el nombre no es conocido o al backend le faltan funciones.
+    """
+    global _backend
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+        backend = importlib.import_module(BACKENDS[backend])
+    faltantes = [nombre for nombre in BACKEND_API if not hasattr(backend, nombre)]
+    if faltantes:
+        raise ValueError(f"Al backend le faltan las funciones: {', '.join(faltantes)}")
+    with _backend_lock:
+        _backend = backend
+    # Los ReporteID de un backend no dicen nada del otro
+    with _report_cache_lock:
+        _report_cache.clear()
+    return backend
+
+
+def get_backend():
+    """Devuelve el backend activo; la primera vez lo elige con ESTADOS_DB_BACKEND (por defecto "postgres")."""
+    if _backend is None:
+        set_backend(os.environ.get("ESTADOS_DB_BACKEND", "postgres").lower())
+    return _backend
 
 
 # ------------------------------
-# Insertar en EstadoTradicional
+# Esquema
+# ------------------------------
+def ensure_schema():
+    """
+    Aplica las migraciones pendientes del backend activo (ver bd.db_migrations).
+    Las funciones de consulta lo hacen solas la primera vez; esto permite
+    migrar por adelantado.
+
+    Returns:
+        bool: True si el esquema está al día.
+    """
+    return get_backend().ensure_schema()
+
+
+def schema_version():
+    """Última versión de migración aplicada en la base del backend activo (None si no hay conexión)."""
+    return get_backend().schema_version()
+
+
+# ------------------------------
+# Inserciones por tabla
 # ------------------------------
 def insert_estado_tradicional(
     ventas, materia_prima, mano_obra, cif, total_costo_ventas, utilidad_bruta,
     salario_adm, salario_meseros, arrendamiento_oyv, depreciacion_oyv,
-    industria_comercio, total_gastos_admon, utilidad_operacional
+    industria_comercio, total_gastos_admon, utilidad_operacional, semilla=None
 ):
-    conn = get_connection()
-    if conn:
-        cursor = conn.cursor()
-        try:
-            # Usar %s como marcador de posición para psycopg2
-            cursor.execute("""
-                INSERT INTO EstadoTradicional (
-                    FechaGeneracion, Ventas, MateriaPrima, ManoDeObra, CIF,
-                    TotalCostoVentas, UtilidadBruta, SalarioAdministracion, SalarioMeseros,
-                    ArrendamientoOyV, DepreciacionOyV, IndustriaComercio,
-                    TotalGastosAdmonVentas, UtilidadOperacional
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                datetime.datetime.now(), ventas, materia_prima, mano_obra, cif,
-                total_costo_ventas, utilidad_bruta, salario_adm, salario_meseros,
-                arrendamiento_oyv, depreciacion_oyv, industria_comercio,
-                total_gastos_admon, utilidad_operacional
-            ))
-            conn.commit()
-        except psycopg2.Error as e:
-            conn.rollback()
-            print(f"Error al insertar en EstadoTradicional: {e}")
-        finally:
-            cursor.close()
-            conn.close()
-
-
-# ------------------------------
-# Insertar en EstadoVariable
-# ------------------------------
+    get_backend().insert_estado_tradicional(
+        ventas, materia_prima, mano_obra, cif, total_costo_ventas, utilidad_bruta,
+        salario_adm, salario_meseros, arrendamiento_oyv, depreciacion_oyv,
+        industria_comercio, total_gastos_admon, utilidad_operacional, semilla=semilla,
+    )
+
+
 def insert_estado_variable(
     ventas, costo_var_materia, costo_var_servicios, costo_var_comisiones,
     costo_var_industria, total_costos_var, margen_contribucion, costo_fijo_mano_obra,
     sueldo_fijo_adm, sueldo_fijo_meseros, arrendamiento, depreciacion,
-    total_costos_fijos, utilidad_operacional, rentabilidad_ventas
+    total_costos_fijos, utilidad_operacional, rentabilidad_ventas, semilla=None
 ):
-    conn = get_connection()
-    if conn:
-        cursor = conn.cursor()
-        try:
-            # Usar %s como marcador de posición para psycopg2
-            cursor.execute("""
-                INSERT INTO EstadoVariable (
-                    FechaGeneracion, Ventas, CostoVariableMateriaPrima, CostoVariableServiciosPublicos,
-                    CostoVariableComisiones, CostoVariableIndustriaComercio, TotalCostosVariables,
-                    MargenContribucion, CostoFijoManoObra, SueldoFijoAdministracion,
-                    SueldoFijoMeseros, Arrendamiento, Depreciacion, TotalCostosFijos,
-                    UtilidadOperacional, RentabilidadVentas
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                datetime.datetime.now(), ventas, costo_var_materia, costo_var_servicios,
-                costo_var_comisiones, costo_var_industria, total_costos_var,
-                margen_contribucion, costo_fijo_mano_obra, sueldo_fijo_adm,
-                sueldo_fijo_meseros, arrendamiento, depreciacion, total_costos_fijos,
-                utilidad_operacional, rentabilidad_ventas
-            ))
-            conn.commit()
-        except psycopg2.Error as e:
-            conn.rollback()
-            print(f"Error al insertar en EstadoVariable: {e}")
-        finally:
-            cursor.close()
-            conn.close()
-
-
-# ------------------------------
-# Insertar en PuntoEquilibrio
-# ------------------------------
+    get_backend().insert_estado_variable(
+        ventas, costo_var_materia, costo_var_servicios, costo_var_comisiones,
+        costo_var_industria, total_costos_var, margen_contribucion, costo_fijo_mano_obra,
+        sueldo_fijo_adm, sueldo_fijo_meseros, arrendamiento, depreciacion,
+        total_costos_fijos, utilidad_operacional, rentabilidad_ventas, semilla=semilla,
+    )
+
+
 def insert_punto_equilibrio(
     pe_mes_unidades, pe_dia_unidades, pe_valor,
     margen_seg_porcent, margen_seg_valor,
-    ventas_objetivo_unidades, ventas_objetivo_valor
+    ventas_objetivo_unidades, ventas_objetivo_valor, semilla=None
 ):
-    conn = get_connection()
-    if conn:
-        cursor = conn.cursor()
-        try:
-            # Usar %s como marcador de posición para psycopg2
-            cursor.execute("""
-                INSERT INTO PuntoEquilibrio (
-                    FechaGeneracion, PuntoEquilibrioMesUnidades, PuntoEquilibrioDiaUnidades,
-                    PuntoEquilibrioValor, MargenSeguridadPorc, MargenSeguridadValor,
-                    VentasUtilidadObjetivoUnidades, VentasUtilidadObjetivoValor
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                datetime.datetime.now(), pe_mes_unidades, pe_dia_unidades,
-                pe_valor, margen_seg_porcent, margen_seg_valor,
-                ventas_objetivo_unidades, ventas_objetivo_valor
-            ))
-            conn.commit()
-        except psycopg2.Error as e:
-            conn.rollback()
-            print(f"Error al insertar en PuntoEquilibrio: {e}")
-        finally:
-            cursor.close()
-            conn.close()
-
-    # Archivo: db_operations.py
-
-# ... (tus funciones insert_estado_tradicional, etc., van aquí) ...
-
-# -----------------------------------------------------------------
-# Recuperar Reportes para Comparación
-# -----------------------------------------------------------------
+    get_backend().insert_punto_equilibrio(
+        pe_mes_unidades, pe_dia_unidades, pe_valor,
+        margen_seg_porcent, margen_seg_valor,
+        ventas_objetivo_unidades, ventas_objetivo_valor, semilla=semilla,
+    )
+
+
+# ------------------------------
+# Guardado de reportes completos
+# ------------------------------
+def save_report(tradicional, variable, punto_equilibrio, semilla=None, content_hash=None):
+    """
+    Guarda los tres estados de una corrida con el mismo ReporteID, todo o nada.
+    Con content_hash el guardado es idempotente: si ya existe un reporte con
+    esa huella se devuelve su ReporteID.
 
+    Args:
+        tradicional (sequence): Valores en el orden de los argumentos de insert_estado_tradicional.
+        variable (sequence): Valores en el orden de los argumentos de insert_estado_variable.
+        punto_equilibrio (sequence): Valores en el orden de los argumentos de insert_punto_equilibrio.
+        semilla (int, optional): Semilla de la simulación que generó los datos.
+        content_hash (str, optional): Huella de las entradas y la semilla
+            (ver Calculos_Financieros.huella_entradas).
+
+    Returns:
+        int | None: El ReporteID compartido, o None si no se pudo guardar.
+    """
+    return get_backend().save_report(tradicional, variable, punto_equilibrio,
+                                     semilla=semilla, content_hash=content_hash)
+
+
+def save_reports(reports):
+    """
+    Guarda varios reportes en una sola transacción.
+
+    Args:
+        reports (list[tuple]): (tradicional, variable, punto_equilibrio, semilla, content_hash)
+            por reporte, con los valores en el mismo orden que save_report.
+
+    Returns:
+        list[int] | None: Los ReporteID en el orden recibido, o None si no se pudo guardar.
+    """
+    return get_backend().save_reports(reports)
+
+
+# ------------------------------
+# Lista de reportes
+# ------------------------------
 def get_available_reports():
     """
     Recupera una lista de tuplas (id, fecha_generacion) de todos los reportes
     guardados, ordenados por fecha descendente.
     """
+    return get_backend().get_available_reports()
+
+
+def get_reports_page(limit=REPORT_PAGE_SIZE, after=None, date_from=None, date_to=None, text=None):
+    """
+    Una página de la lista de reportes, del más reciente al más antiguo,
+    paginada por llave sobre (FechaGeneracion, reporteid).
+
+    Args:
+        limit (int): Filas por página.
+        after (tuple, optional): (reporteid, FechaGeneracion) de la última fila ya mostrada.
+        date_from (datetime, optional): Sólo reportes generados desde esta fecha (inclusive).
+        date_to (datetime, optional): Sólo reportes generados antes de esta fecha (exclusive).
+        text (str, optional): Texto a buscar en el ID, la fecha (AAAA-MM-DD HH:MM) o la semilla.
+
+    Returns:
+        list[tuple] | None: (reporteid, FechaGeneracion) por fila, o None si falló la consulta.
+    """
+    return get_backend().get_reports_page(limit=limit, after=after, date_from=date_from,
+                                          date_to=date_to, text=text)
+
+
+# ------------------------------
+# Lectura de reportes
+# ------------------------------
+def get_reports_data(report_ids):
+    """
+    Recupera los tres estados de varios reportes con una sola consulta
+    (el encabezado Reporte unido con EstadoTradicional, EstadoVariable y
+    PuntoEquilibrio por reporteid). Los reportes ya leídos se sirven desde un LRU en memoria y
+    sólo se consultan los que faltan.
+
+    Args:
+        report_ids (iterable[int]): ReporteIDs a recuperar.
+
+    Returns:
+        dict | None: {report_id: {"tradicional", "variable", "punto_equilibrio"}} con los
+        nombres de columna canónicos. Los IDs inexistentes no aparecen. None si falló la consulta.
+    """
+    resultado, faltantes = cached_reports(report_ids)
+    if not faltantes:
+        return resultado
+
+    leidos = get_backend().fetch_reports(faltantes)
+    if leidos is None:
+        return None
+    resultado.update(cache_reports(leidos))
+    return resultado
+
+
+def cached_reports(report_ids):
+    """
+    Separa los reportes pedidos entre los que ya están en el LRU y los que
+    hay que consultar.
+
+    Returns:
+        tuple: ({report_id: reporte} desde la caché, [report_id] faltantes).
+    """
+    report_ids = list(dict.fromkeys(int(report_id) for report_id in report_ids))
+    resultado = {}
+    with _report_cache_lock:
+        for report_id in report_ids:
+            if report_id in _report_cache:
+                _report_cache.move_to_end(report_id)
+                resultado[report_id] = _report_cache[report_id]
+    return resultado, [report_id for report_id in report_ids if report_id not in resultado]
+
+
+def cache_reports(reports):
+    """Guarda en el LRU los reportes recién leídos y los devuelve."""
+    with _report_cache_lock:
+        for report_id, data in reports.items():
+            _report_cache[report_id] = data
+            _report_cache.move_to_end(report_id)
+        while len(_report_cache) > REPORT_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+    return reports
 
-    conn = get_connection()
-    if not conn:
-        return []
-        
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-             SELECT reporteid, FechaGeneracion
-             FROM EstadoTradicional
-             ORDER BY FechaGeneracion DESC
-        """)
-        
-        # Devolvemos el resultado como una lista de tuplas (ID, Fecha)
-        return cursor.fetchall() 
-        
-    except psycopg2.Error as e:
-        print(f"Error al recuperar la lista de reportes: {e}")
-        return []
-    finally:
-        cursor.close()
-        conn.close()
-
-def _fetch_data_from_table(cursor, table_name, report_id):
-    """Función auxiliar para extraer datos de una sola tabla como diccionario."""
-    
-    # Usamos f-string para el nombre de la tabla (no inseguro ya que table_name está controlado)
-    # y %s para el ReporteID
-    cursor.execute(f"""
-        SELECT *
-        FROM {table_name}
-        WHERE reporteid = %s  
-    """, (report_id,)) # O WHERE id = %s, si usas 'id' en lugar de 'reporteid'
-    
-    # 🌟 PASO CRÍTICO: Mapear la tupla de resultado a un diccionario
-    if cursor.rowcount > 0:
-        col_names = [desc[0] for desc in cursor.description] # Obtiene los nombres de las columnas
-        data = cursor.fetchone()                             # Obtiene la tupla de valores
-        return dict(zip(col_names, data))                    # Mapea y devuelve el diccionario
-    return None
 
 def get_full_report_data(report_id):
     """
     Recupera todos los datos del Estado Tradicional, Estado Variable y PE
     para un ReporteID dado.
     """
-    conn = get_connection()
-    if not conn:
+    reports = get_reports_data([report_id])
+    if reports is None:
         return None
+    return reports.get(int(report_id), {"tradicional": None, "variable": None, "punto_equilibrio": None})
 
-    cursor = conn.cursor()
-    try:
-        data = {
-            "tradicional": _fetch_data_from_table(cursor, "EstadoTradicional", report_id),
-            "variable": _fetch_data_from_table(cursor, "EstadoVariable", report_id),
-            "punto_equilibrio": _fetch_data_from_table(cursor, "PuntoEquilibrio", report_id),
-        }
-        return data
-        
-    except psycopg2.Error as e:
-        print(f"Error al obtener datos del reporte {report_id}: {e}")
-        return None
-    finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+
+# ------------------------------
+# Réplicas de Monte Carlo
+# ------------------------------
+def create_replica_table():
+    """Crea la tabla ResultadoReplica si no existe."""
+    return get_backend().create_replica_table()
+
+
+def copy_replicas(report_id, metricas, chunk_rows=COPY_CHUNK_ROWS):
+    """
+    Guarda las muestras por réplica de una corrida Monte Carlo en una sola
+    transacción, con la carga masiva que ofrezca el backend.
+
+    Args:
+        report_id (int): Reporte al que pertenecen las réplicas.
+        metricas (dict): {métrica: np.ndarray} con todas las métricas de REPLICA_COLUMNS.
+        chunk_rows (int): Filas por sentencia de carga.
+
+    Returns:
+        int | None: Filas guardadas, o None si falló.
+    """
+    return get_backend().copy_replicas(report_id, metricas, chunk_rows=chunk_rows)
+
+
+def load_replicas(report_id):
+    """
+    Returns:
+        dict | None: {métrica: np.ndarray} en orden de réplica, o None si falló.
+    """
+    return get_backend().load_replicas(report_id)
+
+
+def export_replicas(report_id, file, fmt="csv"):
+    """
+    Exporta las réplicas de un reporte a un archivo abierto.
+
+    Args:
+        report_id (int): Reporte a exportar.
+        file: Objeto tipo archivo con write().
+        fmt (str): "csv" (con encabezado), "text" o "binary" (sólo PostgreSQL).
+
+    Returns:
+        bool: True si la exportación terminó bien.
+    """
+    return get_backend().export_replicas(report_id, file, fmt=fmt)
+
+
+# ------------------------------
+# Exportación del historial
+# ------------------------------
+def export_report_history(path, fmt="csv", fetch_size=EXPORT_FETCH_SIZE, date_from=None, date_to=None):
+    """
+    Exporta todos los reportes (encabezado y los tres estados, una fila por
+    reporte, del más antiguo al más reciente) leyendo y escribiendo de a
+    fetch_size filas: la memoria no crece con el tamaño del historial.
+
+    Args:
+        path (str | os.PathLike): Archivo de destino.
+        fmt (str): "csv", "jsonl" o "parquet" (este último requiere pyarrow).
+        fetch_size (int): Filas por viaje a la base y por bloque escrito.
+        date_from (datetime, optional): Desde esta fecha (inclusive).
+        date_to (datetime, optional): Hasta esta fecha (exclusive).
+
+    Returns:
+        int | None: Reportes exportados, o None si falló la consulta (el
+        destino no se toca en ese caso).
+    """
+    backend = get_backend()
+    return write_history(
+        lambda write_batch: backend.stream_report_history(write_batch, fetch_size=fetch_size,
+                                                          date_from=date_from, date_to=date_to),
+        path, fmt,
+    )
+
+
+# ------------------------------
+# Tendencias
+# ------------------------------
+def get_report_trends(granularity="day", window=7, date_from=None, date_to=None):
+    """
+    Agregados por período de las métricas de TREND_METRICS, calculados en la
+    base con medias móviles sobre los períodos.
+
+    Args:
+        granularity (str): "day", "week" o "month".
+        window (int): Períodos de la media móvil (el actual y los window - 1 anteriores con datos).
+        date_from (datetime, optional): Desde esta fecha (inclusive).
+        date_to (datetime, optional): Hasta esta fecha (exclusive).
+
+    Returns:
+        list[dict] | None: Una fila por período en orden cronológico con "Periodo",
+        "Reportes" y, por métrica, "<Metrica>", "<Metrica>Min", "<Metrica>Max" y
+        "<Metrica>Movil". None si falló la consulta.
+    """
+    return get_backend().get_report_trends(granularity=granularity, window=window,
+                                           date_from=date_from, date_to=date_to)
@@ -0,0 +1,133 @@
+"""
+Esquema compartido por los backends de almacenamiento.
+
+Nombres canónicos de tablas y columnas, en el orden en que los reciben las
+funciones de guardado. Cada backend arma su SQL a partir de estas listas.
+"""
+from decimal import Decimal
+
+# Columnas de valores de cada estado, en el orden de los argumentos de las funciones insert_*
+TRADICIONAL_COLUMNS = (
+    "Ventas", "MateriaPrima", "ManoDeObra", "CIF",
+    "TotalCostoVentas", "UtilidadBruta", "SalarioAdministracion", "SalarioMeseros",
+    "ArrendamientoOyV", "DepreciacionOyV", "IndustriaComercio",
+    "TotalGastosAdmonVentas", "UtilidadOperacional",
+)
+VARIABLE_COLUMNS = (
+    "Ventas", "CostoVariableMateriaPrima",
+    "CostoVariableServiciosPublicos", "CostoVariableComisiones",
+    "CostoVariableIndustriaComercio", "TotalCostosVariables",
+    "MargenContribucion", "CostoFijoManoObra", "SueldoFijoAdministracion",
+    "SueldoFijoMeseros", "Arrendamiento", "Depreciacion", "TotalCostosFijos",
+    "UtilidadOperacional", "RentabilidadVentas",
+)
+PUNTO_EQUILIBRIO_COLUMNS = (
+    "PuntoEquilibrioMesUnidades", "PuntoEquilibrioDiaUnidades",
+    "PuntoEquilibrioValor", "MargenSeguridadPorc", "MargenSeguridadValor",
+    "VentasUtilidadObjetivoUnidades", "VentasUtilidadObjetivoValor",
+)
+
+# Columnas de cada estado con su nombre canónico. PostgreSQL devuelve los
+# identificadores sin comillas en minúsculas, por eso se listan aquí en vez
+# de tomarlos de cursor.description.
+REPORT_COLUMNS = {
+    "tradicional": ("EstadoTradicional", ("reporteid", "FechaGeneracion", *TRADICIONAL_COLUMNS, "Semilla")),
+    "variable": ("EstadoVariable", ("reporteid", "FechaGeneracion", *VARIABLE_COLUMNS, "Semilla")),
+    "punto_equilibrio": ("PuntoEquilibrio", ("reporteid", "FechaGeneracion", *PUNTO_EQUILIBRIO_COLUMNS, "Semilla")),
+}
+
+REPORT_PAGE_SIZE = 50
+
+# Métrica de la simulación -> columna de ResultadoReplica
+REPLICA_COLUMNS = {
+    "Utilidad Operacional (Tradicional)": "UtilidadOperacionalTradicional",
+    "Utilidad Operacional (Variable)": "UtilidadOperacionalVariable",
+    "Margen de Contribución": "MargenContribucion",
+    "Punto de Equilibrio (Mes - Unidades)": "PuntoEquilibrioMesUnidades",
+    "Punto de Equilibrio (Valor)": "PuntoEquilibrioValor",
+}
+
+# Filas por sentencia de carga masiva; acota la memoria del búfer (~76 bytes por fila)
+COPY_CHUNK_ROWS = 100_000
+
+# Métrica de tendencia -> expresión sobre el JOIN de los tres estados (alias t, v, p)
+TREND_METRICS = {
+    "UtilidadOperacional": "v.UtilidadOperacional",
+    "MargenContribucion": "v.MargenContribucion",
+    "PuntoEquilibrioValor": "p.PuntoEquilibrioValor",
+}
+
+TREND_GRANULARITIES = ("day", "week", "month")
+
+# Filas por viaje al exportar el historial completo (acota la memoria del lado de Python)
+EXPORT_FETCH_SIZE = 10_000
+
+# Prefijo de las columnas de cada estado en el historial exportado (hay nombres repetidos entre estados)
+HISTORY_PREFIXES = {"tradicional": "Tradicional", "variable": "Variable", "punto_equilibrio": "PE"}
+
+
+def joined_report_columns():
+    """Lista de columnas (con alias t, v, p) del JOIN de los tres estados, en el orden de REPORT_COLUMNS."""
+    alias = {"tradicional": "t", "variable": "v", "punto_equilibrio": "p"}
+    return ", ".join(
+        f"{alias[seccion]}.{columna}"
+        for seccion, (_, nombres) in REPORT_COLUMNS.items()
+        for columna in nombres
+    )
+
+
+def _history_sections():
+    """(alias, prefijo, columnas de valores) de cada estado, sin reporteid, FechaGeneracion ni Semilla."""
+    alias = {"tradicional": "t", "variable": "v", "punto_equilibrio": "p"}
+    return [(alias[seccion], HISTORY_PREFIXES[seccion], nombres[2:-1])
+            for seccion, (_, nombres) in REPORT_COLUMNS.items()]
+
+
+def history_columns():
+    """Nombres de las columnas del historial exportado: el encabezado del reporte y los valores de cada estado."""
+    columnas = ["reporteid", "FechaGeneracion", "Semilla"]
+    for _, prefijo, nombres in _history_sections():
+        columnas += [f"{prefijo}_{columna}" for columna in nombres]
+    return columnas
+
+
+def history_select(cast=""):
+    """
+    Lista del SELECT del historial (encabezado r y estados t, v, p) en el
+    orden de history_columns.
+
+    Args:
+        cast (str): Sufijo para las columnas de valores, p. ej. "::double precision".
+    """
+    columnas = ["r.reporteid", "r.FechaGeneracion", "r.Semilla"]
+    for alias, _, nombres in _history_sections():
+        columnas += [f"{alias}.{columna}{cast}" for columna in nombres]
+    return ", ".join(columnas)
+
+
+def trend_columns():
+    """Nombres de las columnas que devuelve get_report_trends, en orden."""
+    columnas = ["Periodo", "Reportes"]
+    for metrica in TREND_METRICS:
+        columnas += [metrica, f"{metrica}Min", f"{metrica}Max"]
+    columnas += [f"{metrica}Movil" for metrica in TREND_METRICS]
+    return columnas
+
+
+def split_report_row(row):
+    """Reparte una fila del JOIN en {"tradicional": {...}, "variable": {...}, "punto_equilibrio": {...}}."""
+    data = {}
+    inicio = 0
+    for seccion, (_, nombres) in REPORT_COLUMNS.items():
+        valores = row[inicio:inicio + len(nombres)]
+        inicio += len(nombres)
+        # LEFT JOIN sin fila en esa tabla: la sección queda en None, como antes
+        if valores[0] is None:
+            data[seccion] = None
+            continue
+        # Las columnas NUMERIC llegan como Decimal; se pasan a float para poder operar con ellas
+        data[seccion] = {
+            nombre: float(valor) if isinstance(valor, Decimal) else valor
+            for nombre, valor in zip(nombres, valores)
+        }
+    return data
@@ -0,0 +1,180 @@
+import atexit
+import queue
+import threading
+import time
+
+from .db_queries import save_report, save_reports
+
+_CERRAR = object()  # Marca de fin para el hilo escritor
+
+
+class ReportWriter:
+    """
+    Escritor en segundo plano (write-behind) para los reportes.
+
+    Un solo hilo consume una cola acotada y guarda los reportes pendientes en
+    lotes con save_reports, una transacción por lote. Si la cola está llena,
+    submit() espera (contrapresión) en lugar de crear más hilos o conexiones.
+
+    Args:
+        max_pending (int): Capacidad de la cola.
+        batch_size (int): Máximo de reportes por transacción.
+    """
+
+    def __init__(self, max_pending=1000, batch_size=50):
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._closed = False
+        # Serializa los submit con close: nada entra a la cola después de _CERRAR
+        self._submit_lock = threading.Lock()
+
+        # Métricas
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="ReportWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, tradicional, variable, punto_equilibrio, semilla=None, content_hash=None,
+               block=True, timeout=None):
+        """
+        Encola un reporte (mismos argumentos que save_report).
+
+        Raises:
+            queue.Full: Si la cola sigue llena después de timeout (o de inmediato con block=False).
+            RuntimeError: Si el escritor ya se cerró.
+        """
+        # Un solo plazo para tomar el candado y para esperar lugar en la cola
+        timed = block and timeout is not None
+        deadline = time.monotonic() + timeout if timed else None
+        if not self._submit_lock.acquire(block, timeout if timed else -1):
+            raise queue.Full
+        try:
+            if self._closed:
+                raise RuntimeError("El escritor de reportes está cerrado.")
+            with self._idle:
+                self._pending += 1
+            try:
+                remaining = max(0.0, deadline - time.monotonic()) if timed else None
+                self._queue.put((tradicional, variable, punto_equilibrio, semilla, content_hash), block, remaining)
+            except queue.Full:
+                self._done(1)
+                raise
+        finally:
+            self._submit_lock.release()
+
+    def flush(self, timeout=None):
+        """
+        Espera a que se guarden todos los reportes encolados hasta ahora.
+
+        Returns:
+            bool: False si se agotó el timeout con reportes pendientes.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout=None):
+        """Guarda lo pendiente y detiene el hilo escritor; después de cerrar, submit() falla."""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_CERRAR)
+        self._thread.join(timeout)
+
+    @property
+    def queue_depth(self):
+        """Reportes en la cola que aún no toma el hilo escritor."""
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Profundidad de la cola, reportes guardados/fallidos, lotes y
+            latencia de escritura por lote en segundos (última, promedio y máxima).
+        """
+        return {
+            "queue_depth": self.queue_depth,
+            "pending": self._pending,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_latency": self.last_latency,
+            "mean_latency": self._total_latency / self.batches if self.batches else 0.0,
+            "max_latency": self.max_latency,
+        }
+
+    # --- Hilo escritor ---
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _CERRAR:
+                return
+            batch = [item]
+            closing = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _CERRAR:
+                    closing = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            if closing:
+                return
+
+    def _write(self, batch):
+        inicio = time.perf_counter()
+        try:
+            ok = save_reports(batch) is not None
+            if not ok and len(batch) > 1:
+                # Se reintenta uno por uno para no perder todo el lote por una fila
+                ok_count = sum(
+                    save_report(*reporte[:3], semilla=reporte[3], content_hash=reporte[4]) is not None
+                    for reporte in batch
+                )
+            else:
+                ok_count = len(batch) if ok else 0
+        except Exception as e:
+            print(f"Error en el escritor de reportes: {e}")
+            ok_count = 0
+
+        latency = time.perf_counter() - inicio
+        self.batches += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self._total_latency += latency
+        self.written += ok_count
+        self.failed += len(batch) - ok_count
+        self._done(len(batch))
+
+    def _done(self, n):
+        with self._idle:
+            self._pending -= n
+            if self._pending == 0:
+                self._idle.notify_all()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_report_writer():
+    """Devuelve el escritor de reportes del proceso, creándolo la primera vez."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ReportWriter()
+            # Se registra después del pool, así atexit lo cierra antes que al pool
+            atexit.register(_writer.close)
+        return _writer
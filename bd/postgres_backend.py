@@ -0,0 +1,826 @@
+"""
+Backend de almacenamiento PostgreSQL (psycopg2 + pool de conexiones).
+
+Implementa las funciones que bd.db_queries delega en el backend activo
+(ver BACKEND_API en bd.db_queries).
+"""
+from .db_connection import pooled_connection
+from .db_migrations import migrate_postgres, create_monthly_partitions, schema_version as _schema_version
+from .db_schema import (
+    TRADICIONAL_COLUMNS, VARIABLE_COLUMNS, PUNTO_EQUILIBRIO_COLUMNS,
+    REPORT_PAGE_SIZE, REPLICA_COLUMNS, COPY_CHUNK_ROWS, TREND_METRICS, TREND_GRANULARITIES,
+    EXPORT_FETCH_SIZE, joined_report_columns, history_select, trend_columns, split_report_row,
+)
+import datetime
+import io
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+import numpy as np
+# Necesitamos importar el módulo de error para manejar excepciones específicas
+import psycopg2 
+from psycopg2.extras import execute_values
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def ensure_schema():
+    """
+    Aplica las migraciones pendientes (bd.db_migrations) y crea las
+    particiones de los próximos meses. Sólo consulta la base la primera vez
+    en el proceso.
+
+    Returns:
+        bool: True si el esquema está al día.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return True
+    with _schema_lock:
+        if _schema_ready:
+            return True
+        with pooled_connection() as conn:
+            if not conn:
+                return False
+            try:
+                migrate_postgres(conn)
+                create_monthly_partitions(conn)
+            except psycopg2.Error as e:
+                conn.rollback()
+                print(f"Error al migrar el esquema: {e}")
+                return False
+        _schema_ready = True
+        return True
+
+
+def schema_version():
+    """Última versión de migración aplicada en la base, o None si no hay conexión."""
+    with pooled_connection() as conn:
+        if not conn:
+            return None
+        try:
+            return _schema_version(conn)
+        except psycopg2.Error:
+            return 0
+
+
+@contextmanager
+def _connection():
+    """pooled_connection() con el esquema ya migrado; produce None si no se pudo."""
+    if not ensure_schema():
+        yield None
+        return
+    with pooled_connection() as conn:
+        yield conn
+
+
+# ------------------------------
+# Insertar en EstadoTradicional
+# ------------------------------
+def insert_estado_tradicional(
+    ventas, materia_prima, mano_obra, cif, total_costo_ventas, utilidad_bruta,
+    salario_adm, salario_meseros, arrendamiento_oyv, depreciacion_oyv,
+    industria_comercio, total_gastos_admon, utilidad_operacional, semilla=None
+):
+    with _connection() as conn:
+        if not conn:
+            return
+        cursor = conn.cursor()
+        try:
+            # Usar %s como marcador de posición para psycopg2
+            cursor.execute("""
+                WITH encabezado AS (
+                    INSERT INTO Reporte (FechaGeneracion, Semilla) VALUES (%s, %s)
+                    RETURNING reporteid, FechaGeneracion
+                )
+                INSERT INTO EstadoTradicional (
+                    reporteid, FechaGeneracion, Ventas, MateriaPrima, ManoDeObra, CIF,
+                    TotalCostoVentas, UtilidadBruta, SalarioAdministracion, SalarioMeseros,
+                    ArrendamientoOyV, DepreciacionOyV, IndustriaComercio,
+                    TotalGastosAdmonVentas, UtilidadOperacional, Semilla
+                )
+                SELECT reporteid, FechaGeneracion, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                FROM encabezado
+            """, (
+                datetime.datetime.now(), semilla, ventas, materia_prima, mano_obra, cif,
+                total_costo_ventas, utilidad_bruta, salario_adm, salario_meseros,
+                arrendamiento_oyv, depreciacion_oyv, industria_comercio,
+                total_gastos_admon, utilidad_operacional, semilla
+            ))
+            conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"Error al insertar en EstadoTradicional: {e}")
+        finally:
+            cursor.close()
+
+
+# ------------------------------
+# Insertar en EstadoVariable
+# ------------------------------
+def insert_estado_variable(
+    ventas, costo_var_materia, costo_var_servicios, costo_var_comisiones,
+    costo_var_industria, total_costos_var, margen_contribucion, costo_fijo_mano_obra,
+    sueldo_fijo_adm, sueldo_fijo_meseros, arrendamiento, depreciacion,
+    total_costos_fijos, utilidad_operacional, rentabilidad_ventas, semilla=None
+):
+    with _connection() as conn:
+        if not conn:
+            return
+        cursor = conn.cursor()
+        try:
+            # Usar %s como marcador de posición para psycopg2
+            cursor.execute("""
+                WITH encabezado AS (
+                    INSERT INTO Reporte (FechaGeneracion, Semilla) VALUES (%s, %s)
+                    RETURNING reporteid, FechaGeneracion
+                )
+                INSERT INTO EstadoVariable (
+                    reporteid, FechaGeneracion, Ventas, CostoVariableMateriaPrima, CostoVariableServiciosPublicos,
+                    CostoVariableComisiones, CostoVariableIndustriaComercio, TotalCostosVariables,
+                    MargenContribucion, CostoFijoManoObra, SueldoFijoAdministracion,
+                    SueldoFijoMeseros, Arrendamiento, Depreciacion, TotalCostosFijos,
+                    UtilidadOperacional, RentabilidadVentas, Semilla
+                )
+                SELECT reporteid, FechaGeneracion, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                FROM encabezado
+            """, (
+                datetime.datetime.now(), semilla, ventas, costo_var_materia, costo_var_servicios,
+                costo_var_comisiones, costo_var_industria, total_costos_var,
+                margen_contribucion, costo_fijo_mano_obra, sueldo_fijo_adm,
+                sueldo_fijo_meseros, arrendamiento, depreciacion, total_costos_fijos,
+                utilidad_operacional, rentabilidad_ventas, semilla
+            ))
+            conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"Error al insertar en EstadoVariable: {e}")
+        finally:
+            cursor.close()
+
+
+# ------------------------------
+# Insertar en PuntoEquilibrio
+# ------------------------------
+def insert_punto_equilibrio(
+    pe_mes_unidades, pe_dia_unidades, pe_valor,
+    margen_seg_porcent, margen_seg_valor,
+    ventas_objetivo_unidades, ventas_objetivo_valor, semilla=None
+):
+    with _connection() as conn:
+        if not conn:
+            return
+        cursor = conn.cursor()
+        try:
+            # Usar %s como marcador de posición para psycopg2
+            cursor.execute("""
+                WITH encabezado AS (
+                    INSERT INTO Reporte (FechaGeneracion, Semilla) VALUES (%s, %s)
+                    RETURNING reporteid, FechaGeneracion
+                )
+                INSERT INTO PuntoEquilibrio (
+                    reporteid, FechaGeneracion, PuntoEquilibrioMesUnidades, PuntoEquilibrioDiaUnidades,
+                    PuntoEquilibrioValor, MargenSeguridadPorc, MargenSeguridadValor,
+                    VentasUtilidadObjetivoUnidades, VentasUtilidadObjetivoValor, Semilla
+                )
+                SELECT reporteid, FechaGeneracion, %s, %s, %s, %s, %s, %s, %s, %s
+                FROM encabezado
+            """, (
+                datetime.datetime.now(), semilla, pe_mes_unidades, pe_dia_unidades,
+                pe_valor, margen_seg_porcent, margen_seg_valor,
+                ventas_objetivo_unidades, ventas_objetivo_valor, semilla
+            ))
+            conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"Error al insertar en PuntoEquilibrio: {e}")
+        finally:
+            cursor.close()
+
+# ------------------------------
+# Guardar un reporte completo
+# ------------------------------
+
+def _report_ids_by_hash(cursor, hashes):
+    cursor.execute(
+        "SELECT HashEntradas, reporteid FROM Reporte WHERE HashEntradas = ANY(%s)",
+        (list(hashes),),
+    )
+    return dict(cursor.fetchall())
+
+
+# Un reporte completo en una sola sentencia (atómica aun en modo autocommit):
+# el ReporteID del encabezado Reporte se reutiliza en las tres tablas de estados.
+# El CTE no puede llamarse "reporte": taparía a la tabla Reporte en la búsqueda
+# final por huella.
+SAVE_REPORT_QUERY = f"""
+    WITH encabezado AS (
+        INSERT INTO Reporte (FechaGeneracion, Semilla, HashEntradas)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (HashEntradas) DO NOTHING
+        RETURNING reporteid, FechaGeneracion, Semilla
+    ),
+    tradicional AS (
+        INSERT INTO EstadoTradicional (reporteid, FechaGeneracion, {', '.join(TRADICIONAL_COLUMNS)}, Semilla)
+        SELECT reporteid, FechaGeneracion, {', '.join(['%s'] * len(TRADICIONAL_COLUMNS))}, Semilla
+        FROM encabezado
+    ),
+    variable AS (
+        INSERT INTO EstadoVariable (reporteid, FechaGeneracion, {', '.join(VARIABLE_COLUMNS)}, Semilla)
+        SELECT reporteid, FechaGeneracion, {', '.join(['%s'] * len(VARIABLE_COLUMNS))}, Semilla
+        FROM encabezado
+    ),
+    punto_equilibrio AS (
+        INSERT INTO PuntoEquilibrio (reporteid, FechaGeneracion, {', '.join(PUNTO_EQUILIBRIO_COLUMNS)}, Semilla)
+        SELECT reporteid, FechaGeneracion, {', '.join(['%s'] * len(PUNTO_EQUILIBRIO_COLUMNS))}, Semilla
+        FROM encabezado
+    )
+    SELECT reporteid FROM encabezado
+    UNION ALL
+    SELECT reporteid FROM Reporte WHERE HashEntradas = %s
+    LIMIT 1
+"""
+
+
+def save_report_params(tradicional, variable, punto_equilibrio, semilla=None, content_hash=None):
+    """Parámetros de SAVE_REPORT_QUERY para un reporte."""
+    return (
+        datetime.datetime.now(), semilla, content_hash,
+        *tradicional, *variable, *punto_equilibrio,
+        content_hash,
+    )
+
+
+def save_report(tradicional, variable, punto_equilibrio, semilla=None, content_hash=None):
+    """
+    Guarda los tres estados de una corrida en una sola transacción y un solo
+    viaje a la base: el ReporteID que genera el encabezado Reporte se
+    reutiliza en las tres tablas de estados mediante un INSERT con CTE, así
+    que o se guarda el reporte completo con el mismo ID o no se guarda nada.
+
+    Con content_hash el guardado es idempotente: si ya existe un reporte con
+    esa huella no se inserta nada y se devuelve su ReporteID.
+
+    Args:
+        tradicional (sequence): Valores en el orden de los argumentos de insert_estado_tradicional.
+        variable (sequence): Valores en el orden de los argumentos de insert_estado_variable.
+        punto_equilibrio (sequence): Valores en el orden de los argumentos de insert_punto_equilibrio.
+        semilla (int, optional): Semilla de la simulación que generó los datos.
+        content_hash (str, optional): Huella de las entradas y la semilla
+            (ver Calculos_Financieros.huella_entradas).
+
+    Returns:
+        int | None: El ReporteID compartido, o None si no se pudo guardar.
+    """
+    with _connection() as conn:
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SAVE_REPORT_QUERY, save_report_params(
+                tradicional, variable, punto_equilibrio, semilla, content_hash))
+            fila = cursor.fetchone()
+            if fila is None:
+                # Otro proceso guardó la misma huella en paralelo; ya está confirmada
+                conn.commit()
+                return _report_ids_by_hash(cursor, [content_hash]).get(content_hash)
+            conn.commit()
+            return fila[0]
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"Error al guardar el reporte: {e}")
+            return None
+        finally:
+            cursor.close()
+
+
+def save_reports(reports):
+    """
+    Guarda varios reportes en una sola transacción con inserciones agrupadas
+    (una sentencia multi-fila por tabla). Los ReporteID se reservan de
+    antemano con nextval, así cada reporte conserva el mismo ID en el
+    encabezado y en las tres tablas de estados. Los reportes cuya huella ya existe (o se repite en el lote) no se
+    vuelven a insertar: se devuelve el ReporteID existente.
+
+    Args:
+        reports (list[tuple]): (tradicional, variable, punto_equilibrio, semilla, content_hash)
+            por reporte, con los valores en el mismo orden que save_report.
+
+    Returns:
+        list[int] | None: Los ReporteID en el orden recibido, o None si no se pudo guardar.
+    """
+    if not reports:
+        return []
+
+    # Huellas repetidas dentro del lote: sólo se inserta la primera
+    nuevos = []
+    vistos = set()
+    for reporte in reports:
+        content_hash = reporte[4]
+        if content_hash is None or content_hash not in vistos:
+            nuevos.append(reporte)
+            vistos.add(content_hash)
+
+    with _connection() as conn:
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence('Reporte', 'reporteid')) "
+                "FROM generate_series(1, %s)",
+                (len(nuevos),),
+            )
+            reservados = [fila[0] for fila in cursor.fetchall()]
+            fecha = datetime.datetime.now()
+
+            insertados = {fila[0] for fila in execute_values(cursor, """
+                INSERT INTO Reporte (reporteid, FechaGeneracion, Semilla, HashEntradas) VALUES %s
+                ON CONFLICT (HashEntradas) DO NOTHING
+                RETURNING reporteid
+            """, [
+                (report_id, fecha, semilla, content_hash)
+                for report_id, (_, _, _, semilla, content_hash) in zip(reservados, nuevos)
+            ], page_size=len(nuevos), fetch=True)}
+            guardados = [(report_id, reporte) for report_id, reporte in zip(reservados, nuevos)
+                         if report_id in insertados]
+
+            if guardados:
+                execute_values(cursor, """
+                    INSERT INTO EstadoTradicional (
+                        reporteid, FechaGeneracion, Ventas, MateriaPrima, ManoDeObra, CIF,
+                        TotalCostoVentas, UtilidadBruta, SalarioAdministracion, SalarioMeseros,
+                        ArrendamientoOyV, DepreciacionOyV, IndustriaComercio,
+                        TotalGastosAdmonVentas, UtilidadOperacional, Semilla
+                    ) VALUES %s
+                """, [
+                    (report_id, fecha, *tradicional, semilla)
+                    for report_id, (tradicional, _, _, semilla, _) in guardados
+                ])
+                execute_values(cursor, """
+                    INSERT INTO EstadoVariable (
+                        reporteid, FechaGeneracion, Ventas, CostoVariableMateriaPrima,
+                        CostoVariableServiciosPublicos, CostoVariableComisiones,
+                        CostoVariableIndustriaComercio, TotalCostosVariables,
+                        MargenContribucion, CostoFijoManoObra, SueldoFijoAdministracion,
+                        SueldoFijoMeseros, Arrendamiento, Depreciacion, TotalCostosFijos,
+                        UtilidadOperacional, RentabilidadVentas, Semilla
+                    ) VALUES %s
+                """, [
+                    (report_id, fecha, *variable, semilla)
+                    for report_id, (_, variable, _, semilla, _) in guardados
+                ])
+                execute_values(cursor, """
+                    INSERT INTO PuntoEquilibrio (
+                        reporteid, FechaGeneracion, PuntoEquilibrioMesUnidades, PuntoEquilibrioDiaUnidades,
+                        PuntoEquilibrioValor, MargenSeguridadPorc, MargenSeguridadValor,
+                        VentasUtilidadObjetivoUnidades, VentasUtilidadObjetivoValor, Semilla
+                    ) VALUES %s
+                """, [
+                    (report_id, fecha, *punto_equilibrio, semilla)
+                    for report_id, (_, _, punto_equilibrio, semilla, _) in guardados
+                ])
+            conn.commit()
+
+            ids_por_hash = {reporte[4]: report_id for report_id, reporte in guardados if reporte[4] is not None}
+            faltantes = {reporte[4] for reporte in reports if reporte[4] is not None} - ids_por_hash.keys()
+            if faltantes:
+                ids_por_hash.update(_report_ids_by_hash(cursor, faltantes))
+            ids_sin_hash = iter(report_id for report_id, reporte in guardados if reporte[4] is None)
+            return [ids_por_hash.get(reporte[4]) if reporte[4] is not None else next(ids_sin_hash)
+                    for reporte in reports]
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"Error al guardar {len(reports)} reportes: {e}")
+            return None
+        finally:
+            cursor.close()
+
+
+# -----------------------------------------------------------------
+# Recuperar Reportes para Comparación
+# -----------------------------------------------------------------
+
+def get_available_reports():
+    """
+    Recupera una lista de tuplas (id, fecha_generacion) de todos los reportes
+    guardados, ordenados por fecha descendente.
+    """
+
+    with _connection() as conn:
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                 SELECT reporteid, FechaGeneracion
+                 FROM Reporte
+                 ORDER BY FechaGeneracion DESC
+            """)
+
+            # Devolvemos el resultado como una lista de tuplas (ID, Fecha)
+            return cursor.fetchall()
+
+        except psycopg2.Error as e:
+            print(f"Error al recuperar la lista de reportes: {e}")
+            return []
+        finally:
+            cursor.close()
+
+
+
+def reports_page_query(limit=REPORT_PAGE_SIZE, after=None, date_from=None, date_to=None, text=None):
+    """(sql, parámetros) de una página de la lista de reportes (ver get_reports_page)."""
+    condiciones = []
+    parametros = []
+    if after is not None:
+        # after es la última fila ya mostrada, tal como la devuelve get_reports_page
+        after_id, after_fecha = after
+        condiciones.append("(FechaGeneracion, reporteid) < (%s, %s)")
+        parametros += [after_fecha, after_id]
+    if date_from is not None:
+        condiciones.append("FechaGeneracion >= %s")
+        parametros.append(date_from)
+    if date_to is not None:
+        condiciones.append("FechaGeneracion < %s")
+        parametros.append(date_to)
+    if text:
+        condiciones.append(
+            "(reporteid::text LIKE %s OR to_char(FechaGeneracion, 'YYYY-MM-DD HH24:MI') LIKE %s"
+            " OR Semilla::text LIKE %s)"
+        )
+        patron = f"%{text.strip()}%"
+        parametros += [patron, patron, patron]
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    return f"""
+        SELECT reporteid, FechaGeneracion
+        FROM Reporte
+        {where}
+        ORDER BY FechaGeneracion DESC, reporteid DESC
+        LIMIT %s
+    """, (*parametros, limit)
+
+
+def get_reports_page(limit=REPORT_PAGE_SIZE, after=None, date_from=None, date_to=None, text=None):
+    """
+    Una página de la lista de reportes, del más reciente al más antiguo.
+
+    La paginación es por llave sobre (FechaGeneracion, reporteid): en vez de
+    OFFSET se pide lo que viene después de la última fila de la página
+    anterior, de modo que cada página es un recorrido corto del índice
+    ix_reporte_fecha_reporteid sin importar cuántos reportes haya.
+
+    Args:
+        limit (int): Filas por página.
+        after (tuple, optional): (reporteid, FechaGeneracion) de la última fila ya mostrada.
+        date_from (datetime, optional): Sólo reportes generados desde esta fecha (inclusive).
+        date_to (datetime, optional): Sólo reportes generados antes de esta fecha (exclusive).
+        text (str, optional): Texto a buscar en el ID, la fecha (AAAA-MM-DD HH:MM) o la semilla.
+
+    Returns:
+        list[tuple] | None: (reporteid, FechaGeneracion) por fila, o None si falló la consulta.
+    """
+    with _connection() as conn:
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute(*reports_page_query(limit, after, date_from, date_to, text))
+            return cursor.fetchall()
+        except psycopg2.Error as e:
+            print(f"Error al recuperar la página de reportes: {e}")
+            return None
+        finally:
+            cursor.close()
+
+
+JOINED_REPORT_QUERY = f"""
+    SELECT r.reporteid, {joined_report_columns()}
+    FROM Reporte r
+    LEFT JOIN EstadoTradicional t ON t.reporteid = r.reporteid
+    LEFT JOIN EstadoVariable v ON v.reporteid = r.reporteid
+    LEFT JOIN PuntoEquilibrio p ON p.reporteid = r.reporteid
+    WHERE r.reporteid = ANY(%s)
+"""
+
+
+def fetch_reports(report_ids):
+    """
+    Recupera los tres estados de varios reportes con una sola consulta
+    (el encabezado Reporte unido con las tres tablas de estados por reporteid).
+
+    Returns:
+        dict | None: {report_id: {"tradicional", "variable", "punto_equilibrio"}}, o None si falló.
+    """
+    with _connection() as conn:
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute(JOINED_REPORT_QUERY, (list(report_ids),))
+            filas = cursor.fetchall()
+        except psycopg2.Error as e:
+            print(f"Error al obtener los reportes {list(report_ids)}: {e}")
+            return None
+        finally:
+            cursor.close()
+
+    return reports_from_rows(filas)
+
+
+def reports_from_rows(filas):
+    """{report_id: reporte} a partir de las filas de JOINED_REPORT_QUERY."""
+    return {fila[0]: split_report_row(fila[1:]) for fila in filas}
+
+
+# -----------------------------------------------------------------
+# Resultados por réplica (Monte Carlo) con COPY
+# -----------------------------------------------------------------
+
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + b"\x00\x00\x00\x00" + b"\x00\x00\x00\x00"
+_PGCOPY_TRAILER = b"\xff\xff"
+
+
+def _replica_row_dtype():
+    """
+    Tipo estructurado de una fila en el formato binario de COPY: número de
+    campos (int16) y, por campo, su largo (int32) seguido del valor, todo en
+    big-endian. Como ninguna columna admite NULL, todas las filas miden lo mismo.
+    """
+    campos = [("nfields", ">i2"),
+              ("len_reporteid", ">i4"), ("reporteid", ">i4"),
+              ("len_replica", ">i4"), ("replica", ">i4")]
+    for columna in REPLICA_COLUMNS.values():
+        campos += [(f"len_{columna}", ">i4"), (columna, ">f8")]
+    return np.dtype(campos)
+
+
+def create_replica_table():
+    """Crea la tabla ResultadoReplica si no existe (es parte de las migraciones del esquema)."""
+    ensure_schema()
+
+
+def copy_replicas(report_id, metricas, chunk_rows=COPY_CHUNK_ROWS):
+    """
+    Guarda las muestras por réplica de una corrida Monte Carlo con
+    COPY ... FROM STDIN en formato binario, armando cada bloque de filas en
+    memoria con numpy (sin un bucle de Python por fila). Todo se escribe en
+    una sola transacción.
+
+    Args:
+        report_id (int): Reporte al que pertenecen las réplicas.
+        metricas (dict): {métrica: np.ndarray}, p. ej. lo que devuelve
+            Simulacion_Monte_Carlo.simular_metricas. Debe traer todas las
+            métricas de REPLICA_COLUMNS con el mismo largo.
+        chunk_rows (int): Filas por sentencia COPY.
+
+    Returns:
+        int | None: Filas guardadas, o None si falló.
+    """
+    columnas = {columna: np.asarray(metricas[metrica], dtype=float)
+                for metrica, columna in REPLICA_COLUMNS.items()}
+    total = len(next(iter(columnas.values())))
+    dtype = _replica_row_dtype()
+    sql = (f"COPY ResultadoReplica (reporteid, Replica, {', '.join(REPLICA_COLUMNS.values())}) "
+           "FROM STDIN WITH (FORMAT binary)")
+
+    with _connection() as conn:
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            for inicio in range(0, total, chunk_rows):
+                fin = min(inicio + chunk_rows, total)
+                filas = np.empty(fin - inicio, dtype=dtype)
+                filas["nfields"] = 2 + len(REPLICA_COLUMNS)
+                filas["len_reporteid"] = 4
+                filas["reporteid"] = report_id
+                filas["len_replica"] = 4
+                filas["replica"] = np.arange(inicio, fin)
+                for columna, valores in columnas.items():
+                    filas[f"len_{columna}"] = 8
+                    filas[columna] = valores[inicio:fin]
+
+                buffer = io.BytesIO()
+                buffer.write(_PGCOPY_HEADER)
+                buffer.write(filas.tobytes())
+                buffer.write(_PGCOPY_TRAILER)
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+            conn.commit()
+            return total
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"Error al copiar las réplicas del reporte {report_id}: {e}")
+            return None
+        finally:
+            cursor.close()
+
+
+def load_replicas(report_id):
+    """
+    Lee las réplicas de un reporte con COPY ... TO STDOUT en formato binario
+    y las devuelve como arreglos, en orden de réplica.
+
+    Returns:
+        dict | None: {métrica: np.ndarray}, o None si falló.
+    """
+    sql = (f"COPY (SELECT reporteid, Replica, {', '.join(REPLICA_COLUMNS.values())} "
+           f"FROM ResultadoReplica WHERE reporteid = {int(report_id)} ORDER BY Replica) "
+           "TO STDOUT WITH (FORMAT binary)")
+
+    with _connection() as conn:
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            buffer = io.BytesIO()
+            cursor.copy_expert(sql, buffer)
+        except psycopg2.Error as e:
+            print(f"Error al leer las réplicas del reporte {report_id}: {e}")
+            return None
+        finally:
+            cursor.close()
+
+    datos = buffer.getbuffer()
+    largo_extension = int.from_bytes(datos[15:19], "big")
+    inicio = 19 + largo_extension
+    filas = np.frombuffer(datos[inicio:len(datos) - len(_PGCOPY_TRAILER)], dtype=_replica_row_dtype())
+    return {metrica: filas[columna].astype(float) for metrica, columna in REPLICA_COLUMNS.items()}
+
+
+def export_replicas(report_id, file, fmt="csv"):
+    """
+    Exporta las réplicas de un reporte con COPY ... TO STDOUT a un archivo
+    abierto (texto para "csv"/"text", binario para "binary").
+
+    Args:
+        report_id (int): Reporte a exportar.
+        file: Objeto tipo archivo con write().
+        fmt (str): "csv" (con encabezado), "text" o "binary".
+
+    Returns:
+        bool: True si la exportación terminó bien.
+    """
+    opciones = {"csv": "FORMAT csv, HEADER", "text": "FORMAT text", "binary": "FORMAT binary"}[fmt]
+    sql = (f"COPY (SELECT Replica, {', '.join(REPLICA_COLUMNS.values())} "
+           f"FROM ResultadoReplica WHERE reporteid = {int(report_id)} ORDER BY Replica) "
+           f"TO STDOUT WITH ({opciones})")
+
+    with _connection() as conn:
+        if not conn:
+            return False
+        cursor = conn.cursor()
+        try:
+            cursor.copy_expert(sql, file)
+            return True
+        except psycopg2.Error as e:
+            print(f"Error al exportar las réplicas del reporte {report_id}: {e}")
+            return False
+        finally:
+            cursor.close()
+
+
+# -----------------------------------------------------------------
+# Historial completo con un cursor del servidor
+# -----------------------------------------------------------------
+
+def stream_report_history(write_batch, fetch_size=EXPORT_FETCH_SIZE, date_from=None, date_to=None):
+    """
+    Recorre el historial de reportes (el encabezado unido con los tres
+    estados, del más antiguo al más reciente) con un cursor con nombre: las
+    filas se quedan en el servidor y llegan de a fetch_size, así que la
+    memoria no depende del tamaño del historial.
+
+    Args:
+        write_batch (callable): write_batch(filas) por cada bloque de tuplas,
+            con las columnas de bd.db_schema.history_columns.
+        fetch_size (int): Filas por FETCH.
+        date_from (datetime, optional): Desde esta fecha (inclusive).
+        date_to (datetime, optional): Hasta esta fecha (exclusive).
+
+    Returns:
+        int | None: Filas recorridas, o None si falló la consulta.
+    """
+    condiciones = []
+    parametros = []
+    if date_from is not None:
+        condiciones.append("r.FechaGeneracion >= %s")
+        parametros.append(date_from)
+    if date_to is not None:
+        condiciones.append("r.FechaGeneracion < %s")
+        parametros.append(date_to)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    # NUMERIC llegaría como Decimal fila por fila; el cast deja floats listos para escribir
+    sql = f"""
+        SELECT {history_select("::double precision")}
+        FROM Reporte r
+        LEFT JOIN EstadoTradicional t ON t.reporteid = r.reporteid
+        LEFT JOIN EstadoVariable v ON v.reporteid = r.reporteid
+        LEFT JOIN PuntoEquilibrio p ON p.reporteid = r.reporteid
+        {where}
+        ORDER BY r.FechaGeneracion, r.reporteid
+    """
+
+    with _connection() as conn:
+        if not conn:
+            return None
+        # Un cursor con nombre vive dentro de una transacción; es de sólo lectura y se descarta al final
+        cursor = conn.cursor(name="historial_reportes")
+        cursor.itersize = fetch_size
+        total = 0
+        try:
+            cursor.execute(sql, parametros)
+            for filas in iter(lambda: cursor.fetchmany(fetch_size), []):
+                write_batch(filas)
+                total += len(filas)
+            return total
+        except psycopg2.Error as e:
+            print(f"Error al exportar el historial de reportes: {e}")
+            return None
+        finally:
+            conn.rollback()
+
+
+# -----------------------------------------------------------------
+# Tendencias (agregados calculados en PostgreSQL)
+# -----------------------------------------------------------------
+
+def get_report_trends(granularity="day", window=7, date_from=None, date_to=None):
+    """
+    Agregados por período de las métricas de TREND_METRICS, calculados en la
+    base: se agrupa con date_trunc y las medias móviles salen de funciones de
+    ventana sobre los períodos, así que a Python sólo llega una fila por período.
+
+    Args:
+        granularity (str): "day", "week" o "month".
+        window (int): Períodos de la media móvil (el actual y los window - 1 anteriores con datos).
+        date_from (datetime, optional): Desde esta fecha (inclusive).
+        date_to (datetime, optional): Hasta esta fecha (exclusive).
+
+    Returns:
+        list[dict] | None: Una fila por período en orden cronológico con "Periodo",
+        "Reportes" y, por métrica, "<Metrica>", "<Metrica>Min", "<Metrica>Max" y
+        "<Metrica>Movil". None si falló la consulta.
+    """
+    if granularity not in TREND_GRANULARITIES:
+        raise ValueError(f"Granularidad no soportada: {granularity}")
+    window = int(window)
+    if window < 1:
+        raise ValueError("La ventana de la media móvil debe ser de al menos un período.")
+
+    condiciones = []
+    parametros = [granularity]
+    if date_from is not None:
+        condiciones.append("t.FechaGeneracion >= %s")
+        parametros.append(date_from)
+    if date_to is not None:
+        condiciones.append("t.FechaGeneracion < %s")
+        parametros.append(date_to)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    agregados = ",\n".join(
+        f"AVG({expresion}) AS {metrica}, MIN({expresion}) AS {metrica}Min, MAX({expresion}) AS {metrica}Max"
+        for metrica, expresion in TREND_METRICS.items()
+    )
+    moviles = ",\n".join(
+        f"AVG({metrica}) OVER ventana AS {metrica}Movil" for metrica in TREND_METRICS
+    )
+    columnas = trend_columns()
+
+    sql = f"""
+        SELECT {', '.join(columnas[:-len(TREND_METRICS)])},
+               {moviles}
+        FROM (
+            SELECT date_trunc(%s, t.FechaGeneracion) AS Periodo,
+                   COUNT(*) AS Reportes,
+                   {agregados}
+            FROM EstadoTradicional t
+            JOIN EstadoVariable v ON v.reporteid = t.reporteid
+            JOIN PuntoEquilibrio p ON p.reporteid = t.reporteid
+            {where}
+            GROUP BY 1
+        ) periodos
+        WINDOW ventana AS (ORDER BY Periodo ROWS BETWEEN {window - 1} PRECEDING AND CURRENT ROW)
+        ORDER BY Periodo
+    """
+
+    with _connection() as conn:
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, parametros)
+            return [
+                {columna: float(valor) if isinstance(valor, Decimal) else valor
+                 for columna, valor in zip(columnas, fila)}
+                for fila in cursor.fetchall()
+            ]
+        except psycopg2.Error as e:
+            print(f"Error al calcular las tendencias: {e}")
+            return None
+        finally:
+            cursor.close()
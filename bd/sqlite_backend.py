@@ -0,0 +1,454 @@
+"""
+Backend de almacenamiento SQLite: un archivo local, sin servidor.
+
+Usa el mismo esquema (tablas y columnas de bd.db_schema, creadas con las
+migraciones de bd.db_migrations) y las mismas funciones que el backend
+PostgreSQL, para instalaciones de un solo usuario y para pruebas de
+rendimiento. El archivo se abre en modo WAL: las lecturas
+no bloquean a la escritura, y cada hilo usa su propia conexión.
+"""
+import atexit
+import csv
+import datetime
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from .db_migrations import migrate_sqlite, schema_version as _schema_version
+from .db_schema import (
+    TRADICIONAL_COLUMNS, VARIABLE_COLUMNS, PUNTO_EQUILIBRIO_COLUMNS,
+    REPORT_PAGE_SIZE, REPLICA_COLUMNS, COPY_CHUNK_ROWS, TREND_METRICS, TREND_GRANULARITIES,
+    EXPORT_FETCH_SIZE, joined_report_columns, history_select, trend_columns, split_report_row,
+)
+
+# Ruta del archivo de la base
+DB_PATH = os.environ.get("ESTADOS_DB_PATH", "estados_financieros.db")
+
+# Segundos que una escritura espera si otra conexión tiene el bloqueo
+BUSY_TIMEOUT = 30
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+# Las fechas se guardan como texto ISO, que ordena igual que la fecha
+sqlite3.register_adapter(datetime.datetime, lambda fecha: fecha.isoformat(" ", timespec="microseconds"))
+sqlite3.register_converter("TIMESTAMP", lambda valor: datetime.datetime.fromisoformat(valor.decode()))
+
+
+def get_connection():
+    """
+    Conexión SQLite del hilo actual (se crea la primera vez, con WAL, llaves
+    foráneas activas y el esquema ya migrado).
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == DB_PATH:
+        return conn
+    try:
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, detect_types=sqlite3.PARSE_DECLTYPES,
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        with _schema_lock:
+            if DB_PATH not in _schema_ready:
+                migrate_sqlite(conn)
+                _schema_ready.add(DB_PATH)
+    except sqlite3.Error as e:
+        print("Error al abrir la base SQLite:", e)
+        return None
+    _local.conn = conn
+    _local.path = DB_PATH
+    with _connections_lock:
+        _connections.append(conn)
+    return conn
+
+
+def close_connections():
+    """Cierra las conexiones abiertas por todos los hilos. Se registra con atexit."""
+    with _connections_lock:
+        for conn in _connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
+    _local.__dict__.clear()
+
+
+atexit.register(close_connections)
+
+
+def ensure_schema():
+    """
+    Aplica las migraciones pendientes (se hace al abrir la primera conexión).
+
+    Returns:
+        bool: True si el esquema está al día.
+    """
+    return get_connection() is not None
+
+
+def schema_version():
+    """Última versión de migración aplicada en el archivo, o None si no se pudo abrir."""
+    conn = get_connection()
+    return _schema_version(conn) if conn else None
+
+
+def _placeholders(n):
+    return ", ".join("?" * n)
+
+
+_INSERT_REPORTE = "INSERT OR IGNORE INTO Reporte (FechaGeneracion, Semilla, HashEntradas) VALUES (?, ?, ?)"
+_INSERT_TRADICIONAL = (
+    f"INSERT INTO EstadoTradicional (reporteid, FechaGeneracion, {', '.join(TRADICIONAL_COLUMNS)}, Semilla) "
+    f"VALUES ({_placeholders(len(TRADICIONAL_COLUMNS) + 3)})"
+)
+_INSERT_VARIABLE = (
+    f"INSERT INTO EstadoVariable (reporteid, FechaGeneracion, {', '.join(VARIABLE_COLUMNS)}, Semilla) "
+    f"VALUES ({_placeholders(len(VARIABLE_COLUMNS) + 3)})"
+)
+_INSERT_PUNTO_EQUILIBRIO = (
+    f"INSERT INTO PuntoEquilibrio (reporteid, FechaGeneracion, {', '.join(PUNTO_EQUILIBRIO_COLUMNS)}, Semilla) "
+    f"VALUES ({_placeholders(len(PUNTO_EQUILIBRIO_COLUMNS) + 3)})"
+)
+
+
+def _insert_single(tabla, columnas, valores, semilla):
+    if len(valores) != len(columnas):
+        raise TypeError(f"{tabla} espera {len(columnas)} valores y recibió {len(valores)}.")
+    conn = get_connection()
+    if not conn:
+        return
+    fecha = datetime.datetime.now()
+    try:
+        with conn:
+            # Cada inserción suelta es un reporte propio, con su encabezado
+            report_id = conn.execute(_INSERT_REPORTE, (fecha, semilla, None)).lastrowid
+            conn.execute(
+                f"INSERT INTO {tabla} (reporteid, FechaGeneracion, {', '.join(columnas)}, Semilla) "
+                f"VALUES ({_placeholders(len(columnas) + 3)})",
+                (report_id, fecha, *valores, semilla),
+            )
+    except sqlite3.Error as e:
+        print(f"Error al insertar en {tabla}: {e}")
+
+
+def insert_estado_tradicional(*valores, semilla=None):
+    _insert_single("EstadoTradicional", TRADICIONAL_COLUMNS, valores, semilla)
+
+
+def insert_estado_variable(*valores, semilla=None):
+    _insert_single("EstadoVariable", VARIABLE_COLUMNS, valores, semilla)
+
+
+def insert_punto_equilibrio(*valores, semilla=None):
+    _insert_single("PuntoEquilibrio", PUNTO_EQUILIBRIO_COLUMNS, valores, semilla)
+
+
+def _save_in_transaction(conn, reports, fecha):
+    """Inserta los reportes dentro de la transacción abierta y devuelve sus ReporteID."""
+    report_ids = []
+    nuevos = []
+    for tradicional, variable, punto_equilibrio, semilla, content_hash in reports:
+        cursor = conn.execute(_INSERT_REPORTE, (fecha, semilla, content_hash))
+        if cursor.rowcount == 0:
+            # Misma huella que un reporte ya guardado (o anterior en el lote)
+            fila = conn.execute("SELECT reporteid FROM Reporte WHERE HashEntradas = ?",
+                                (content_hash,)).fetchone()
+            report_ids.append(fila[0])
+            continue
+        report_ids.append(cursor.lastrowid)
+        nuevos.append((cursor.lastrowid, tradicional, variable, punto_equilibrio, semilla))
+
+    conn.executemany(_INSERT_TRADICIONAL, [
+        (report_id, fecha, *tradicional, semilla) for report_id, tradicional, _, _, semilla in nuevos
+    ])
+    conn.executemany(_INSERT_VARIABLE, [
+        (report_id, fecha, *variable, semilla) for report_id, _, variable, _, semilla in nuevos
+    ])
+    conn.executemany(_INSERT_PUNTO_EQUILIBRIO, [
+        (report_id, fecha, *punto_equilibrio, semilla) for report_id, _, _, punto_equilibrio, semilla in nuevos
+    ])
+    return report_ids
+
+
+def save_report(tradicional, variable, punto_equilibrio, semilla=None, content_hash=None):
+    """Guarda los tres estados con el mismo ReporteID en una transacción (ver bd.db_queries.save_report)."""
+    report_ids = save_reports([(tradicional, variable, punto_equilibrio, semilla, content_hash)])
+    return report_ids[0] if report_ids else None
+
+
+def save_reports(reports):
+    """Guarda varios reportes en una sola transacción (ver bd.db_queries.save_reports)."""
+    if not reports:
+        return []
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        with conn:
+            return _save_in_transaction(conn, reports, datetime.datetime.now())
+    except sqlite3.Error as e:
+        print(f"Error al guardar {len(reports)} reportes: {e}")
+        return None
+
+
+def get_available_reports():
+    conn = get_connection()
+    if not conn:
+        return []
+    try:
+        return conn.execute(
+            "SELECT reporteid, FechaGeneracion FROM Reporte ORDER BY FechaGeneracion DESC"
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error al recuperar la lista de reportes: {e}")
+        return []
+
+
+def get_reports_page(limit=REPORT_PAGE_SIZE, after=None, date_from=None, date_to=None, text=None):
+    """Página de reportes por llave (FechaGeneracion, reporteid) (ver bd.db_queries.get_reports_page)."""
+    condiciones = []
+    parametros = []
+    if after is not None:
+        # after es la última fila ya mostrada, tal como la devuelve esta función
+        after_id, after_fecha = after
+        condiciones.append("(FechaGeneracion, reporteid) < (?, ?)")
+        parametros += [after_fecha, after_id]
+    if date_from is not None:
+        condiciones.append("FechaGeneracion >= ?")
+        parametros.append(date_from)
+    if date_to is not None:
+        condiciones.append("FechaGeneracion < ?")
+        parametros.append(date_to)
+    if text:
+        condiciones.append(
+            "(CAST(reporteid AS TEXT) LIKE ? OR strftime('%Y-%m-%d %H:%M', FechaGeneracion) LIKE ?"
+            " OR CAST(Semilla AS TEXT) LIKE ?)"
+        )
+        patron = f"%{text.strip()}%"
+        parametros += [patron, patron, patron]
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        return conn.execute(f"""
+            SELECT reporteid, FechaGeneracion
+            FROM Reporte
+            {where}
+            ORDER BY FechaGeneracion DESC, reporteid DESC
+            LIMIT ?
+        """, (*parametros, limit)).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error al recuperar la página de reportes: {e}")
+        return None
+
+
+def fetch_reports(report_ids):
+    """Los tres estados de varios reportes en una consulta (ver bd.db_queries.get_reports_data)."""
+    report_ids = list(report_ids)
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        filas = conn.execute(f"""
+            SELECT r.reporteid, {joined_report_columns()}
+            FROM Reporte r
+            LEFT JOIN EstadoTradicional t ON t.reporteid = r.reporteid
+            LEFT JOIN EstadoVariable v ON v.reporteid = r.reporteid
+            LEFT JOIN PuntoEquilibrio p ON p.reporteid = r.reporteid
+            WHERE r.reporteid IN ({_placeholders(len(report_ids))})
+        """, report_ids).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error al obtener los reportes {report_ids}: {e}")
+        return None
+
+    return {fila[0]: split_report_row(fila[1:]) for fila in filas}
+
+
+def create_replica_table():
+    """La tabla ResultadoReplica es parte de las migraciones del esquema; sólo las asegura."""
+    ensure_schema()
+
+
+def copy_replicas(report_id, metricas, chunk_rows=COPY_CHUNK_ROWS):
+    """
+    Guarda las muestras por réplica con executemany por bloques, en una sola
+    transacción (SQLite no tiene COPY; ver bd.db_queries.copy_replicas).
+    """
+    columnas = [np.asarray(metricas[metrica], dtype=float) for metrica in REPLICA_COLUMNS]
+    total = len(columnas[0])
+    sql = (f"INSERT INTO ResultadoReplica (reporteid, Replica, {', '.join(REPLICA_COLUMNS.values())}) "
+           f"VALUES ({_placeholders(len(REPLICA_COLUMNS) + 2)})")
+
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        with conn:
+            for inicio in range(0, total, chunk_rows):
+                fin = min(inicio + chunk_rows, total)
+                bloque = [columna[inicio:fin].tolist() for columna in columnas]
+                conn.executemany(sql, zip([int(report_id)] * (fin - inicio), range(inicio, fin), *bloque))
+        return total
+    except sqlite3.Error as e:
+        print(f"Error al copiar las réplicas del reporte {report_id}: {e}")
+        return None
+
+
+def _select_replicas(conn, report_id, con_reporte=True):
+    inicio = "reporteid, " if con_reporte else ""
+    return conn.execute(
+        f"SELECT {inicio}Replica, {', '.join(REPLICA_COLUMNS.values())} "
+        "FROM ResultadoReplica WHERE reporteid = ? ORDER BY Replica",
+        (int(report_id),),
+    )
+
+
+def load_replicas(report_id):
+    """Réplicas de un reporte como {métrica: np.ndarray} (ver bd.db_queries.load_replicas)."""
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        filas = _select_replicas(conn, report_id, con_reporte=False).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error al leer las réplicas del reporte {report_id}: {e}")
+        return None
+    datos = np.array(filas, dtype=float).reshape(-1, len(REPLICA_COLUMNS) + 1)
+    return {metrica: datos[:, k + 1].copy() for k, metrica in enumerate(REPLICA_COLUMNS)}
+
+
+def export_replicas(report_id, file, fmt="csv"):
+    """Exporta las réplicas a un archivo de texto: "csv" (con encabezado) o "text" (tabulado)."""
+    if fmt not in ("csv", "text"):
+        print(f"Formato de exportación no soportado en SQLite: {fmt}")
+        return False
+    conn = get_connection()
+    if not conn:
+        return False
+    try:
+        cursor = _select_replicas(conn, report_id, con_reporte=False)
+        if fmt == "csv":
+            writer = csv.writer(file, lineterminator="\n")
+            writer.writerow(["replica", *(columna.lower() for columna in REPLICA_COLUMNS.values())])
+        else:
+            writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+        for filas in iter(lambda: cursor.fetchmany(COPY_CHUNK_ROWS), []):
+            writer.writerows(filas)
+        return True
+    except sqlite3.Error as e:
+        print(f"Error al exportar las réplicas del reporte {report_id}: {e}")
+        return False
+
+
+def stream_report_history(write_batch, fetch_size=EXPORT_FETCH_SIZE, date_from=None, date_to=None):
+    """
+    Recorre el historial de reportes de a fetch_size filas (SQLite avanza el
+    cursor a medida que se piden, sin materializar el resultado; ver
+    bd.db_queries.export_report_history).
+    """
+    condiciones = []
+    parametros = []
+    if date_from is not None:
+        condiciones.append("r.FechaGeneracion >= ?")
+        parametros.append(date_from)
+    if date_to is not None:
+        condiciones.append("r.FechaGeneracion < ?")
+        parametros.append(date_to)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    conn = get_connection()
+    if not conn:
+        return None
+    total = 0
+    try:
+        cursor = conn.execute(f"""
+            SELECT {history_select()}
+            FROM Reporte r
+            LEFT JOIN EstadoTradicional t ON t.reporteid = r.reporteid
+            LEFT JOIN EstadoVariable v ON v.reporteid = r.reporteid
+            LEFT JOIN PuntoEquilibrio p ON p.reporteid = r.reporteid
+            {where}
+            ORDER BY r.FechaGeneracion, r.reporteid
+        """, parametros)
+        for filas in iter(lambda: cursor.fetchmany(fetch_size), []):
+            write_batch(filas)
+            total += len(filas)
+        return total
+    except sqlite3.Error as e:
+        print(f"Error al exportar el historial de reportes: {e}")
+        return None
+
+
+# Equivalente de date_trunc para cada granularidad (las semanas empiezan el lunes, como en PostgreSQL)
+_TRUNCATE = {
+    "day": "date(t.FechaGeneracion)",
+    "week": "date(t.FechaGeneracion, '-' || ((CAST(strftime('%w', t.FechaGeneracion) AS INTEGER) + 6) % 7) || ' days')",
+    "month": "strftime('%Y-%m-01', t.FechaGeneracion)",
+}
+
+
+def get_report_trends(granularity="day", window=7, date_from=None, date_to=None):
+    """Agregados por período con medias móviles (ver bd.db_queries.get_report_trends)."""
+    if granularity not in TREND_GRANULARITIES:
+        raise ValueError(f"Granularidad no soportada: {granularity}")
+    window = int(window)
+    if window < 1:
+        raise ValueError("La ventana de la media móvil debe ser de al menos un período.")
+
+    condiciones = []
+    parametros = []
+    if date_from is not None:
+        condiciones.append("t.FechaGeneracion >= ?")
+        parametros.append(date_from)
+    if date_to is not None:
+        condiciones.append("t.FechaGeneracion < ?")
+        parametros.append(date_to)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    agregados = ",\n".join(
+        f"AVG({expresion}) AS {metrica}, MIN({expresion}) AS {metrica}Min, MAX({expresion}) AS {metrica}Max"
+        for metrica, expresion in TREND_METRICS.items()
+    )
+    moviles = ",\n".join(f"AVG({metrica}) OVER ventana AS {metrica}Movil" for metrica in TREND_METRICS)
+    columnas = trend_columns()
+
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        filas = conn.execute(f"""
+            SELECT {', '.join(columnas[:-len(TREND_METRICS)])},
+                   {moviles}
+            FROM (
+                SELECT {_TRUNCATE[granularity]} AS Periodo,
+                       COUNT(*) AS Reportes,
+                       {agregados}
+                FROM EstadoTradicional t
+                JOIN EstadoVariable v ON v.reporteid = t.reporteid
+                JOIN PuntoEquilibrio p ON p.reporteid = t.reporteid
+                {where}
+                GROUP BY 1
+            ) periodos
+            WINDOW ventana AS (ORDER BY Periodo ROWS BETWEEN {window - 1} PRECEDING AND CURRENT ROW)
+            ORDER BY Periodo
+        """, parametros).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error al calcular las tendencias: {e}")
+        return None
+
+    tendencias = []
+    for fila in filas:
+        datos = dict(zip(columnas, fila))
+        datos["Periodo"] = datetime.datetime.fromisoformat(datos["Periodo"])
+        tendencias.append(datos)
+    return tendencias
@@ -0,0 +1,50 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+# Los módulos de la aplicación viven en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bd import db_queries  # noqa: E402
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def backend(request, tmp_path, monkeypatch):
+    """
+    bd.db_queries sobre una base vacía del backend indicado. SQLite usa un
+    archivo temporal; PostgreSQL necesita ESTADOS_TEST_DATABASE_URL y trabaja
+    en un esquema propio que se borra al terminar.
+    """
+    monkeypatch.setattr(db_queries, "_backend", None)
+    if request.param == "sqlite":
+        from bd import sqlite_backend
+
+        monkeypatch.setattr(sqlite_backend, "DB_PATH", str(tmp_path / "estados.db"))
+        yield db_queries.set_backend("sqlite")
+        sqlite_backend.close_connections()
+        return
+
+    psycopg2 = pytest.importorskip("psycopg2")
+    dsn = os.environ.get("ESTADOS_TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("ESTADOS_TEST_DATABASE_URL no está definida")
+    from bd import db_connection, postgres_backend
+
+    esquema = f"prueba_{uuid.uuid4().hex[:12]}"
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {esquema}")
+    config = psycopg2.extensions.parse_dsn(dsn)
+    config["database"] = config.pop("dbname", db_connection.DB_CONFIG["database"])
+    monkeypatch.setattr(postgres_backend, "_schema_ready", False)
+    db_connection.init_pool(replace=True, options=f"-c search_path={esquema}", **config)
+    try:
+        yield db_queries.set_backend("postgres")
+    finally:
+        db_connection.close_pool()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {esquema} CASCADE")
+        conn.close()
@@ -0,0 +1,74 @@
+"""
+Almacén de corridas en disco: ida y vuelta de las columnas, rubros fijos en
+metadata.json, límite de corridas y limpieza de corridas incompletas.
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+import Almacen_Corridas
+from Almacen_Corridas import (
+    METADATA, EscritorCorrida, abrir_corrida, columnas_corrida, guardar_corrida, lineas_estados,
+    listar_corridas,
+)
+from Calculos_Financieros import EntradasFinancieras
+from Simulacion_Monte_Carlo import SIM_PARAMS_DEFECTO, simular_muestras
+
+
+@pytest.fixture
+def muestras():
+    entradas = EntradasFinancieras()
+    almuerzos, carne = simular_muestras(entradas, SIM_PARAMS_DEFECTO, 2_500, semilla=11)
+    return entradas, almuerzos, carne
+
+
+def test_corrida_ida_y_vuelta(tmp_path, muestras):
+    entradas, almuerzos, carne = muestras
+    ruta = guardar_corrida("montecarlo", almuerzos, carne, entradas, 11, {"Muestreo": "random"},
+                           directorio=tmp_path, bloque_filas=1_000)
+
+    corrida = abrir_corrida(ruta)
+    assert corrida.columnas == columnas_corrida()
+    assert (corrida.tipo, corrida.semilla, corrida.filas) == ("montecarlo", 11, len(almuerzos))
+    assert corrida.entradas() == entradas
+    esperadas = lineas_estados(entradas, almuerzos, carne)
+    for columna in corrida.columnas:
+        np.testing.assert_array_equal(corrida[columna], np.broadcast_to(esperadas[columna], almuerzos.shape))
+
+
+def test_rubros_fijos_van_en_metadata(tmp_path, muestras):
+    entradas, almuerzos, carne = muestras
+    ruta = guardar_corrida("montecarlo", almuerzos, carne, entradas, 11, directorio=tmp_path)
+
+    with open(os.path.join(ruta, METADATA), encoding="utf-8") as archivo:
+        columnas = json.load(archivo)["columnas"]
+    constantes = [columna["nombre"] for columna in columnas if "valor" in columna]
+    assert "Variable: Arrendamiento" in constantes
+    # Sólo las columnas que cambian entre filas tienen archivo
+    archivos = {nombre for nombre in os.listdir(ruta) if nombre.endswith(".npy")}
+    assert len(archivos) == len(columnas) - len(constantes)
+
+    arriendo = abrir_corrida(ruta)["Variable: Arrendamiento"]
+    assert arriendo.shape == almuerzos.shape
+    assert not arriendo.flags.writeable
+
+
+def test_se_conservan_las_corridas_mas_recientes(tmp_path, muestras):
+    entradas, almuerzos, carne = muestras
+    for semilla in range(5):
+        guardar_corrida("diaria", almuerzos[:30], carne[:30], entradas, semilla, directorio=tmp_path, maximo=3)
+
+    assert [corrida.semilla for corrida in listar_corridas(tmp_path)] == [4, 3, 2]
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_cierre_fallido_no_deja_carpeta(tmp_path, monkeypatch):
+    escritor = EscritorCorrida("diaria", 1, directorio=tmp_path)
+    escritor.agregar({"Almuerzos": np.arange(3)})
+    monkeypatch.setattr(Almacen_Corridas.json, "dump", lambda *args, **kwargs: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        escritor.cerrar()
+    assert os.listdir(tmp_path) == []
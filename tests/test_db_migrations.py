@@ -0,0 +1,161 @@
+"""
+Migraciones del esquema a partir de bases existentes.
+
+La prueba de PostgreSQL parte de las tablas que creaba la versión original
+de la aplicación (sin Semilla ni HashEntradas) y necesita un servidor: se
+indica con ESTADOS_TEST_DATABASE_URL (p. ej.
+"host=localhost dbname=pruebas user=postgres"); sin ella se omite. Cada
+prueba trabaja en un esquema propio que se borra al terminar.
+"""
+import datetime
+import os
+import sqlite3
+import threading
+import uuid
+
+import pytest
+
+from bd import db_migrations
+from bd.db_schema import TRADICIONAL_COLUMNS, VARIABLE_COLUMNS, PUNTO_EQUILIBRIO_COLUMNS
+
+ESTADOS = {
+    "EstadoTradicional": TRADICIONAL_COLUMNS,
+    "EstadoVariable": VARIABLE_COLUMNS,
+    "PuntoEquilibrio": PUNTO_EQUILIBRIO_COLUMNS,
+}
+
+FECHAS = (datetime.datetime(2025, 11, 3, 9, 30), datetime.datetime(2026, 2, 1, 18, 5))
+
+
+@pytest.fixture
+def pg_conn():
+    psycopg2 = pytest.importorskip("psycopg2")
+    dsn = os.environ.get("ESTADOS_TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("ESTADOS_TEST_DATABASE_URL no está definida")
+    conn = psycopg2.connect(dsn)
+    esquema = f"prueba_{uuid.uuid4().hex[:12]}"
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {esquema}")
+        cursor.execute(f"SET search_path TO {esquema}")
+    conn.commit()
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {esquema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+def _crear_esquema_original(cursor, marcador="%s"):
+    """Las tres tablas como las tenía la aplicación original: ReporteID, fecha y valores."""
+    for tabla, columnas in ESTADOS.items():
+        cursor.execute(f"""
+            CREATE TABLE {tabla} (
+                ReporteID SERIAL PRIMARY KEY,
+                FechaGeneracion TIMESTAMP,
+                {", ".join(f"{columna} NUMERIC" for columna in columnas)}
+            )""")
+        for fecha in FECHAS:
+            cursor.execute(
+                f"INSERT INTO {tabla} (FechaGeneracion, {', '.join(columnas)}) "
+                f"VALUES ({', '.join([marcador] * (len(columnas) + 1))})",
+                (fecha, *range(len(columnas))),
+            )
+
+
+def test_postgres_migra_desde_esquema_original(pg_conn):
+    from bd.postgres_backend import SAVE_REPORT_QUERY, save_report_params
+
+    with pg_conn.cursor() as cursor:
+        _crear_esquema_original(cursor)
+    pg_conn.commit()
+
+    versiones = [migration.version for migration in db_migrations.POSTGRES_MIGRATIONS]
+    assert db_migrations.migrate_postgres(pg_conn) == versiones
+    assert db_migrations.schema_version(pg_conn) == versiones[-1]
+    # Una segunda pasada no tiene nada que aplicar
+    assert db_migrations.migrate_postgres(pg_conn) == []
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT reporteid, FechaGeneracion, Semilla FROM Reporte ORDER BY reporteid")
+        assert cursor.fetchall() == [(1, FECHAS[0], None), (2, FECHAS[1], None)]
+
+        for tabla in ESTADOS:
+            cursor.execute(f"SELECT reporteid, FechaGeneracion FROM {tabla} ORDER BY reporteid")
+            assert cursor.fetchall() == [(1, FECHAS[0]), (2, FECHAS[1])]
+            cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (tabla,))
+            assert cursor.fetchone()[0] == "p"
+            # Cada fila quedó en la partición de su mes, no en la DEFAULT
+            cursor.execute(f"SELECT count(*) FROM {tabla}_default")
+            assert cursor.fetchone()[0] == 0
+
+        # Después de migrar, un guardado completo (con semilla y huella) funciona
+        cursor.execute(SAVE_REPORT_QUERY, save_report_params(
+            range(len(TRADICIONAL_COLUMNS)), range(len(VARIABLE_COLUMNS)), range(len(PUNTO_EQUILIBRIO_COLUMNS)),
+            semilla=1234, content_hash="a" * 64,
+        ))
+        report_id = cursor.fetchone()[0]
+        assert report_id == 3
+        cursor.execute("SELECT Semilla FROM EstadoVariable WHERE reporteid = %s", (report_id,))
+        assert cursor.fetchone()[0] == 1234
+    pg_conn.commit()
+
+
+def test_postgres_particiones_esperan_el_candado_de_migracion(pg_conn):
+    import psycopg2
+
+    db_migrations.migrate_postgres(pg_conn)
+    db_migrations.create_monthly_partitions(pg_conn)
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SHOW search_path")
+        esquema = cursor.fetchone()[0]
+        # Falta la partición del mes en curso, como al arrancar en un cambio de mes
+        cursor.execute("SELECT to_char(LOCALTIMESTAMP, 'YYYYMM')")
+        cursor.execute(f"DROP TABLE estadotradicional_{cursor.fetchone()[0]}")
+    pg_conn.commit()
+
+    # Otro proceso está migrando (o creando particiones)
+    otro = psycopg2.connect(os.environ["ESTADOS_TEST_DATABASE_URL"])
+    try:
+        with otro.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", (db_migrations.MIGRATION_LOCK_ID,))
+        resultado = {}
+        hilo = threading.Thread(target=lambda: resultado.update(creadas=db_migrations.create_monthly_partitions(pg_conn)))
+        hilo.start()
+        hilo.join(0.5)
+        assert hilo.is_alive()
+
+        with otro.cursor() as cursor:
+            cursor.execute(f"SET search_path TO {esquema}")
+            cursor.execute("SELECT CrearParticionesMensuales('EstadoTradicional', LOCALTIMESTAMP, LOCALTIMESTAMP)")
+            otro.commit()
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (db_migrations.MIGRATION_LOCK_ID,))
+        hilo.join(5)
+    finally:
+        otro.close()
+
+    # La partición ya la creó el otro proceso: ésta no la repite ni falla
+    assert resultado == {"creadas": 0}
+
+
+def test_sqlite_migra_desde_version_1(tmp_path):
+    conn = sqlite3.connect(tmp_path / "estados.db", detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.execute(db_migrations.CREATE_VERSION_TABLE)
+    conn.execute("INSERT INTO SchemaVersion VALUES (1, 'v1', '2025-01-01 00:00:00')")
+    conn.executescript(db_migrations.SQLITE_MIGRATIONS[0].sql)
+    for tabla, columnas in ESTADOS.items():
+        conn.executemany(
+            f"INSERT INTO {tabla} (FechaGeneracion, {', '.join(columnas)}, Semilla) "
+            f"VALUES ({', '.join('?' * (len(columnas) + 2))})",
+            [(fecha, *range(len(columnas)), 7) for fecha in FECHAS],
+        )
+    conn.commit()
+
+    assert db_migrations.migrate_sqlite(conn) == [2]
+    assert db_migrations.schema_version(conn) == 2
+    assert conn.execute("SELECT reporteid, Semilla FROM Reporte ORDER BY reporteid").fetchall() == [(1, 7), (2, 7)]
+    assert conn.execute("PRAGMA foreign_key_list(EstadoVariable)").fetchall()[0][2] == "Reporte"
+    conn.close()
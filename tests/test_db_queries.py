@@ -0,0 +1,152 @@
+"""
+Guardado y lectura de reportes a través de bd.db_queries, contra SQLite y,
+si ESTADOS_TEST_DATABASE_URL está definida, contra PostgreSQL (ver el
+fixture backend en conftest.py).
+"""
+import pytest
+
+from bd import db_queries
+from bd.db_schema import TRADICIONAL_COLUMNS, VARIABLE_COLUMNS, PUNTO_EQUILIBRIO_COLUMNS
+
+
+def _reporte(base):
+    """Valores de los tres estados, distintos por columna y por reporte."""
+    return (
+        [base + i for i in range(len(TRADICIONAL_COLUMNS))],
+        [base + 100 + i for i in range(len(VARIABLE_COLUMNS))],
+        [base + 200 + i for i in range(len(PUNTO_EQUILIBRIO_COLUMNS))],
+    )
+
+
+def _huella(n):
+    """Huella con el largo de huella_entradas (SHA-256 en hexadecimal)."""
+    return f"{n:064x}"
+
+
+def _valores(estado, columnas):
+    return [float(estado[columna]) for columna in columnas]
+
+
+def test_save_report_comparte_el_reporteid(backend):
+    tradicional, variable, punto_equilibrio = _reporte(1000)
+    report_id = db_queries.save_report(tradicional, variable, punto_equilibrio, semilla=42)
+    assert report_id is not None
+
+    reporte = db_queries.get_reports_data([report_id])[report_id]
+    assert {reporte[estado]["reporteid"] for estado in reporte} == {report_id}
+    assert len({reporte[estado]["FechaGeneracion"] for estado in reporte}) == 1
+    assert _valores(reporte["tradicional"], TRADICIONAL_COLUMNS) == tradicional
+    assert _valores(reporte["variable"], VARIABLE_COLUMNS) == variable
+    assert _valores(reporte["punto_equilibrio"], PUNTO_EQUILIBRIO_COLUMNS) == punto_equilibrio
+    assert [fila[0] for fila in db_queries.get_available_reports()] == [report_id]
+
+
+def test_save_reports_guarda_el_lote_en_orden(backend):
+    report_ids = db_queries.save_reports([(*_reporte(base), base, None) for base in (10, 20, 30)])
+    assert len(set(report_ids)) == 3
+
+    reportes = db_queries.get_reports_data(report_ids)
+    assert [reportes[report_id]["tradicional"]["Ventas"] for report_id in report_ids] == [10, 20, 30]
+
+
+def test_save_report_es_idempotente_con_huella(backend):
+    primero = db_queries.save_report(*_reporte(1), semilla=5, content_hash=_huella(1))
+    assert db_queries.save_report(*_reporte(1), semilla=5, content_hash=_huella(1)) == primero
+    # Sin huella cada guardado es un reporte nuevo
+    sin_huella = {db_queries.save_report(*_reporte(1), semilla=5) for _ in range(2)}
+    assert len(sin_huella) == 2 and primero not in sin_huella
+    assert len(db_queries.get_available_reports()) == 3
+
+
+def test_save_reports_es_idempotente_con_huella(backend):
+    existente = db_queries.save_report(*_reporte(1), semilla=1, content_hash=_huella(1))
+    lote = [
+        (*_reporte(1), 1, _huella(1)),     # ya guardado
+        (*_reporte(2), 2, _huella(2)),
+        (*_reporte(3), 3, None),
+        (*_reporte(2), 2, _huella(2)),     # repetido dentro del lote
+    ]
+    report_ids = db_queries.save_reports(lote)
+    assert report_ids[0] == existente
+    assert report_ids[1] == report_ids[3] != existente
+    assert len(set(report_ids)) == 3
+
+    # Repetir el lote sólo agrega el reporte sin huella
+    otra_vez = db_queries.save_reports(lote)
+    assert [otra_vez[i] for i in (0, 1, 3)] == [report_ids[i] for i in (0, 1, 3)]
+    assert otra_vez[2] not in report_ids
+    assert len(db_queries.get_available_reports()) == 4
+
+
+@pytest.fixture
+def consultas(backend, monkeypatch):
+    """Registra los IDs que get_reports_data pide al backend en cada consulta."""
+    pedidos = []
+    fetch_reports = backend.fetch_reports
+
+    def contar(report_ids):
+        pedidos.append(sorted(report_ids))
+        return fetch_reports(report_ids)
+
+    monkeypatch.setattr(backend, "fetch_reports", contar)
+    return pedidos
+
+
+def test_get_reports_data_sirve_lo_leido_desde_la_cache(consultas):
+    uno, dos, tres = db_queries.save_reports([(*_reporte(base), None, None) for base in (1, 2, 3)])
+
+    primera = db_queries.get_reports_data([uno, dos])
+    assert db_queries.get_reports_data([dos, uno]) == primera
+    assert db_queries.get_reports_data([uno, tres])[tres]["tradicional"]["Ventas"] == 3
+    # Sólo se consultó lo que no estaba en la caché
+    assert consultas == [sorted([uno, dos]), [tres]]
+
+
+def test_get_reports_data_no_guarda_ids_inexistentes(consultas):
+    report_id = db_queries.save_report(*_reporte(1))
+    assert list(db_queries.get_reports_data([report_id, 999])) == [report_id]
+    assert list(db_queries.get_reports_data([999])) == []
+    assert consultas == [sorted([report_id, 999]), [999]]
+
+
+def test_la_cache_descarta_el_menos_usado(consultas, monkeypatch):
+    monkeypatch.setattr(db_queries, "REPORT_CACHE_SIZE", 2)
+    uno, dos, tres = db_queries.save_reports([(*_reporte(base), None, None) for base in (1, 2, 3)])
+
+    db_queries.get_reports_data([uno])
+    db_queries.get_reports_data([dos])
+    db_queries.get_reports_data([uno])      # uno pasa a ser el más reciente
+    db_queries.get_reports_data([tres])     # sale dos
+    consultas.clear()
+    db_queries.get_reports_data([uno, tres])
+    db_queries.get_reports_data([dos])
+    assert consultas == [[dos]]
+
+
+def test_cambiar_de_backend_vacia_la_cache(consultas, backend):
+    report_id = db_queries.save_report(*_reporte(1))
+    db_queries.get_reports_data([report_id])
+    db_queries.set_backend(backend)
+    db_queries.get_reports_data([report_id])
+    assert consultas == [[report_id], [report_id]]
+
+
+def test_get_reports_page_pagina_por_llave_sin_repetir(backend):
+    # Un lote comparte FechaGeneracion: el desempate por reporteid también cuenta
+    db_queries.save_reports([(*_reporte(base), None, None) for base in range(4)])
+    for base in range(4, 7):
+        db_queries.save_report(*_reporte(base))
+
+    pagina_1 = db_queries.get_reports_page(limit=3)
+    pagina_2 = db_queries.get_reports_page(limit=3, after=pagina_1[-1])
+    assert len(pagina_1) == len(pagina_2) == 3
+    assert not {fila[0] for fila in pagina_1} & {fila[0] for fila in pagina_2}
+
+    filas = list(pagina_1 + pagina_2)
+    while True:
+        pagina = db_queries.get_reports_page(limit=3, after=filas[-1])
+        if not pagina:
+            break
+        filas += pagina
+    assert len({fila[0] for fila in filas}) == len(filas) == 7
+    assert filas == sorted(filas, key=lambda fila: (fila[1], fila[0]), reverse=True)
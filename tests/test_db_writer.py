@@ -0,0 +1,75 @@
+"""
+Escritor de reportes en segundo plano, sin base de datos: save_reports se
+reemplaza por una función que el hilo escritor puede dejar esperando.
+"""
+import queue
+import threading
+import time
+
+import pytest
+
+from bd import db_writer
+
+
+@pytest.fixture
+def escritor_detenido(monkeypatch):
+    """ReportWriter con una cola de un lugar y un hilo escritor que no termina hasta liberar."""
+    liberar = threading.Event()
+    guardados = []
+
+    def save_reports(lote):
+        liberar.wait()
+        guardados.extend(lote)
+        return list(range(len(lote)))
+
+    monkeypatch.setattr(db_writer, "save_reports", save_reports)
+    escritor = db_writer.ReportWriter(max_pending=1, batch_size=1)
+    try:
+        yield escritor, liberar, guardados
+    finally:
+        liberar.set()
+        escritor.close(timeout=2)
+
+
+def _llenar(escritor):
+    """Un reporte lo toma el hilo (que queda esperando) y otro ocupa la cola."""
+    escritor.submit(1, 2, 3)
+    for _ in range(200):
+        if escritor.queue_depth == 0:
+            break
+        time.sleep(0.005)
+    escritor.submit(4, 5, 6)
+
+
+def test_submit_respeta_un_solo_timeout(escritor_detenido):
+    escritor, _, _ = escritor_detenido
+    _llenar(escritor)
+
+    # Otro submit tiene el candado la mayor parte del plazo; la espera en la
+    # cola sólo puede usar lo que queda de él
+    escritor._submit_lock.acquire()
+    threading.Timer(0.3, escritor._submit_lock.release).start()
+    inicio = time.monotonic()
+    with pytest.raises(queue.Full):
+        escritor.submit(7, 8, 9, timeout=0.4)
+    assert time.monotonic() - inicio < 0.6
+    assert escritor.stats()["pending"] == 2
+
+
+def test_submit_sin_bloquear_con_cola_llena(escritor_detenido):
+    escritor, _, _ = escritor_detenido
+    _llenar(escritor)
+    with pytest.raises(queue.Full):
+        escritor.submit(7, 8, 9, block=False)
+
+
+def test_close_guarda_lo_pendiente_y_rechaza_submit(escritor_detenido):
+    escritor, liberar, guardados = escritor_detenido
+    _llenar(escritor)
+    liberar.set()
+    escritor.close(timeout=2)
+
+    assert [reporte[:3] for reporte in guardados] == [(1, 2, 3), (4, 5, 6)]
+    assert escritor.stats()["written"] == 2
+    with pytest.raises(RuntimeError):
+        escritor.submit(1, 2, 3)
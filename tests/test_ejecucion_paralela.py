@@ -0,0 +1,39 @@
+"""
+Ejecución paralela: reproducibilidad bit a bit y validación de argumentos.
+"""
+import pytest
+
+from Calculos_Financieros import EntradasFinancieras
+from Ejecucion_Paralela import _dividir_replicaciones, simular_en_paralelo
+from Simulacion_Monte_Carlo import METRICAS, SIM_PARAMS_DEFECTO
+
+
+def test_misma_semilla_y_trabajadores_da_el_mismo_resultado():
+    primera = simular_en_paralelo(EntradasFinancieras(), SIM_PARAMS_DEFECTO, 20_001, semilla=7, trabajadores=3)
+    segunda = simular_en_paralelo(EntradasFinancieras(), SIM_PARAMS_DEFECTO, 20_001, semilla=7, trabajadores=3)
+
+    assert primera.resumen == segunda.resumen
+    assert (primera.replicaciones, primera.trabajadores) == (20_001, 3)
+    assert list(primera.resumen) == list(METRICAS)
+
+
+def test_otra_semilla_da_otro_resultado():
+    primera = simular_en_paralelo(EntradasFinancieras(), SIM_PARAMS_DEFECTO, 5_000, semilla=7, trabajadores=2)
+    otra = simular_en_paralelo(EntradasFinancieras(), SIM_PARAMS_DEFECTO, 5_000, semilla=8, trabajadores=2)
+    assert primera.resumen != otra.resumen
+
+
+def test_mas_trabajadores_que_replicas():
+    resultado = simular_en_paralelo(EntradasFinancieras(), SIM_PARAMS_DEFECTO, 2, semilla=1, trabajadores=4)
+    assert (resultado.replicaciones, resultado.trabajadores) == (2, 2)
+
+
+@pytest.mark.parametrize("replicaciones", [0, -5])
+def test_rechaza_replicas_no_positivas(replicaciones):
+    with pytest.raises(ValueError):
+        simular_en_paralelo(EntradasFinancieras(), SIM_PARAMS_DEFECTO, replicaciones, semilla=1, trabajadores=2)
+
+
+def test_reparto_de_replicas():
+    assert _dividir_replicaciones(10, 3) == [4, 3, 3]
+    assert sum(_dividir_replicaciones(1_000_003, 8)) == 1_000_003
@@ -0,0 +1,72 @@
+"""
+AcumuladorEstadistico: momentos exactos al fusionar por bloques y precisión
+de los cuantiles aproximados.
+"""
+import numpy as np
+import pytest
+
+from Estadisticas_Streaming import AcumuladorEstadistico
+
+
+@pytest.fixture
+def datos():
+    rng = np.random.default_rng(2024)
+    # Una mezcla asimétrica, para que los cuantiles no sean triviales
+    return np.concatenate([rng.normal(100, 15, 60_000), rng.exponential(40, 40_000) + 150])
+
+
+def _por_bloques(datos, tamanos):
+    acumulador = AcumuladorEstadistico(rango_histograma=(0, 500), bins=25)
+    for bloque in np.split(datos, np.cumsum(tamanos)[:-1]):
+        acumulador.actualizar(bloque)
+    return acumulador
+
+
+def test_fusionar_da_los_mismos_momentos_que_una_pasada(datos):
+    completo = _por_bloques(datos, [datos.size])
+    partes = [_por_bloques(parte, [parte.size // 3, parte.size - parte.size // 3])
+              for parte in np.array_split(datos, 4)]
+    fusionado = partes[0]
+    for parte in partes[1:]:
+        fusionado.fusionar(parte)
+
+    assert fusionado.n == completo.n == datos.size
+    assert fusionado.media == pytest.approx(datos.mean(), rel=1e-12)
+    assert fusionado.varianza == pytest.approx(datos.var(ddof=1), rel=1e-10)
+    assert (fusionado.minimo, fusionado.maximo) == (datos.min(), datos.max())
+    np.testing.assert_array_equal(fusionado.histograma()[0], completo.histograma()[0])
+    assert fusionado.histograma()[3] == int(np.count_nonzero(datos > 500))
+
+
+def test_fusionar_con_vacio_no_cambia_nada(datos):
+    acumulador = AcumuladorEstadistico().actualizar(datos)
+    antes = acumulador.resumen()
+    acumulador.fusionar(AcumuladorEstadistico())
+    assert acumulador.resumen() == antes
+
+    vacio = AcumuladorEstadistico().fusionar(acumulador)
+    assert vacio.media == pytest.approx(acumulador.media)
+    assert vacio.n == acumulador.n
+
+
+@pytest.mark.parametrize("q", [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99])
+def test_cuantiles_aproximados(datos, q):
+    fusionado = AcumuladorEstadistico()
+    for parte in np.array_split(datos, 7):
+        fusionado.fusionar(AcumuladorEstadistico().actualizar(parte))
+
+    # El error se mide en rango: el cuantil estimado debe caer cerca del pedido
+    rango = np.mean(datos <= fusionado.cuantil(q))
+    assert rango == pytest.approx(q, abs=0.002)
+
+
+def test_histogramas_distintos_no_se_fusionan():
+    uno = AcumuladorEstadistico(rango_histograma=(0, 10)).actualizar([1, 2])
+    otro = AcumuladorEstadistico(rango_histograma=(0, 20)).actualizar([3])
+    with pytest.raises(ValueError):
+        uno.fusionar(otro)
+
+
+def test_cuantil_de_acumulador_vacio():
+    with pytest.raises(ValueError):
+        AcumuladorEstadistico().cuantil(0.5)
@@ -0,0 +1,79 @@
+"""
+Inversas de la normal y la triangular, estrategias de muestreo y su
+reducción de varianza.
+"""
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from Calculos_Financieros import EntradasFinancieras
+from Generacion_Variables import (
+    SAMPLING_METHODS, normal_ppf, sample_lunches_and_cost, triangular_ppf, uniform_samples,
+)
+from Simulacion_Monte_Carlo import SIM_PARAMS_DEFECTO, estimar_reduccion_varianza
+
+# Probabilidades que cubren el centro y las dos colas (donde cambia la aproximación de Acklam)
+U = np.r_[1e-9, 1e-5, 0.001, 0.02, np.linspace(0.05, 0.95, 19), 0.98, 0.999, 1 - 1e-5, 1 - 1e-9]
+
+
+def _triangular_cdf(x, a, b, c):
+    x = np.asarray(x, dtype=float)
+    return np.where(x <= c, (x - a) ** 2 / ((b - a) * (c - a)), 1 - (b - x) ** 2 / ((b - a) * (b - c)))
+
+
+def test_normal_ppf_contra_la_inversa_exacta():
+    esperado = np.array([NormalDist(1000, 50).inv_cdf(u) for u in U])
+    np.testing.assert_allclose(normal_ppf(U, 1000, 50), esperado, rtol=0, atol=50 * 5e-9)
+
+
+def test_triangular_ppf_invierte_la_distribucion():
+    a, b, c = 750, 1150, 900
+    x = triangular_ppf(U, a, b, c)
+    np.testing.assert_allclose(_triangular_cdf(x, a, b, c), U, atol=1e-12)
+    assert np.all(np.diff(x) > 0)
+    # Y coincide con los cuantiles de la triangular de numpy
+    muestras = np.random.default_rng(5).triangular(a, c, b, 400_000)
+    np.testing.assert_allclose(triangular_ppf([0.1, 0.5, 0.9], a, b, c),
+                               np.quantile(muestras, [0.1, 0.5, 0.9]), rtol=2e-3)
+
+
+def test_triangular_ppf_con_rango_degenerado_o_modo_fuera_de_rango():
+    np.testing.assert_array_equal(triangular_ppf(U, 900, 900, 900), np.full_like(U, 900))
+    np.testing.assert_allclose(triangular_ppf(U, 750, 1150, 2000), triangular_ppf(U, 750, 1150, 1150))
+
+
+@pytest.mark.parametrize("method", SAMPLING_METHODS)
+def test_precio_de_carne_fijo(method):
+    _, carne = sample_lunches_and_cost(64, 120, 15, 900, 900, 900, 900, method=method, seed=1)
+    np.testing.assert_array_equal(carne, np.full(64, 900.0))
+
+
+@pytest.mark.parametrize("method", ["latin_hypercube", "sobol"])
+def test_uniformes_estratificadas(method):
+    n = 256
+    u = uniform_samples(n, 2, method, np.random.default_rng(3))
+    assert u.shape == (n, 2) and np.all((u > 0) & (u < 1))
+    # Cada dimensión tiene exactamente un punto en cada intervalo [k/n, (k+1)/n)
+    for dimension in range(2):
+        np.testing.assert_array_equal(np.sort(np.floor(u[:, dimension] * n)), np.arange(n))
+
+
+def test_antiteticas_en_pares():
+    u = uniform_samples(10, 2, "antithetic", np.random.default_rng(3))
+    np.testing.assert_allclose(u[:5] + u[5:], 1.0)
+
+
+def test_misma_semilla_mismas_muestras():
+    for method in SAMPLING_METHODS:
+        primera = sample_lunches_and_cost(500, 120, 15, 900, 750, 1150, 900, method=method, seed=42)
+        segunda = sample_lunches_and_cost(500, 120, 15, 900, 750, 1150, 900, method=method, seed=42)
+        np.testing.assert_array_equal(primera[0], segunda[0])
+        np.testing.assert_array_equal(primera[1], segunda[1])
+
+
+@pytest.mark.parametrize("method", ["antithetic", "latin_hypercube", "sobol"])
+def test_reduccion_de_varianza(method):
+    reduccion = estimar_reduccion_varianza(EntradasFinancieras(), SIM_PARAMS_DEFECTO, method,
+                                           replicaciones=2_000, repeticiones=20, semilla=3)
+    assert reduccion.factor > 5